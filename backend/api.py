@@ -1,10 +1,23 @@
 # backend/api.py
 
+import asyncio
 import logging
 import base64
+import json
 import time
-from fastapi import FastAPI, HTTPException, Request
+
+# tiempo de importación de la api y sus dependencias (informe de arranque)
+_IMPORT_STARTED_AT = time.perf_counter()
+
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from functools import partial
+from fastapi import FastAPI, HTTPException, Request, Query, WebSocket, WebSocketDisconnect
+from fastapi.requests import HTTPConnection
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any
 
@@ -12,13 +25,33 @@ from typing import List, Dict, Any
 from src.utils.logger_config import setup_logging
 setup_logging()
 
+import config
+
 from src.analysis.facial_emotion import initialize_detector
-from src.analysis.voice_transcription import run_transcription
-from src.analysis.voice_emotion import get_recognizer
-from src.chat.llm_client import get_groq_response, extract_memory_from_text
-from src.audio.tts_player import run_synthesis
-from src.chat.prompt_builder import build_llm_prompt, build_memory_extraction_prompt
-from src.database.data_manager import setup_database, start_new_session, save_interaction_encrypted, save_memory_fact, get_all_memory
+from src.analysis.voice_transcription import create_asr_backend, DeepgramASR, close_transcription_client
+from src.analysis.inference_batcher import InferenceBatcher, InferenceQueueFull
+from src.audio.audio_decoder import AudioInput, resample
+from src.audio.vad import EnergyEndpointer
+from src.analysis.streaming_asr import create_streaming_asr
+from src.analysis.streaming_emotion import StreamingEmotionRecognizer
+from src.chat.llm_client import (
+    get_groq_response_async, stream_groq_response, extract_memory_from_text_async, summarize_conversation_async,
+    close_llm_client, LLM_ERROR_MESSAGE, LLMStreamInterrupted
+)
+from src.chat.sentence_splitter import SentenceSplitter
+from src.chat.memory_worker import MemoryExtractionQueue
+from src.chat.session_store import SessionStore
+from src.audio.tts_player import create_tts_backend, EdgeTTSBackend
+from src.audio.tts_cache import TTSCache
+from src.chat.context_window import ContextWindowManager
+from src.chat.prompt_templates import list_templates
+from src.database.data_manager import (
+    setup_database, start_new_session, get_all_memory, get_recent_messages, get_session_interactions,
+    get_emotion_timeseries, WriteBatcher, close_all_connections
+)
+from src.utils.startup import StartupTracker
+
+IMPORT_TIME_S = time.perf_counter() - _IMPORT_STARTED_AT
 
 # inicializar aplicación FastAPI
 app = FastAPI(
@@ -38,34 +71,200 @@ app.add_middleware(
 
 # --- cargar de modelos (singleton en el estado de la app) ---
 @app.on_event("startup")
-def load_models_on_startup():
-    logging.info("Cargando modelos de IA en memoria...")
-    app.state.facial_detector = initialize_detector()
-    app.state.vocal_recognizer = get_recognizer(method="onnx_fp32")
-    setup_database()
-    if app.state.facial_detector and app.state.vocal_recognizer:
-        logging.info("Modelos y base de datos listos.")
+async def load_models_on_startup():
+    """
+    Prepara lo ligero (base de datos, colas, cachés) y carga los modelos en paralelo, en segundo plano
+    por defecto: la api acepta conexiones enseguida y /health/ready responde 503 hasta que terminan.
+    """
+    startup = app.state.startup = StartupTracker(import_time_s=IMPORT_TIME_S)
+    # los modelos se asignan al terminar la carga; hasta entonces los turnos responden 503
+    app.state.facial_detector = None
+    app.state.vocal_recognizer = None
+    app.state.inference_batcher = None
+    app.state.asr_backend = None
+    app.state.tts_backend = None
+    app.state.tts_warmup_task = None
+    # pool acotado para la inferencia ONNX, que es CPU y no debe bloquear la transcripción
+    app.state.inference_executor = ThreadPoolExecutor(
+        max_workers=config.INFERENCE_MAX_WORKERS, thread_name_prefix="onnx-inference"
+    )
+    with startup.step("database"):
+        setup_database()
+    # escritura diferida: cada turno (usuario + asistente) se guarda en una sola transacción
+    app.state.db_writer = WriteBatcher(
+        max_batch=config.DB_WRITE_MAX_BATCH, flush_interval_s=config.DB_WRITE_FLUSH_INTERVAL_S
+    )
+    app.state.db_writer.start()
+    # contexto de conversación por sesión en el servidor; se reconstruye desde sqlite si no está en caché
+    app.state.session_store = SessionStore(
+        loader=_load_session_from_db,
+        max_sessions=config.SESSION_STORE_MAX_SESSIONS,
+        max_messages=config.SESSION_STORE_MAX_MESSAGES,
+        ttl_s=config.SESSION_STORE_TTL_S,
+    )
+    app.state.context_window = ContextWindowManager(
+        summarize_fn=summarize_conversation_async,
+        token_budget=config.CONTEXT_TOKEN_BUDGET,
+        summary_max_words=config.CONTEXT_SUMMARY_MAX_WORDS,
+    )
+    # la extracción de memoria se hace en segundo plano, fuera del camino crítico de la respuesta
+    app.state.memory_queue = MemoryExtractionQueue(
+        extract_fn=partial(extract_memory_from_text_async, raise_errors=True),
+        save_fn=app.state.db_writer.submit_memory_facts,
+        # el contexto de la sesión en caché recibe los hechos en cuanto se guardan; el sondeo solo los entrega al cliente
+        on_facts=app.state.session_store.update_memory,
+        max_retries=config.MEMORY_MAX_RETRIES,
+        maxsize=config.MEMORY_QUEUE_MAXSIZE,
+    )
+    # las respuestas cortas y repetitivas (y los mensajes de error) no se vuelven a sintetizar
+    app.state.tts_cache = TTSCache(
+        max_memory_bytes=config.TTS_CACHE_MEMORY_MB * 1024 * 1024,
+        cache_dir=config.TTS_CACHE_DIR,
+        max_disk_bytes=config.TTS_CACHE_DISK_MB * 1024 * 1024,
+    )
+    app.state.model_loading_task = asyncio.create_task(_load_models(startup))
+    if not config.STARTUP_BACKGROUND_LOADING:
+        await app.state.model_loading_task
+
+async def _load_models(startup: StartupTracker):
+    """Carga los modelos en hilos paralelos (las importaciones pesadas se hacen dentro de cada carga)."""
+    loaders = {
+        "vocal_recognizer": _load_vocal_recognizer,
+        "asr_backend": _load_asr_backend,
+        "tts_backend": _load_tts_backend,
+    }
+    if config.FACIAL_DETECTOR_ENABLED:
+        loaders["facial_detector"] = initialize_detector
     else:
-        logging.error("Fallo crítico al cargar modelos, la API puede no funcionar correctamente")
+        startup.skip("facial_detector", "FACIAL_DETECTOR_ENABLED=false")
+
+    # sin detector facial la api sigue atendiendo turnos; sin los demás modelos, no
+    results = await asyncio.gather(*(startup.load(name, load_fn, required=name != "facial_detector")
+                                     for name, load_fn in loaders.items()))
+    for name, result in zip(loaders, results):
+        setattr(app.state, name, result)
+    app.state.inference_batcher = _create_inference_batcher(app.state.vocal_recognizer)
+    startup.finish()
+
+    # pre-sintetiza las frases fijas en segundo plano con el motor ya cargado
+    if config.TTS_CACHE_WARMUP and app.state.tts_backend:
+        app.state.tts_warmup_task = asyncio.create_task(app.state.tts_cache.warm_up(
+            TTS_WARMUP_PHRASES, app.state.tts_backend.synthesize, app.state.tts_backend.voice_id, app.state.tts_backend.audio_format
+        ))
+
+def _load_vocal_recognizer():
+    # el reconocedor se importa aquí, en el hilo de carga, y no al importar la api
+    from src.analysis.voice_emotion import get_recognizer
+    return get_recognizer(method=config.VOCAL_MODEL_METHOD)
+
+def _models_ready(state) -> bool:
+    startup = getattr(state, "startup", None)
+    return startup is None or startup.ready
+
+def _ensure_models_ready(http_request: Request):
+    if not _models_ready(http_request.app.state):
+        raise HTTPException(status_code=503, detail="El servidor está cargando los modelos. Inténtalo de nuevo en unos segundos.",
+                            headers={"Retry-After": "5"})
+
+def _load_asr_backend():
+    """Carga el motor de transcripción configurado una sola vez; si el modelo local falla, se usa Deepgram."""
+    try:
+        return create_asr_backend(config.ASR_BACKEND)
+    except Exception as e:
+        logging.error(f"No se pudo cargar el motor de transcripción '{config.ASR_BACKEND}', se usa Deepgram: {e}")
+        return DeepgramASR(compress_pcm=config.DEEPGRAM_COMPRESS_PCM)
+
+def _load_tts_backend():
+    """Carga el motor de síntesis configurado una sola vez; si la voz local falla, se usa Edge-TTS."""
+    try:
+        return create_tts_backend(config.TTS_BACKEND)
+    except Exception as e:
+        logging.error(f"No se pudo cargar el motor de síntesis '{config.TTS_BACKEND}', se usa Edge-TTS: {e}")
+        return EdgeTTSBackend()
+
+def _create_inference_batcher(vocal_recognizer):
+    """Micro-lotes delante del reconocedor: las peticiones concurrentes comparten una sola inferencia ONNX."""
+    if not vocal_recognizer:
+        return None
+    max_batch = config.VOCAL_BATCH_MAX_SIZE
+    if not vocal_recognizer.supports_batching:
+        logging.warning("El modelo ONNX no admite lotes (batch fijo en 1); vuelve a exportarlo con scripts/export_to_onnx.py.")
+        max_batch = 1
+    batcher = InferenceBatcher(
+        vocal_recognizer.run_batch,
+        max_batch=max_batch,
+        max_wait_ms=config.VOCAL_BATCH_MAX_WAIT_MS,
+        bucket_size=int(config.VOCAL_BATCH_BUCKET_S * vocal_recognizer.target_sampling_rate),
+        max_queue=config.VOCAL_BATCH_MAX_QUEUE,
+        exact_length=not vocal_recognizer.has_attention_mask,
+    )
+    batcher.start()
+    return batcher
+
+def _load_session_from_db(session_id: int):
+    return get_recent_messages(session_id, limit=config.SESSION_STORE_MAX_MESSAGES), get_all_memory()
+
+# frases fijas que se pre-sintetizan al arrancar
+TTS_WARMUP_PHRASES = [LLM_ERROR_MESSAGE]
+
+@app.on_event("shutdown")
+async def release_resources_on_shutdown():
+    if not app.state.model_loading_task.done():
+        # los hilos de carga no se pueden interrumpir; solo se deja de esperar por ellos
+        app.state.model_loading_task.cancel()
+    if app.state.tts_warmup_task is not None:
+        app.state.tts_warmup_task.cancel()
+    await app.state.memory_queue.stop()
+    await asyncio.to_thread(app.state.db_writer.stop)
+    if app.state.inference_batcher:
+        await asyncio.to_thread(app.state.inference_batcher.stop)
+    close_all_connections()
+    await close_transcription_client()
+    if app.state.asr_backend:
+        app.state.asr_backend.close()
+    await close_llm_client()
+    executor = getattr(app.state, "inference_executor", None)
+    if executor:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def _timed_await(awaitable):
+    """Espera una corrutina y devuelve su resultado junto con la duración en segundos."""
+    start = time.perf_counter()
+    result = await awaitable
+    return result, time.perf_counter() - start
 
 # --- modelos de datos (pydantic) para validación ---
 class EmotionPayload(BaseModel):
     stable_dominant_emotion: str | None = None
     average_scores: Dict[str, float] | None = None
 
-class InteractionRequest(BaseModel):
+class InteractionOptions(BaseModel):
+    """Datos de un turno salvo el audio (en /ws/interact el audio llega en frames binarios)."""
     session_id: int
-    audio_b64: str
+    # mimetype que declara el navegador; solo se usa si el formato no se reconoce por su cabecera
+    audio_mimetype: str | None = None
     facial_emotion: EmotionPayload | None = None
-    chat_history: List[Dict[str, str]]
-    long_term_memory: Dict[str, Any]
+    # el servidor mantiene el contexto de la sesión; estos campos quedan por compatibilidad.
+    # si se envía chat_history, sustituye al historial guardado y la respuesta incluye el historial completo
+    chat_history: List[Dict[str, str]] | None = None
+    long_term_memory: Dict[str, Any] | None = None
+    include_full_history: bool = False
+    # emociones vocales por ventana de tiempo (útil en notas de voz largas)
+    include_vocal_windows: bool = False
+
+class InteractionRequest(InteractionOptions):
+    audio_b64: str
 
 class InteractionResponse(BaseModel):
     ai_text: str
     ai_audio_b64: str | None
+    # formato del audio según el motor de síntesis (audio/mpeg con Edge-TTS)
+    ai_audio_mimetype: str | None = None
     extracted_memory: Dict[str, Any]
-    updated_chat_history: List[Dict[str, str]]
+    new_messages: List[Dict[str, str]]
+    updated_chat_history: List[Dict[str, str]] | None = None
     vocal_analysis_result: List[Dict[str, Any]] | None
+    vocal_windows: List[Dict[str, Any]] | None = None
     profiling_data: Dict[str, float] | None = None
 
 # --- endpoints ---
@@ -74,6 +273,22 @@ class InteractionResponse(BaseModel):
 def read_root():
     return {"status": "Lumen Backend está funcionando."}
 
+@app.get("/health/live")
+def health_live():
+    """El proceso responde (no comprueba los modelos)."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def health_ready(http_request: Request):
+    """Estado del arranque con la duración de cada paso; 503 mientras se cargan los modelos o si falta uno obligatorio."""
+    startup = getattr(http_request.app.state, "startup", None)
+    if startup is None:
+        return {"status": "ready"}
+    report = startup.report()
+    if not startup.ready or startup.failed:
+        return JSONResponse(status_code=503, content=report, headers={"Retry-After": "5"})
+    return report
+
 @app.post("/session", status_code=201)
 def create_new_session():
     session_id = start_new_session()
@@ -82,78 +297,210 @@ def create_new_session():
     logging.info(f"Nueva sesión creada con ID: {session_id}")
     return {"session_id": session_id}
 
-@app.post("/interact", response_model=InteractionResponse)
-def process_interaction(request: InteractionRequest, http_request: Request):
-    # iniciar profiling
-    profiling_data = {}
-    start_total_time = time.perf_counter()
+@app.get("/session/{session_id}/memory")
+async def get_new_session_memory(session_id: int, http_request: Request):
+    """Sondeo de los hechos de memoria extraídos en segundo plano que aún no se han entregado."""
+    memory_queue = http_request.app.state.memory_queue
+    return {
+        "session_id": session_id,
+        "new_facts": memory_queue.pop_new_facts(session_id),
+        "pending_jobs": memory_queue.pending_jobs(session_id)
+    }
 
-    logging.info(f"Procesando interacción para la sesión {request.session_id}...")
-    
-    vocal_recognizer = http_request.app.state.vocal_recognizer
-    if not vocal_recognizer:
-        raise HTTPException(status_code=503, detail="Servicio no disponible: los modelos de IA no están cargados.")
+@app.get("/session/{session_id}/history")
+def get_session_history(session_id: int, after_id: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=200)):
+    """Historial descifrado de una sesión, paginado por interaction_id (usar 'next_after_id')."""
+    interactions, next_after_id = get_session_interactions(session_id, after_id=after_id, limit=limit)
+    return {"session_id": session_id, "interactions": interactions, "next_after_id": next_after_id}
+
+@app.get("/session/{session_id}/emotions")
+def get_session_emotions(session_id: int, after_id: int = Query(0, ge=0), limit: int = Query(200, ge=1, le=1000)):
+    """Serie temporal de emociones facial y vocal de los turnos del usuario, paginada igual que el historial."""
+    points, next_after_id = get_emotion_timeseries(session_id, after_id=after_id, limit=limit)
+    return {"session_id": session_id, "points": points, "next_after_id": next_after_id}
+
+@app.get("/metrics")
+async def get_metrics(http_request: Request):
+    return {
+        "memory_queue": http_request.app.state.memory_queue.metrics(),
+        "db_writer": http_request.app.state.db_writer.metrics(),
+        "session_store": http_request.app.state.session_store.metrics(),
+        "context_window": http_request.app.state.context_window.metrics(),
+        "inference_batcher": http_request.app.state.inference_batcher.metrics() if http_request.app.state.inference_batcher else None,
+        "vocal_recognizer": getattr(http_request.app.state.vocal_recognizer, "session_info", None),
+        "asr": http_request.app.state.asr_backend.metrics() if http_request.app.state.asr_backend else None,
+        "tts_cache": http_request.app.state.tts_cache.metrics(),
+        "prompt_templates": list_templates()
+    }
+
+async def _synthesize_speech(http_request: HTTPConnection, text: str) -> bytes | None:
+    """Síntesis de voz a través de la caché: las frases ya sintetizadas no vuelven al motor."""
+    tts_backend = http_request.app.state.tts_backend
+    key = TTSCache.key(text, tts_backend.voice_id, tts_backend.audio_format)
+    return await http_request.app.state.tts_cache.get_or_synthesize(key, lambda: tts_backend.synthesize(text))
 
+async def _predict_vocal_emotion(http_request: HTTPConnection, audio: AudioInput, include_windows: bool = False):
+    """
+    Decodifica y normaliza el audio en el pool de inferencia y envía sus ventanas al
+    planificador de micro-lotes, sin ocupar un hilo mientras espera el lote.
+    Devuelve (emociones del clip, emociones por ventana o None).
+    """
+    state = http_request.app.state
+    loop = asyncio.get_running_loop()
+    windows = await loop.run_in_executor(
+        state.inference_executor, state.vocal_recognizer.prepare, audio,
+        config.VOCAL_CHUNK_LENGTH_S, config.VOCAL_CHUNK_OVERLAP_S
+    )
+    if windows is None:
+        return None, None
+    # todas las ventanas del clip llegan juntas al planificador y comparten lote
+    window_logits = await asyncio.gather(*(asyncio.wrap_future(state.inference_batcher.submit(values)) for values in windows.values))
+    per_window = state.vocal_recognizer.window_scores(windows, window_logits) if include_windows else None
+    return state.vocal_recognizer.postprocess(windows, window_logits), per_window
+
+def _decode_request_audio(request: InteractionRequest) -> AudioInput:
     try:
         audio_bytes = base64.b64decode(request.audio_b64)
     except Exception:
         raise HTTPException(status_code=400, detail="Error al decodificar el audio base64.")
+    return AudioInput(audio_bytes, request.audio_mimetype)
 
-    # 1 análiss en paralelo
+async def _analyze_user_turn(request: InteractionOptions, http_request: HTTPConnection, audio: AudioInput,
+                             profiling_data: dict, transcript=None, vocal_analysis=None):
+    """
+    Etapa común de todos los endpoints de interacción: transcribe y analiza la emoción vocal
+    en paralelo. El formato del audio se detecta una vez y se decodifica una sola vez para
+    ambos análisis. 'transcript' es una corrutina opcional que sustituye a la transcripción
+    del motor configurado (p. ej. el cierre de una transcripción en streaming) y 'vocal_analysis' otra
+    que sustituye al análisis del clip completo (p. ej. el cierre del análisis en streaming).
+    La interacción se guarda al final del turno.
+    """
+    vocal_recognizer = http_request.app.state.vocal_recognizer
+    if not vocal_recognizer:
+        raise HTTPException(status_code=503, detail="Servicio no disponible: los modelos de IA no están cargados.")
+
+    profiling_data['audio_input_bytes'] = len(audio.data)
+
+    # análisis en paralelo: la inferencia ONNX corre en el pool y el planificador mientras esperamos la transcripción
     start_analysis_time = time.perf_counter()
-    user_text = run_transcription(audio_bytes)
-    profiling_data['transcription_duration_s'] = time.perf_counter() - start_analysis_time
+    try:
+        (user_text, transcription_duration), ((vocal_emotion_data, vocal_windows), vocal_duration) = await asyncio.gather(
+            _timed_await(transcript if transcript is not None
+                         else http_request.app.state.asr_backend.transcribe(audio, profiling_data)),
+            _timed_await(vocal_analysis if vocal_analysis is not None
+                         else _predict_vocal_emotion(http_request, audio, request.include_vocal_windows)),
+        )
+    except InferenceQueueFull:
+        raise HTTPException(status_code=503, detail="Servicio saturado: la cola de análisis vocal está llena.")
+    analysis_critical_path = time.perf_counter() - start_analysis_time
 
-    start_vocal_time = time.perf_counter()
-    vocal_emotion_data = vocal_recognizer.predict(audio_bytes)
-    profiling_data['vocal_analysis_duration_s'] = time.perf_counter() - start_vocal_time
+    profiling_data['transcription_duration_s'] = transcription_duration
+    profiling_data['vocal_analysis_duration_s'] = vocal_duration
+    profiling_data['analysis_critical_path_s'] = analysis_critical_path
+    # tiempo ahorrado frente a ejecutar ambas etapas en serie
+    profiling_data['analysis_overlap_s'] = max(0.0, transcription_duration + vocal_duration - analysis_critical_path)
 
     if not user_text or not user_text.strip():
         raise HTTPException(status_code=400, detail="La transcripción falló o el audio estaba vacío.")
 
-    # 2 guardar interacción del usuario
     facial_emotion_data = request.facial_emotion.dict() if request.facial_emotion else {}
     user_interaction_data = {
+        "timestamp": datetime.now().isoformat(),
         "text": user_text,
         "facial_dominant": facial_emotion_data.get("stable_dominant_emotion"),
         "facial_scores": facial_emotion_data.get("average_scores"),
-        "vocal_analysis": vocal_emotion_data
+        "vocal_analysis": vocal_emotion_data,
+        # no se guarda en la base de datos; solo se devuelve si se pidió
+        "vocal_windows": vocal_windows
     }
-    save_interaction_encrypted(request.session_id, 'user', user_interaction_data)
-    
-    # 3 construir prompt y obtener respuesta del llm
-    updated_chat_history = request.chat_history + [{"role": "user", "content": user_text}]
-    prompt_messages = build_llm_prompt(updated_chat_history, user_text, {
+    return user_interaction_data
+
+async def _load_session_context(request: InteractionOptions, http_request: HTTPConnection):
+    """
+    Obtiene el contexto de la sesión guardado en el servidor. Si el cliente todavía envía
+    el historial completo (modo compatible), ese historial sustituye al guardado.
+    """
+    session_store = http_request.app.state.session_store
+    if request.chat_history is not None:
+        return session_store.put(request.session_id, request.chat_history, request.long_term_memory)
+    context = await session_store.get(request.session_id)
+    if request.long_term_memory:
+        context.long_term_memory.update(request.long_term_memory)
+    return context
+
+async def _prepare_turn(request: InteractionOptions, http_request: HTTPConnection, audio: AudioInput,
+                        profiling_data: dict, transcript=None, vocal_analysis=None):
+    """Todo lo que precede a la llamada al LLM: análisis del audio, contexto de la sesión y prompt."""
+    user_interaction_data, context = await asyncio.gather(
+        _analyze_user_turn(request, http_request, audio, profiling_data, transcript, vocal_analysis),
+        _load_session_context(request, http_request)
+    )
+    # hechos extraídos en segundo plano que el cliente aún no ha recibido; el contexto en caché ya los
+    # tiene (on_facts), pero un historial enviado por el cliente lo reemplaza
+    extracted_facts = http_request.app.state.memory_queue.pop_new_facts(request.session_id)
+    context.long_term_memory.update(extracted_facts)
+
+    # historial reciente literal y turnos antiguos resumidos, dentro del presupuesto de tokens
+    prompt_messages = http_request.app.state.context_window.build_prompt(context, user_interaction_data["text"], {
         "facial_dominant": user_interaction_data["facial_dominant"],
-        "vocal_emotions": vocal_emotion_data
-    }, request.long_term_memory)
+        "vocal_emotions": user_interaction_data["vocal_analysis"]
+    })
+    return user_interaction_data, context, extracted_facts, prompt_messages
+
+def _record_turn(request: InteractionOptions, http_request: HTTPConnection, context, user_interaction_data: dict, ai_response_text: str):
+    """
+    Registra el turno terminado: contexto de la sesión, escritura diferida en la base de datos y
+    extracción de memoria en segundo plano. Devuelve (mensajes nuevos, historial completo o None).
+    """
+    state = http_request.app.state
+    user_text = user_interaction_data["text"]
+    new_messages = [{"role": "user", "content": user_text}]
+    if ai_response_text:
+        new_messages.append({"role": "assistant", "content": ai_response_text})
+
+    state.session_store.append(request.session_id, new_messages)
+    state.db_writer.submit_turn(
+        request.session_id, user_interaction_data, {"text": ai_response_text} if ai_response_text else None
+    )
+    if ai_response_text:
+        state.memory_queue.submit(request.session_id, user_text, ai_response_text)
 
+    if request.chat_history is not None:
+        return new_messages, request.chat_history + new_messages
+    if request.include_full_history:
+        return new_messages, context.history()
+    return new_messages, None
+
+@app.post("/interact", response_model=InteractionResponse)
+async def process_interaction(request: InteractionRequest, http_request: Request):
+    _ensure_models_ready(http_request)
+    # iniciar profiling
+    profiling_data = {}
+    start_total_time = time.perf_counter()
+
+    logging.info(f"Procesando interacción para la sesión {request.session_id}...")
+
+    # 1 y 2 análisis en paralelo, contexto de la sesión y construcción del prompt
+    audio = _decode_request_audio(request)
+    user_interaction_data, context, extracted_facts, prompt_messages = await _prepare_turn(request, http_request, audio, profiling_data)
+    vocal_emotion_data = user_interaction_data["vocal_analysis"]
+
+    # 3 obtener respuesta del llm
     start_llm_time = time.perf_counter()
-    ai_response_text = get_groq_response(prompt_messages)
+    ai_response_text = await get_groq_response_async(prompt_messages)
     profiling_data['llm_response_duration_s'] = time.perf_counter() - start_llm_time
     
-    # 4 extraer y guardar memoria
-    start_memory_time = time.perf_counter()
-    memory_prompt = build_memory_extraction_prompt(user_text, ai_response_text)
-    extracted_facts = extract_memory_from_text(memory_prompt)
-    if extracted_facts:
-        for key, value in extracted_facts.items():
-            save_memory_fact(key, value)
-    profiling_data['memory_extraction_duration_s'] = time.perf_counter() - start_memory_time
-    
-    # 5 guardar interacción de la ia
-    save_interaction_encrypted(request.session_id, 'assistant', {"text": ai_response_text})
+    # 4 y 5 registrar el turno: contexto, escritura diferida y extracción de memoria en segundo plano
+    new_messages, updated_chat_history = _record_turn(request, http_request, context, user_interaction_data, ai_response_text)
     
     # 6 sintetizar audio
     start_tts_time = time.perf_counter()
-    ai_audio_bytes = run_synthesis(ai_response_text)
+    ai_audio_bytes = await _synthesize_speech(http_request, ai_response_text)
     profiling_data['tts_synthesis_duration_s'] = time.perf_counter() - start_tts_time
 
     ai_audio_b64 = base64.b64encode(ai_audio_bytes).decode('utf-8') if ai_audio_bytes else None
     
-    # 7 devolver respuesta completa
-    final_chat_history = updated_chat_history + [{"role": "assistant", "content": ai_response_text}]
-
+    # 7 devolver respuesta (solo el delta del historial, salvo que se pida completo)
     # fin del profiling
     profiling_data['total_interaction_duration_s'] = time.perf_counter() - start_total_time
     logging.info(f"profiling data for session {request.session_id}: {profiling_data}")
@@ -161,8 +508,369 @@ def process_interaction(request: InteractionRequest, http_request: Request):
     return InteractionResponse(
         ai_text=ai_response_text,
         ai_audio_b64=ai_audio_b64,
+        ai_audio_mimetype=http_request.app.state.tts_backend.mimetype if ai_audio_b64 else None,
         extracted_memory=extracted_facts,
-        updated_chat_history=final_chat_history,
+        new_messages=new_messages,
+        updated_chat_history=updated_chat_history,
         vocal_analysis_result=vocal_emotion_data,
+        vocal_windows=user_interaction_data["vocal_windows"],
         profiling_data=profiling_data
-    )
\ No newline at end of file
+    )
+
+def _sse_event(event: str, data: dict) -> str:
+    """Serializa un evento en formato Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_turn_events(request: InteractionOptions, http_request: HTTPConnection, turn: tuple,
+                              profiling_data: dict, start_total_time: float):
+    """
+    Genera los eventos de un turno en streaming, común a /interact/stream (SSE) y /ws/interact.
+    Emite los tokens del LLM según llegan y sintetiza cada frase en cuanto se cierra, entregando
+    el audio (bytes en el formato del motor de síntesis) por orden sin esperar al resto de la respuesta.
+    Eventos: ('transcript', datos), ('token', datos), ('audio', datos con 'audio' en bytes), ('done', datos).
+    Si el LLM se corta a mitad de la respuesta, 'done' lleva 'interrupted' y solo se guarda la parte generada.
+    """
+    user_interaction_data, context, extracted_facts, prompt_messages = turn
+    events = asyncio.Queue()
+    audio_tasks = asyncio.Queue()
+    response_tokens = []
+    interrupted = False
+    start_llm_time = time.perf_counter()
+
+    async def produce_tokens():
+        nonlocal interrupted
+        splitter = SentenceSplitter()
+        try:
+            async for token in stream_groq_response(prompt_messages):
+                if not response_tokens:
+                    profiling_data['time_to_first_token_s'] = time.perf_counter() - start_total_time
+                response_tokens.append(token)
+                await events.put(("token", {"text": token}))
+                for sentence in splitter.feed(token):
+                    # la síntesis arranca ya, mientras el llm sigue generando
+                    await audio_tasks.put((sentence, asyncio.create_task(_synthesize_speech(http_request, sentence))))
+        except LLMStreamInterrupted as e:
+            # la respuesta termina en lo ya enviado; se sintetiza y se guarda solo esa parte
+            logging.warning(f"Respuesta del LLM interrumpida en la sesión {request.session_id}: {e}")
+            interrupted = True
+        tail = splitter.flush()
+        if tail:
+            await audio_tasks.put((tail, asyncio.create_task(_synthesize_speech(http_request, tail))))
+        profiling_data['llm_response_duration_s'] = time.perf_counter() - start_llm_time
+        await audio_tasks.put(None)
+
+    async def emit_audio():
+        index = 0
+        mimetype = http_request.app.state.tts_backend.mimetype
+        while (item := await audio_tasks.get()) is not None:
+            sentence, task = item
+            audio_bytes = await task
+            if not audio_bytes:
+                continue
+            if index == 0:
+                profiling_data['time_to_first_audio_s'] = time.perf_counter() - start_total_time
+            await events.put(("audio", {"index": index, "text": sentence, "mimetype": mimetype, "audio": audio_bytes}))
+            index += 1
+
+    async def run_pipeline():
+        try:
+            await asyncio.gather(produce_tokens(), emit_audio())
+        finally:
+            await events.put(None)
+
+    yield "transcript", {
+        "user_text": user_interaction_data["text"],
+        "vocal_analysis_result": user_interaction_data["vocal_analysis"],
+        "vocal_windows": user_interaction_data["vocal_windows"]
+    }
+
+    pipeline = asyncio.create_task(run_pipeline())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        await pipeline
+    finally:
+        # si el cliente se desconecta, no dejar síntesis huérfanas
+        pipeline.cancel()
+        while not audio_tasks.empty():
+            item = audio_tasks.get_nowait()
+            if item is not None:
+                item[1].cancel()
+        # el turno se registra aunque el stream se corte, con la parte de la respuesta generada
+        ai_response_text = "".join(response_tokens).strip()
+        new_messages, updated_chat_history = _record_turn(
+            request, http_request, context, user_interaction_data, ai_response_text
+        )
+
+    profiling_data['total_interaction_duration_s'] = time.perf_counter() - start_total_time
+    logging.info(f"profiling data (stream) for session {request.session_id}: {profiling_data}")
+
+    yield "done", {
+        "ai_text": ai_response_text,
+        "interrupted": interrupted,
+        "extracted_memory": extracted_facts,
+        "new_messages": new_messages,
+        "updated_chat_history": updated_chat_history,
+        "profiling_data": profiling_data
+    }
+
+@app.post("/interact/stream")
+async def process_interaction_stream(request: InteractionRequest, http_request: Request):
+    """
+    Variante en streaming (SSE) de /interact. Eventos: 'transcript', 'token', 'audio' (audio en
+    base64 de cada frase, con su mimetype) y 'done'.
+    """
+    _ensure_models_ready(http_request)
+    profiling_data = {}
+    start_total_time = time.perf_counter()
+
+    logging.info(f"Procesando interacción en streaming para la sesión {request.session_id}...")
+
+    # el análisis se hace antes de abrir el stream para poder responder con códigos http de error
+    audio = _decode_request_audio(request)
+    turn = await _prepare_turn(request, http_request, audio, profiling_data)
+
+    async def event_stream():
+        async with aclosing(_stream_turn_events(request, http_request, turn, profiling_data, start_total_time)) as events:
+            async for event, data in events:
+                if event == "audio":
+                    data = {**{k: v for k, v in data.items() if k != "audio"}, "audio_b64": base64.b64encode(data["audio"]).decode('utf-8')}
+                yield _sse_event(event, data)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _accept_when_ready(websocket: WebSocket) -> bool:
+    """Mientras se cargan los modelos, responde con un error 503 y cierra (1013: inténtalo más tarde)."""
+    if _models_ready(websocket.app.state):
+        return True
+    await websocket.send_json({"type": "error", "status": 503, "detail": "El servidor está cargando los modelos."})
+    await websocket.close(code=1013)
+    return False
+
+def _parse_control_message(text: str) -> dict:
+    """Mensaje de control de un websocket. Lanza ValueError si no es un objeto JSON."""
+    control = json.loads(text)
+    if not isinstance(control, dict):
+        raise ValueError("El mensaje de control debe ser un objeto JSON.")
+    return control
+
+@app.websocket("/ws/interact")
+async def interaction_websocket(websocket: WebSocket):
+    """
+    Transporte binario para los turnos de voz, sin base64 en ninguna dirección.
+    Por cada turno el cliente envía un mensaje de texto {"type": "start", ...opciones de /interact sin audio_b64},
+    el audio grabado en uno o varios frames binarios y {"type": "end"}. El servidor responde con los mismos
+    eventos que /interact/stream como JSON ({"type": "transcript" | "token" | "done" | "error", ...});
+    cada evento {"type": "audio", "index", "text", "mimetype", "size"} va seguido de un frame binario con el audio de la frase.
+    La conexión admite varios turnos seguidos.
+    """
+    await websocket.accept()
+    if not await _accept_when_ready(websocket):
+        return
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text") is None:
+                # frames binarios fuera de un turno: se ignoran
+                continue
+            try:
+                start_message = _parse_control_message(message["text"])
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "status": 400, "detail": f"Mensaje no válido: {e}"})
+                continue
+            if start_message.get("type") != "start":
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Se esperaba un mensaje 'start'."})
+                continue
+
+            audio_bytes = await _receive_audio_frames(websocket)
+            try:
+                options = InteractionOptions(**{key: value for key, value in start_message.items() if key != "type"})
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "status": 422, "detail": str(e)})
+                continue
+            if audio_bytes is None:
+                await websocket.send_json({"type": "error", "status": 413, "detail": "Audio demasiado grande."})
+                continue
+            await _run_websocket_turn(websocket, options, AudioInput(audio_bytes, options.audio_mimetype))
+    except WebSocketDisconnect:
+        pass
+    logging.info("Cliente desconectado de /ws/interact.")
+
+async def _receive_audio_frames(websocket: WebSocket) -> bytes | None:
+    """Acumula los frames binarios hasta el mensaje 'end'. Devuelve None si se supera el tamaño máximo."""
+    buffer = bytearray()
+    too_large = False
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("bytes") is not None:
+            if len(buffer) + len(message["bytes"]) > config.WS_MAX_AUDIO_BYTES:
+                too_large = True
+            elif not too_large:
+                buffer.extend(message["bytes"])
+        elif message.get("text") is not None:
+            try:
+                control = _parse_control_message(message["text"])
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "status": 400, "detail": f"Mensaje no válido: {e}"})
+                continue
+            if control.get("type") == "end":
+                return None if too_large else bytes(buffer)
+
+async def _run_websocket_turn(websocket: WebSocket, options: InteractionOptions, audio: AudioInput,
+                              transcript=None, vocal_analysis=None):
+    """Ejecuta un turno completo y envía sus eventos por el websocket (JSON y audio en frames binarios)."""
+    profiling_data = {}
+    start_total_time = time.perf_counter()
+    logging.info(f"Procesando interacción por websocket para la sesión {options.session_id}...")
+    try:
+        turn = await _prepare_turn(options, websocket, audio, profiling_data, transcript, vocal_analysis)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+        return
+
+    async with aclosing(_stream_turn_events(options, websocket, turn, profiling_data, start_total_time)) as events:
+        async for event, data in events:
+            if event == "audio":
+                audio_bytes = data["audio"]
+                await websocket.send_json({"type": "audio", "index": data["index"], "text": data["text"],
+                                           "mimetype": data["mimetype"], "size": len(audio_bytes)})
+                await websocket.send_bytes(audio_bytes)
+            else:
+                await websocket.send_json({"type": event, **data})
+
+def _create_vocal_stream(connection: HTTPConnection, on_update) -> StreamingEmotionRecognizer | None:
+    """Análisis vocal en streaming de una frase sobre el modelo cargado y el planificador de micro-lotes."""
+    state = connection.app.state
+    if not state.vocal_recognizer:
+        return None
+    return StreamingEmotionRecognizer(
+        state.vocal_recognizer,
+        lambda values: asyncio.wrap_future(state.inference_batcher.submit(values)),
+        window_s=config.VOCAL_STREAM_WINDOW_S,
+        hop_s=config.VOCAL_STREAM_HOP_S,
+        ema_alpha=config.VOCAL_STREAM_EMA_ALPHA,
+        on_update=on_update,
+    )
+
+@app.websocket("/ws/voice")
+async def voice_session_websocket(websocket: WebSocket):
+    """
+    Sesión de voz en tiempo real. El cliente envía {"type": "start", ...opciones de /interact sin audio_b64,
+    "sample_rate": 16000} y después el micrófono como frames binarios PCM de 16 bits mono. El servidor detecta
+    el inicio y el fin de cada frase (VAD por energía), transcribe en streaming mientras el usuario habla y
+    lanza el turno en cuanto termina la frase. La emoción vocal también se analiza mientras se habla, con
+    ventanas deslizantes. Eventos: {"type": "vad", "state"}, {"type": "partial", "text"},
+    {"type": "vocal_emotion", "start_s", "end_s", "emotions"} (puntuaciones suavizadas) y los de /ws/interact. Mientras se responde, el audio entrante se descarta (semidúplex).
+    {"type": "facial_emotion", ...} actualiza la emoción facial y {"type": "stop"} cierra la sesión.
+    """
+    await websocket.accept()
+    if not await _accept_when_ready(websocket):
+        return
+    try:
+        start_message = await websocket.receive_json()
+        sample_rate = int(start_message.get("sample_rate", 16000))
+        options = InteractionOptions(**{key: value for key, value in start_message.items() if key not in ("type", "sample_rate")})
+    except WebSocketDisconnect:
+        return
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "status": 422, "detail": str(e)})
+        await websocket.close()
+        return
+
+    target_rate = 16000
+    endpointer = EnergyEndpointer(
+        sample_rate=target_rate,
+        threshold_db=config.VAD_THRESHOLD_DB,
+        end_silence_ms=config.VAD_END_SILENCE_MS,
+        max_utterance_s=config.VAD_MAX_UTTERANCE_S,
+    )
+
+    async def send_partial(text: str):
+        await websocket.send_json({"type": "partial", "text": text})
+
+    async def send_vocal_emotion(update: dict):
+        await websocket.send_json({"type": "vocal_emotion", **update})
+
+    asr = None
+    vocal_stream = None
+    turn_task = None
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text") is not None:
+                try:
+                    control = _parse_control_message(message["text"])
+                    if control.get("type") == "stop":
+                        break
+                    if control.get("type") == "facial_emotion":
+                        options.facial_emotion = EmotionPayload(**{k: v for k, v in control.items() if k != "type"})
+                except ValueError as e:
+                    # un mensaje de control mal formado no cierra la sesión; la emoción facial anterior se mantiene
+                    await websocket.send_json({"type": "error", "status": 400, "detail": f"Mensaje no válido: {e}"})
+                continue
+            if message.get("bytes") is None or (turn_task is not None and not turn_task.done()):
+                continue
+
+            samples = np.frombuffer(message["bytes"], dtype="<i2").astype(np.float32) / 32768
+            samples = resample(samples, sample_rate, target_rate)
+            events = endpointer.process(samples)
+            started = any(event.type == "speech_start" for event in events)
+            ended = any(event.type == "speech_end" for event in events)
+
+            if started:
+                await websocket.send_json({"type": "vad", "state": "speech_start"})
+                asr = create_streaming_asr(config.STREAMING_ASR_BACKEND, target_rate, on_partial=send_partial,
+                                           asr_backend=websocket.app.state.asr_backend)
+                try:
+                    await asr.start()
+                    # el inicio de la frase (pre-roll incluido) ya está en el detector
+                    await asr.send(endpointer.current_utterance())
+                except Exception as e:
+                    logging.error(f"No se pudo iniciar la transcripción en streaming: {e}")
+                    asr = None
+                vocal_stream = _create_vocal_stream(websocket, send_vocal_emotion)
+                if vocal_stream is not None:
+                    vocal_stream.push(endpointer.current_utterance())
+            elif endpointer.in_speech or ended:
+                if asr is not None:
+                    await asr.send(samples)
+                if vocal_stream is not None:
+                    vocal_stream.push(samples)
+
+            if ended:
+                await websocket.send_json({"type": "vad", "state": "speech_end"})
+                utterance = endpointer.pop_utterance()
+                if asr is None:
+                    if vocal_stream is not None:
+                        vocal_stream.cancel()
+                        vocal_stream = None
+                    await websocket.send_json({"type": "error", "status": 503, "detail": "Transcripción en streaming no disponible."})
+                    continue
+                # el turno empieza ya: el cierre de la transcripción corre en paralelo con la última ventana vocal
+                vocal_analysis = vocal_stream.finalize(options.include_vocal_windows) if vocal_stream is not None else None
+                turn_task = asyncio.create_task(
+                    _run_websocket_turn(websocket, options, AudioInput.from_pcm(utterance, target_rate),
+                                        asr.finish(), vocal_analysis)
+                )
+                asr = None
+                vocal_stream = None
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if asr is not None:
+            await asr.abort()
+        if vocal_stream is not None:
+            vocal_stream.cancel()
+        if turn_task is not None and not turn_task.done():
+            turn_task.cancel()
+    logging.info("Sesión de voz cerrada.")
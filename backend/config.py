@@ -16,4 +16,107 @@ if not all([DEEPGRAM_API_KEY, GROQ_API_KEY, ENCRYPTION_KEY]):
     raise ValueError("Faltan una o más variables de entorno. Asegúrate de que DEEPGRAM_API_KEY, GROQ_API_KEY, y ENCRYPTION_KEY están definidas en tu archivo .env.")
 
 # otras configuraciones
-EDGE_VOICE = "es-CO-SalomeNeural"
\ No newline at end of file
+EDGE_VOICE = "es-CO-SalomeNeural"
+# volumen relativo que aplica Edge-TTS al sintetizar ("+100%" duplica la amplitud, unos +6 dB)
+EDGE_VOLUME = os.getenv("EDGE_VOLUME", "+100%")
+
+# motor de síntesis de voz: "edge" (servicio remoto) o "piper" (voz ONNX local en CPU, sin red)
+TTS_BACKEND = os.getenv("TTS_BACKEND", "edge")
+# formato del audio de los motores locales: wav, flac, ogg o mp3 (edge siempre devuelve mp3)
+TTS_AUDIO_FORMAT = os.getenv("TTS_AUDIO_FORMAT", "wav")
+PIPER_MODEL_PATH = os.getenv("PIPER_MODEL_PATH", "ai_resources/piper/es_MX-ald-medium.onnx")
+# velocidad (más de 1.0 es más lento) y ganancia lineal aplicada al PCM
+PIPER_LENGTH_SCALE = float(os.getenv("PIPER_LENGTH_SCALE", "1.0"))
+PIPER_VOLUME = float(os.getenv("PIPER_VOLUME", "1.0"))
+
+# caché de síntesis de voz: LRU en memoria, directorio en disco (vacío lo desactiva) y su tamaño máximo
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "data/tts_cache") or None
+TTS_CACHE_DISK_MB = int(os.getenv("TTS_CACHE_DISK_MB", "256"))
+# pre-sintetizar al arrancar las frases fijas (mensajes de error y de respaldo)
+TTS_CACHE_WARMUP = os.getenv("TTS_CACHE_WARMUP", "true").lower() == "true"
+
+# motor de transcripción de los turnos: "deepgram" (servicio remoto) o "whisper" (faster-whisper local en CPU)
+ASR_BACKEND = os.getenv("ASR_BACKEND", "deepgram")
+# idioma de la transcripción para todos los motores (Deepgram, también en streaming, y Whisper)
+ASR_LANGUAGE = os.getenv("ASR_LANGUAGE", "es")
+# transcripciones locales simultáneas; el resto espera turno
+ASR_MAX_CONCURRENCY = int(os.getenv("ASR_MAX_CONCURRENCY", "2"))
+# modelo (tamaño o ruta), cuantización, haz de búsqueda (1 = greedy, más rápido), lote de segmentos e hilos por transcripción
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "small")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "1"))
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+
+# el wav sin comprimir se envía a deepgram como flac mono 16 khz (menos bytes de subida)
+DEEPGRAM_COMPRESS_PCM = os.getenv("DEEPGRAM_COMPRESS_PCM", "true").lower() == "true"
+
+# tamaño máximo del audio de un turno recibido por websocket (bytes)
+WS_MAX_AUDIO_BYTES = int(os.getenv("WS_MAX_AUDIO_BYTES", str(25 * 1024 * 1024)))
+
+# sesión de voz en tiempo real: transcripción en streaming ("deepgram", "batch" = el motor de ASR_BACKEND al cerrar
+# cada frase, o "local", un sustituto sin red) y texto del sustituto local
+STREAMING_ASR_BACKEND = os.getenv("STREAMING_ASR_BACKEND", "deepgram")
+STREAMING_ASR_FINISH_TIMEOUT_S = float(os.getenv("STREAMING_ASR_FINISH_TIMEOUT_S", "5.0"))
+LOCAL_ASR_TRANSCRIPT = os.getenv("LOCAL_ASR_TRANSCRIPT") or None
+
+# detección de voz y de fin de frase: umbral mínimo de energía (dBFS) y silencio que cierra la frase
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+VAD_END_SILENCE_MS = int(os.getenv("VAD_END_SILENCE_MS", "600"))
+VAD_MAX_UTTERANCE_S = float(os.getenv("VAD_MAX_UTTERANCE_S", "30"))
+
+# concurrencia: hilos dedicados a la inferencia ONNX (CPU) fuera del hilo de la petición
+INFERENCE_MAX_WORKERS = int(os.getenv("INFERENCE_MAX_WORKERS", "2"))
+
+# sesión de onnx runtime: perfil ("latency", "throughput" con varios workers o "low_memory"), hilos
+# intra-op (0 = los núcleos disponibles repartidos entre los WEB_CONCURRENCY workers de uvicorn) e inter-op,
+# y caché en disco del grafo optimizado para que los arranques siguientes no repitan la optimización
+ORT_SESSION_PROFILE = os.getenv("ORT_SESSION_PROFILE", "latency")
+ORT_INTRA_OP_THREADS = int(os.getenv("ORT_INTRA_OP_THREADS", "0"))
+ORT_INTER_OP_THREADS = int(os.getenv("ORT_INTER_OP_THREADS", "1"))
+ORT_OPTIMIZED_MODEL_CACHE = os.getenv("ORT_OPTIMIZED_MODEL_CACHE", "true").lower() == "true"
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# modelo de emoción vocal: "auto" elige con el manifiesto de scripts/export_to_onnx.py la variante más
+# rápida cuya coincidencia con fp32 alcanza VOCAL_MODEL_MIN_AGREEMENT (vacío = la tolerancia del manifiesto)
+VOCAL_MODEL_METHOD = os.getenv("VOCAL_MODEL_METHOD", "auto")
+VOCAL_MODEL_MIN_AGREEMENT = float(os.getenv("VOCAL_MODEL_MIN_AGREEMENT")) if os.getenv("VOCAL_MODEL_MIN_AGREEMENT") else None
+
+# micro-lotes de emoción vocal: tamaño máximo, ventana de espera, ancho de cubeta y profundidad de cola
+VOCAL_BATCH_MAX_SIZE = int(os.getenv("VOCAL_BATCH_MAX_SIZE", "8"))
+VOCAL_BATCH_MAX_WAIT_MS = float(os.getenv("VOCAL_BATCH_MAX_WAIT_MS", "10"))
+VOCAL_BATCH_BUCKET_S = float(os.getenv("VOCAL_BATCH_BUCKET_S", "1.0"))
+VOCAL_BATCH_MAX_QUEUE = int(os.getenv("VOCAL_BATCH_MAX_QUEUE", "256"))
+
+# clips largos: duración de cada ventana de análisis vocal y solapamiento entre ventanas
+VOCAL_CHUNK_LENGTH_S = float(os.getenv("VOCAL_CHUNK_LENGTH_S", "10.0"))
+VOCAL_CHUNK_OVERLAP_S = float(os.getenv("VOCAL_CHUNK_OVERLAP_S", "1.0"))
+
+# emoción vocal en streaming (sesión de voz): ventana deslizante, salto entre inferencias y factor de suavizado
+VOCAL_STREAM_WINDOW_S = float(os.getenv("VOCAL_STREAM_WINDOW_S", "3.0"))
+VOCAL_STREAM_HOP_S = float(os.getenv("VOCAL_STREAM_HOP_S", "1.0"))
+VOCAL_STREAM_EMA_ALPHA = float(os.getenv("VOCAL_STREAM_EMA_ALPHA", "0.5"))
+
+# cola de extracción de memoria en segundo plano
+MEMORY_QUEUE_MAXSIZE = int(os.getenv("MEMORY_QUEUE_MAXSIZE", "1000"))
+MEMORY_MAX_RETRIES = int(os.getenv("MEMORY_MAX_RETRIES", "3"))
+
+# escritura diferida en sqlite: máximo de unidades por transacción y ventana de agrupación
+DB_WRITE_MAX_BATCH = int(os.getenv("DB_WRITE_MAX_BATCH", "64"))
+DB_WRITE_FLUSH_INTERVAL_S = float(os.getenv("DB_WRITE_FLUSH_INTERVAL_S", "0.05"))
+
+# contexto de sesión en el servidor: sesiones en caché, mensajes recientes por sesión y expiración
+SESSION_STORE_MAX_SESSIONS = int(os.getenv("SESSION_STORE_MAX_SESSIONS", "1000"))
+SESSION_STORE_MAX_MESSAGES = int(os.getenv("SESSION_STORE_MAX_MESSAGES", "40"))
+SESSION_STORE_TTL_S = float(os.getenv("SESSION_STORE_TTL_S", "3600"))
+
+# ventana de contexto del llm: presupuesto de tokens del prompt y longitud del resumen de turnos antiguos
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_SUMMARY_MAX_WORDS = int(os.getenv("CONTEXT_SUMMARY_MAX_WORDS", "120"))
+
+# arranque: cargar los modelos en segundo plano (la api acepta conexiones enseguida y /health/ready
+# responde 503 hasta que terminan) o antes de aceptar conexiones; detector facial FER/MTCNN (TensorFlow),
+# sin uso desde que el análisis facial se hace en el navegador
+STARTUP_BACKGROUND_LOADING = os.getenv("STARTUP_BACKGROUND_LOADING", "true").lower() == "true"
+FACIAL_DETECTOR_ENABLED = os.getenv("FACIAL_DETECTOR_ENABLED", "false").lower() == "true"
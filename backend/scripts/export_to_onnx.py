@@ -1,54 +1,128 @@
 # backend/scripts/export_to_onnx.py
+#
+# exporta todas las variantes sin preguntas, las mide y escribe el manifiesto que usa get_recognizer("auto"):
+#   python scripts/export_to_onnx.py [--skip-static] [--min-agreement 0.95] [--holdout-fraction 0.25]
 
 import torch
 import os
+import sys
 import glob
+import json
+import argparse
+import subprocess
+import tempfile
+import time
 import numpy as np
+import onnxruntime as ort
 import librosa
 from transformers import Wav2Vec2ForSequenceClassification, Wav2Vec2FeatureExtractor
 from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantType
 from onnxruntime.quantization.calibrate import CalibrationDataReader
 import warnings
 
+# añadir el directorio raíz del backend a la ruta para reutilizar el manifiesto de la api
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+from src.analysis.model_manifest import (VARIANT_FILES, REFERENCE_VARIANT, BUCKET_LENGTHS_S, BUCKETED_VARIANT_FILES,
+                                         variant_files, model_info, load_manifest, write_manifest, select_variant)
+from src.analysis.model_benchmark import agreement
+
 # --- CONFIGURACIÓN ---
 MODEL_NAME = "superb/wav2vec2-base-superb-er"
 ONNX_MODELS_DIR = os.path.join("ai_resources", "models", "voice_emotion")
 CALIBRATION_DATA_DIR = os.path.join("ai_resources", "calibration_data")
+DEFAULT_MIN_AGREEMENT = 0.95
+DEFAULT_HOLDOUT_FRACTION = 0.25
+SEGMENT_LENGTH_S = 3
+# sin audios de validación se mide con ruido de varias duraciones: sirve para la velocidad, no para la precisión
+SYNTHETIC_LENGTHS_S = (1.5, 3, 4.5, 7, 10) * 3
 
 # ignorar warnings de librosa
 warnings.filterwarnings('ignore', category=FutureWarning, module='librosa')
 
+def load_segments(wav_files: list, sampling_rate: int, num_segments_per_file: int, segment_length_s: float, seed=None) -> list:
+    """Recorta segmentos de longitud fija de cada audio (los más cortos se descartan)."""
+    rng = np.random.default_rng(seed)
+    segment_length = int(segment_length_s * sampling_rate)
+    segments = []
+    for file_path in wav_files:
+        try:
+            speech, _ = librosa.load(file_path, sr=sampling_rate)
+            if len(speech) < segment_length:
+                continue
+            for _ in range(num_segments_per_file):
+                start = rng.integers(0, len(speech) - segment_length + 1)
+                segments.append(speech[start : start + segment_length])
+        except Exception as e:
+            print(f"Advertencia: No se pudo procesar {os.path.basename(file_path)}. Error: {e}")
+    return segments
+
+def load_clips(wav_files: list, sampling_rate: int, max_length_s: float, seed=None) -> list:
+    """Audios completos con su duración real, recortados al azar si superan 'max_length_s'."""
+    rng = np.random.default_rng(seed)
+    max_length = int(max_length_s * sampling_rate)
+    clips = []
+    for file_path in wav_files:
+        try:
+            speech, _ = librosa.load(file_path, sr=sampling_rate)
+            if len(speech) == 0:
+                continue
+            start = rng.integers(0, len(speech) - max_length + 1) if len(speech) > max_length else 0
+            clips.append(speech[start : start + max_length])
+        except Exception as e:
+            print(f"Advertencia: No se pudo procesar {os.path.basename(file_path)}. Error: {e}")
+    return clips
+
+def normalize_and_pad(clips: list, feature_extractor, length: int | None = None) -> tuple:
+    """
+    Normaliza cada clip por separado (el extractor normalizaría el relleno junto con el audio) y los
+    rellena con ceros hasta 'length' o el más largo. Devuelve (input_values (N, L), attention_mask, longitudes).
+    """
+    lengths = np.array([len(clip) for clip in clips])
+    input_values = np.zeros((len(clips), length or lengths.max()), dtype=np.float32)
+    attention_mask = np.zeros(input_values.shape, dtype=np.int64)
+    for row, clip in enumerate(clips):
+        normalized = feature_extractor(clip, sampling_rate=feature_extractor.sampling_rate, return_tensors="np").input_values[0]
+        input_values[row, :len(clip)] = normalized
+        attention_mask[row, :len(clip)] = 1
+    return input_values, attention_mask, lengths
+
+def split_calibration_files(data_dir: str, holdout_fraction: float) -> tuple:
+    """
+    Reparte los audios de calibración en dos grupos disjuntos: unos calibran la cuantización estática
+    y el resto se reserva para medir la precisión de cada variante frente a fp32.
+    """
+    wav_files = sorted(glob.glob(os.path.join(data_dir, "*.wav")))
+    if len(wav_files) < 2:
+        return wav_files, []
+    num_holdout = min(len(wav_files) - 1, max(1, round(len(wav_files) * holdout_fraction)))
+    # orden fijo (semilla) para que dos exportaciones sobre los mismos datos sean comparables
+    order = np.random.default_rng(0).permutation(len(wav_files))
+    holdout = [wav_files[i] for i in sorted(order[:num_holdout])]
+    calibration = [wav_files[i] for i in sorted(order[num_holdout:])]
+    return calibration, holdout
+
 class AudioCalibrationDataReader(CalibrationDataReader):
     """
     Lee archivos de audio de la carpeta de calibración y los prepara
     para que el cuantizador de ONNX pueda 'medir' los rangos de activación.
     """
-    def __init__(self, data_dir: str, feature_extractor, num_files_to_use=20, num_segments_per_file=5, segment_length_s=3):
+    def __init__(self, wav_files: list, feature_extractor, num_files_to_use=20, num_segments_per_file=5,
+                 segment_length_s=SEGMENT_LENGTH_S, pad_to_s=None):
         self.feature_extractor = feature_extractor
-        self.segment_length = int(segment_length_s * self.feature_extractor.sampling_rate)
-        
-        wav_files = glob.glob(os.path.join(data_dir, "*.wav"))
         if not wav_files:
-            raise ValueError(f"No se encontraron archivos .wav en el directorio de calibración: '{data_dir}'. "
-                             "Por favor, descarga algunos archivos de audio (ej. de CREMA-D o RAVDESS) y colócalos allí.")
-        
-        files_to_process = wav_files[:num_files_to_use]
-        print(f"Usando {len(files_to_process)} de {len(wav_files)} archivos de audio de '{data_dir}' para calibración.")
-        
-        self.segments_list = []
-        for file_path in files_to_process:
-            try:
-                speech, sr = librosa.load(file_path, sr=self.feature_extractor.sampling_rate)
-                if len(speech) < self.segment_length:
-                    continue
-                
-                for _ in range(num_segments_per_file):
-                    start = np.random.randint(0, len(speech) - self.segment_length + 1)
-                    segment = speech[start : start + self.segment_length]
-                    self.segments_list.append(segment)
-            except Exception as e:
-                print(f"Advertencia: No se pudo procesar {os.path.basename(file_path)}. Error: {e}")
+            raise ValueError("No hay archivos .wav para la calibración. Por favor, descarga algunos archivos de audio "
+                             f"(ej. de CREMA-D o RAVDESS) y colócalos en '{CALIBRATION_DATA_DIR}'.")
 
+        files_to_process = wav_files[:num_files_to_use]
+        print(f"Usando {len(files_to_process)} de {len(wav_files)} archivos de audio para calibración.")
+        sampling_rate = feature_extractor.sampling_rate
+        # modelos de longitud fija: audios completos (hasta la cubeta) rellenos con ceros, como los verá la api
+        self.pad_to = int(pad_to_s * sampling_rate) if pad_to_s else None
+        if self.pad_to:
+            self.segments_list = load_clips(files_to_process, sampling_rate, pad_to_s)
+        else:
+            self.segments_list = load_segments(files_to_process, sampling_rate, num_segments_per_file, segment_length_s)
         print(f"Generados {len(self.segments_list)} segmentos de audio para una calibración robusta.")
         self.data_iter = iter(self.segments_list)
 
@@ -56,7 +130,10 @@ class AudioCalibrationDataReader(CalibrationDataReader):
         segment = next(self.data_iter, None)
         if segment is None:
             return None
-        
+        if self.pad_to:
+            input_values, attention_mask, _ = normalize_and_pad([segment], self.feature_extractor, self.pad_to)
+            return {"input_values": input_values, "attention_mask": attention_mask}
+
         inputs = self.feature_extractor(
             segment, 
             sampling_rate=self.feature_extractor.sampling_rate, 
@@ -65,16 +142,21 @@ class AudioCalibrationDataReader(CalibrationDataReader):
         )
         return {"input_values": inputs.input_values.astype(np.float32)}
 
-def export_models():
-    """Función principal para exportar y cuantizar los modelos."""
+def export_models(skip_static: bool = False, holdout_fraction: float = DEFAULT_HOLDOUT_FRACTION) -> dict:
+    """Exporta y cuantiza los modelos. Devuelve {método: [rutas]} de las variantes disponibles."""
     os.makedirs(ONNX_MODELS_DIR, exist_ok=True)
     os.makedirs(CALIBRATION_DATA_DIR, exist_ok=True)
     
     print("Cargando modelo base de PyTorch desde Hugging Face...")
     model = Wav2Vec2ForSequenceClassification.from_pretrained(MODEL_NAME)
     feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(MODEL_NAME)
+    # etiquetas y preprocesamiento en el manifiesto: la api los lee sin transformers ni acceso a la red
+    manifest = load_manifest(ONNX_MODELS_DIR) or {}
+    manifest["model"] = model_info(MODEL_NAME, model.config.id2label, feature_extractor.sampling_rate, feature_extractor.do_normalize)
+    write_manifest(ONNX_MODELS_DIR, manifest)
+    variants = {}
 
-    float32_path = os.path.join(ONNX_MODELS_DIR, "model_float32.onnx")
+    float32_path = os.path.join(ONNX_MODELS_DIR, VARIANT_FILES["onnx_fp32"])
     
     if not os.path.exists(float32_path):
         print(f"\n1. Exportando modelo base a ONNX (Float32) en '{float32_path}'...")
@@ -83,13 +165,15 @@ def export_models():
             model, dummy_input, float32_path,
             opset_version=14,
             input_names=["input_values"], output_names=["logits"],
-            dynamic_axes={"input_values": {1: "sequence_length"}, "logits": {1: "sequence_length"}}
+            # batch dinámico para el planificador de micro-lotes de la api
+            dynamic_axes={"input_values": {0: "batch_size", 1: "sequence_length"}, "logits": {0: "batch_size"}}
         )
         print("Exportación a Float32 completada.")
     else:
         print(f"El modelo ONNX (Float32) '{float32_path}' ya existe. Saltando exportación.")
+    variants["onnx_fp32"] = [float32_path]
 
-    dynamic_quant_path = os.path.join(ONNX_MODELS_DIR, "model_quant_dynamic.onnx")
+    dynamic_quant_path = os.path.join(ONNX_MODELS_DIR, VARIANT_FILES["onnx_dynamic"])
     if not os.path.exists(dynamic_quant_path):
         print(f"\n2. Aplicando cuantización dinámica a '{dynamic_quant_path}'...")
         quantize_dynamic(
@@ -100,46 +184,199 @@ def export_models():
         print("Cuantización dinámica completada.")
     else:
         print(f"El modelo cuantizado dinámicamente '{dynamic_quant_path}' ya existe. Saltando.")
-        
-    print("\n" + "="*50)
-    print("PASO 3: CUANTIZACIÓN ESTÁTICA (OPCIONAL)")
-    print("="*50)
-    print("Este es el paso que MÁS MEMORIA RAM CONSUME y requiere archivos de audio en la carpeta 'calibration_data'.")
-    print("Puede fallar si no tienes suficiente RAM (se recomiendan >8GB).")
-    print("La aplicación principal funcionará correctamente sin este modelo, usando la versión 'float32'.")
-    
-    choice = input("¿Deseas intentar la cuantización estática? (s/n): ").lower().strip()
-
-    if choice in ['s', 'si', 'y', 'yes']:
-        print("\nIniciando cuantización estática...")
-        static_quant_path = os.path.join(ONNX_MODELS_DIR, "model_quant_static.onnx")
-        if not os.path.exists(static_quant_path):
-            print(f"Aplicando cuantización estática con calibración a '{static_quant_path}'...")
-            try:
-                calibration_data_reader = AudioCalibrationDataReader(CALIBRATION_DATA_DIR, feature_extractor)
-                quantize_static(
-                    model_input=float32_path,
-                    model_output=static_quant_path,
-                    calibration_data_reader=calibration_data_reader,
-                    quant_format='QDQ',
-                    activation_type=QuantType.QInt8,
-                    weight_type=QuantType.QInt8,
-                )
-                print("Cuantización estática completada.")
-            except ValueError as e:
-                print(f"\nERROR durante la calibración estática: {e}")
-                print("   Asegúrate de haber colocado suficientes archivos .wav en la carpeta 'calibration_data'.")
-            except Exception as e:
-                print(f"\nERROR INESPERADO durante la cuantización estática: {e}")
-                print("   Esto puede deberse a falta de memoria RAM.")
-        else:
-            print(f"El modelo cuantizado estáticamente '{static_quant_path}' ya existe. Saltando.")
+    variants["onnx_dynamic"] = [dynamic_quant_path]
+
+    # la cuantización estática es el paso que más ram consume (>8GB recomendados) y necesita audios de
+    # calibración; si falla, la aplicación sigue funcionando con las otras variantes
+    static_quant_path = os.path.join(ONNX_MODELS_DIR, VARIANT_FILES["onnx_static"])
+    calibration_files, _ = split_calibration_files(CALIBRATION_DATA_DIR, holdout_fraction)
+    if os.path.exists(static_quant_path):
+        print(f"El modelo cuantizado estáticamente '{static_quant_path}' ya existe. Saltando.")
+        variants["onnx_static"] = [static_quant_path]
+    elif skip_static:
+        print("\n3. Saltando la cuantización estática (--skip-static).")
+    elif not calibration_files:
+        print(f"\n3. Saltando la cuantización estática: no hay archivos .wav en '{CALIBRATION_DATA_DIR}'.")
     else:
-        print("\nSaltando la cuantización estática por elección del usuario.")
+        print(f"\n3. Aplicando cuantización estática con calibración a '{static_quant_path}'...")
+        try:
+            calibration_data_reader = AudioCalibrationDataReader(calibration_files, feature_extractor)
+            quantize_static(
+                model_input=float32_path,
+                model_output=static_quant_path,
+                calibration_data_reader=calibration_data_reader,
+                quant_format='QDQ',
+                activation_type=QuantType.QInt8,
+                weight_type=QuantType.QInt8,
+            )
+            print("Cuantización estática completada.")
+            variants["onnx_static"] = [static_quant_path]
+        except ValueError as e:
+            print(f"\nERROR durante la calibración estática: {e}")
+        except Exception as e:
+            print(f"\nERROR INESPERADO durante la cuantización estática: {e}")
+            print("   Esto puede deberse a falta de memoria RAM.")
 
-    print(f"\nProceso finalizado. Los modelos están en la carpeta '{ONNX_MODELS_DIR}'.")
+    variants.update(export_bucketed_models(model, feature_extractor, calibration_files, skip_static))
+    return variants
+
+def export_bucketed_models(model, feature_extractor, calibration_files: list, skip_static: bool) -> dict:
+    """
+    Variantes de longitud fija: un modelo por cubeta (BUCKET_LENGTHS_S) con batch dinámico y la máscara de
+    atención como entrada, para que el relleno hasta la cubeta no cuente en la atención ni en la media de
+    la clasificación. Con formas fijas onnxruntime planifica la memoria una sola vez y la cuantización
+    estática calibra los rangos de activación para esa forma concreta.
+    """
+    sampling_rate = feature_extractor.sampling_rate
+    files = {method: [os.path.join(ONNX_MODELS_DIR, name) for name in variant_files(method)]
+             for method in BUCKETED_VARIANT_FILES}
+    print(f"\n4. Modelos de longitud fija por cubetas ({', '.join(f'{seconds}s' for seconds in BUCKET_LENGTHS_S)})...")
+
+    for index, seconds in enumerate(BUCKET_LENGTHS_S):
+        length = int(seconds * sampling_rate)
+        float32_path = files["onnx_fp32_bucketed"][index]
+        if not os.path.exists(float32_path):
+            print(f"Exportando '{float32_path}'...")
+            torch.onnx.export(
+                model, (torch.randn(1, length), torch.ones(1, length, dtype=torch.long)), float32_path,
+                opset_version=14,
+                input_names=["input_values", "attention_mask"], output_names=["logits"],
+                # solo el batch es dinámico; la longitud queda fija en la de la cubeta
+                dynamic_axes={"input_values": {0: "batch_size"}, "attention_mask": {0: "batch_size"}, "logits": {0: "batch_size"}}
+            )
+
+        dynamic_quant_path = files["onnx_dynamic_bucketed"][index]
+        if not os.path.exists(dynamic_quant_path):
+            print(f"Aplicando cuantización dinámica a '{dynamic_quant_path}'...")
+            quantize_dynamic(model_input=float32_path, model_output=dynamic_quant_path, weight_type=QuantType.QInt8)
+
+        static_quant_path = files["onnx_static_bucketed"][index]
+        if os.path.exists(static_quant_path) or skip_static or not calibration_files:
+            continue
+        print(f"Aplicando cuantización estática con calibración a '{static_quant_path}'...")
+        try:
+            quantize_static(
+                model_input=float32_path,
+                model_output=static_quant_path,
+                calibration_data_reader=AudioCalibrationDataReader(calibration_files, feature_extractor, pad_to_s=seconds),
+                quant_format='QDQ',
+                activation_type=QuantType.QInt8,
+                weight_type=QuantType.QInt8,
+            )
+        except Exception as e:
+            print(f"ERROR durante la cuantización estática de la cubeta de {seconds}s: {e}")
+
+    # una variante solo está disponible si tiene el modelo de todas las cubetas
+    return {method: paths for method, paths in files.items() if all(os.path.exists(path) for path in paths)}
+
+# --- BENCHMARK Y MANIFIESTO ---
+
+def load_holdout_segments(feature_extractor, holdout_fraction: float) -> tuple:
+    """
+    Audios reservados con su duración real (hasta la mayor cubeta), normalizados y rellenos: (N, L),
+    longitudes y origen. Si no hay audios de validación, ruido de varias duraciones.
+    """
+    _, holdout_files = split_calibration_files(CALIBRATION_DATA_DIR, holdout_fraction)
+    sampling_rate = feature_extractor.sampling_rate
+    clips = load_clips(holdout_files, sampling_rate, max(BUCKET_LENGTHS_S), seed=0)
+    source = "holdout"
+    if not clips:
+        print("Advertencia: no hay audios de validación; se mide con ruido y 'auto' se queda con fp32.")
+        rng = np.random.default_rng(0)
+        clips = [rng.standard_normal(int(seconds * sampling_rate)).astype(np.float32) * 0.1 for seconds in SYNTHETIC_LENGTHS_S]
+        source = "synthetic"
+    input_values, _, lengths = normalize_and_pad(clips, feature_extractor)
+    return input_values, lengths, source
+
+def benchmark_variants(variants: dict, segments: np.ndarray, lengths: np.ndarray) -> dict:
+    """
+    Mide cada variante en un proceso nuevo (la memoria residente no se mezcla con torch ni con los
+    otros modelos) y la compara con fp32 sobre los mismos segmentos.
+    """
+    results = {}
+    logits_by_variant = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        segments_path = os.path.join(tmp_dir, "segments.npz")
+        np.savez(segments_path, segments=segments, lengths=lengths)
+        for method, model_paths in variants.items():
+            print(f"Midiendo '{method}' con {len(segments)} segmentos...")
+            logits_path = os.path.join(tmp_dir, f"{method}.npy")
+            model_args = [arg for path in model_paths for arg in ("--model", os.path.abspath(path))]
+            completed = subprocess.run(
+                [sys.executable, "-m", "src.analysis.model_benchmark", *model_args,
+                 "--segments", segments_path, "--output", logits_path],
+                cwd=BACKEND_ROOT, capture_output=True, text=True,
+            )
+            names = [os.path.basename(path) for path in model_paths]
+            entry = {"file": names[0]} if len(names) == 1 else {"files": names}
+            entry["size_mb"] = sum(os.path.getsize(path) for path in model_paths) / (1024 * 1024)
+            if completed.returncode != 0:
+                print(f"ERROR al medir '{method}': {completed.stderr.strip()}")
+                results[method] = {**entry, "error": (completed.stderr.strip().splitlines() or ["error desconocido"])[-1]}
+                continue
+            entry.update(json.loads(completed.stdout.strip().splitlines()[-1]))
+            logits_by_variant[method] = np.load(logits_path)
+            results[method] = entry
+
+    reference = logits_by_variant.get(REFERENCE_VARIANT)
+    for method, logits in logits_by_variant.items():
+        if reference is not None:
+            results[method].update(agreement(reference, logits))
+
+    # ganancia de cada variante de longitud fija frente a la misma variante con longitud dinámica
+    for method in BUCKETED_VARIANT_FILES:
+        stats, dynamic_stats = results.get(method), results.get(method.removesuffix("_bucketed"))
+        if not stats or not dynamic_stats or stats.get("error") or dynamic_stats.get("error"):
+            continue
+        stats["vs_dynamic_shape"] = {
+            "latency_p50_speedup": dynamic_stats["latency_p50_ms"] / stats["latency_p50_ms"],
+            "latency_p95_speedup": dynamic_stats["latency_p95_ms"] / stats["latency_p95_ms"],
+            "throughput_gain": stats["throughput_per_s"] / dynamic_stats["throughput_per_s"],
+        }
+    return results
+
+def write_benchmark_manifest(variants: dict, min_agreement: float, holdout_fraction: float = DEFAULT_HOLDOUT_FRACTION) -> dict:
+    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(MODEL_NAME)
+    segments, lengths, source = load_holdout_segments(feature_extractor, holdout_fraction)
+    manifest = {
+        # la sección 'model' la escribe export_models
+        **(load_manifest(ONNX_MODELS_DIR) or {}),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "onnxruntime_version": ort.__version__,
+        "min_agreement": min_agreement,
+        "buckets_s": list(BUCKET_LENGTHS_S),
+        "evaluation": {"source": source, "segments": len(segments),
+                       "mean_length_s": float(lengths.mean() / feature_extractor.sampling_rate)},
+        "variants": benchmark_variants(variants, segments, lengths),
+    }
+    manifest["selected"] = select_variant(manifest, ONNX_MODELS_DIR)
+    path = write_manifest(ONNX_MODELS_DIR, manifest)
+
+    print(f"\n{'variante':<22}{'p50 ms':>9}{'p95 ms':>9}{'seg/s':>9}{'RSS MB':>9}{'coinc.':>9}{'vs din.':>9}")
+    for method, stats in manifest["variants"].items():
+        if stats.get("error"):
+            print(f"{method:<22}  error")
+            continue
+        speedup = stats.get("vs_dynamic_shape", {}).get("latency_p50_speedup")
+        print(f"{method:<22}{stats['latency_p50_ms']:>9.1f}{stats['latency_p95_ms']:>9.1f}"
+              f"{stats['throughput_per_s']:>9.1f}{stats['model_rss_mb']:>9.0f}{stats.get('top1_agreement', 0):>9.2%}"
+              f"{f'x{speedup:.2f}' if speedup else '':>9}")
+    print(f"\nVariante seleccionada para 'auto': {manifest['selected']} (manifiesto en '{path}')")
+    return manifest
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta, cuantiza y mide los modelos de emoción vocal.")
+    parser.add_argument("--skip-static", action="store_true", help="no intentar la cuantización estática (la que más RAM consume)")
+    parser.add_argument("--skip-benchmark", action="store_true", help="solo exportar, sin medir ni escribir el manifiesto")
+    parser.add_argument("--min-agreement", type=float, default=DEFAULT_MIN_AGREEMENT,
+                        help="coincidencia mínima con fp32 en la validación para que 'auto' elija una variante cuantizada")
+    parser.add_argument("--holdout-fraction", type=float, default=DEFAULT_HOLDOUT_FRACTION,
+                        help="fracción de los audios de calibración reservada para la validación")
+    args = parser.parse_args()
+
     print("--- INICIO DEL SCRIPT DE EXPORTACIÓN DE MODELOS DE EMOCIÓN VOCAL ---")
     print("Este script descargará el modelo de Hugging Face y lo convertirá a formatos ONNX optimizados.")
-    export_models()
\ No newline at end of file
+    variants = export_models(skip_static=args.skip_static, holdout_fraction=args.holdout_fraction)
+    if not args.skip_benchmark:
+        write_benchmark_manifest(variants, args.min_agreement, args.holdout_fraction)
+    print(f"\nProceso finalizado. Los modelos están en la carpeta '{ONNX_MODELS_DIR}'.")
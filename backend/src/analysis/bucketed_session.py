@@ -0,0 +1,132 @@
+# backend/src/analysis/bucketed_session.py | Modelos ONNX de longitud fija por cubetas con buffers de entrada/salida reutilizados
+
+import bisect
+import logging
+import threading
+
+import numpy as np
+import onnxruntime as ort
+
+from src.analysis.onnx_session import create_session
+
+ONNX_DTYPES = {"tensor(float)": np.float32, "tensor(int64)": np.int64, "tensor(int32)": np.int32}
+
+class _BucketBuffers:
+    """Buffers de un hilo para una cubeta, ligados a la sesión con IOBinding."""
+    def __init__(self, bucket, capacity: int):
+        self.capacity = capacity
+        self.input_values = np.zeros((capacity, bucket.length), dtype=np.float32)
+        self.attention_mask = (np.zeros((capacity, bucket.length), dtype=bucket.mask_dtype)
+                               if bucket.mask_dtype is not None else None)
+        self.logits = np.zeros((capacity, bucket.num_labels), dtype=np.float32) if bucket.num_labels else None
+        self.binding = bucket.session.io_binding()
+        self.bound_batch = 0
+
+class _Bucket:
+    def __init__(self, session: ort.InferenceSession, info: dict):
+        model_input = session.get_inputs()[0]
+        length = model_input.shape[1]
+        if not isinstance(length, int):
+            raise ValueError(f"El modelo '{info.get('model_path')}' no tiene longitud de entrada fija")
+        mask_inputs = [i for i in session.get_inputs() if i.name == "attention_mask"]
+        model_output = session.get_outputs()[0]
+        self.session = session
+        self.info = info
+        self.length = length
+        self.input_name = model_input.name
+        self.mask_dtype = ONNX_DTYPES.get(mask_inputs[0].type, np.int64) if mask_inputs else None
+        self.output_name = model_output.name
+        # si el número de clases no es fijo, onnxruntime reserva la salida en cada llamada
+        self.num_labels = model_output.shape[1] if isinstance(model_output.shape[1], int) else None
+
+class BucketedSession:
+    """
+    Un modelo ONNX de longitud fija por cubeta (p. ej. 2 s, 5 s y 10 s). Cada lote se rellena con ceros
+    hasta la cubeta más pequeña que lo contiene, así onnxruntime solo ve unas pocas formas y no
+    replanifica la memoria con cada longitud. Los buffers de entrada y salida se reservan una vez por
+    hilo y cubeta y quedan ligados con IOBinding: una llamada solo copia el audio y ejecuta.
+    """
+    def __init__(self, onnx_paths: list, max_batch_size: int = 8, **session_kwargs):
+        if not onnx_paths:
+            raise ValueError("Se necesita al menos un modelo por cubeta")
+        buckets = []
+        for path in onnx_paths:
+            session, info = create_session(path, **session_kwargs)
+            info.setdefault("model_path", path)
+            buckets.append(_Bucket(session, info))
+        self.buckets = sorted(buckets, key=lambda bucket: bucket.length)
+        self.lengths = [bucket.length for bucket in self.buckets]
+        if len(set(self.lengths)) != len(self.lengths):
+            raise ValueError(f"Hay dos modelos con la misma longitud de entrada: {self.lengths}")
+        self.max_length = self.lengths[-1]
+        self.has_attention_mask = all(bucket.mask_dtype is not None for bucket in self.buckets)
+        self.max_batch_size = max_batch_size
+        self._local = threading.local()
+        self._truncation_warned = False
+
+    @property
+    def session_info(self) -> dict:
+        first = self.buckets[0].info
+        return {
+            "profile": first["profile"],
+            "intra_op_threads": first["intra_op_threads"],
+            "inter_op_threads": first["inter_op_threads"],
+            "buckets": [
+                {"length": bucket.length, "optimized_from_cache": bucket.info["optimized_from_cache"],
+                 "load_time_s": bucket.info["load_time_s"]}
+                for bucket in self.buckets
+            ],
+        }
+
+    def bucket_for(self, length: int) -> int:
+        """Índice de la cubeta más pequeña que admite 'length' muestras (la mayor si ninguna la admite)."""
+        return min(bisect.bisect_left(self.lengths, length), len(self.lengths) - 1)
+
+    def _buffers(self, index: int, batch: int) -> _BucketBuffers:
+        per_thread = getattr(self._local, "buffers", None)
+        if per_thread is None:
+            per_thread = self._local.buffers = {}
+        buffers = per_thread.get(index)
+        if buffers is None or buffers.capacity < batch:
+            buffers = per_thread[index] = _BucketBuffers(self.buckets[index], max(batch, self.max_batch_size))
+        return buffers
+
+    def run(self, input_values: np.ndarray, attention_mask: np.ndarray | None = None) -> np.ndarray:
+        """Inferencia sobre un lote (B, L) relleno con ceros; devuelve logits (B, C)."""
+        batch, length = input_values.shape
+        index = self.bucket_for(length)
+        bucket = self.buckets[index]
+        if length > bucket.length:
+            # prepare() no genera ventanas más largas que la mayor cubeta; esto solo cubre otros llamadores
+            if not self._truncation_warned:
+                logging.warning(f"Entrada de {length} muestras recortada a la mayor cubeta ({bucket.length})")
+                self._truncation_warned = True
+            input_values = input_values[:, :bucket.length]
+            attention_mask = attention_mask[:, :bucket.length] if attention_mask is not None else None
+            length = bucket.length
+
+        buffers = self._buffers(index, batch)
+        buffers.input_values[:batch, :length] = input_values
+        buffers.input_values[:batch, length:] = 0
+        if buffers.attention_mask is not None:
+            buffers.attention_mask[:batch, :length] = 1 if attention_mask is None else attention_mask
+            buffers.attention_mask[:batch, length:] = 0
+
+        # las vistas [:batch] comparten memoria con los buffers: solo se vuelve a ligar si cambia el tamaño del lote
+        if buffers.bound_batch != batch:
+            binding = buffers.binding
+            binding.clear_binding_inputs()
+            binding.clear_binding_outputs()
+            binding.bind_ortvalue_input(bucket.input_name, ort.OrtValue.ortvalue_from_numpy(buffers.input_values[:batch]))
+            if buffers.attention_mask is not None:
+                binding.bind_ortvalue_input("attention_mask", ort.OrtValue.ortvalue_from_numpy(buffers.attention_mask[:batch]))
+            if buffers.logits is not None:
+                binding.bind_ortvalue_output(bucket.output_name, ort.OrtValue.ortvalue_from_numpy(buffers.logits[:batch]))
+            else:
+                binding.bind_output(bucket.output_name, "cpu")
+            buffers.bound_batch = batch
+
+        bucket.session.run_with_iobinding(buffers.binding)
+        if buffers.logits is not None:
+            return buffers.logits[:batch].copy()
+        return buffers.binding.copy_outputs_to_cpu()[0]
@@ -9,19 +9,17 @@ de un fotograma de video proporcionado.
 
 import logging
 
-try:
-    from fer import FER
-except ImportError:
-    print("Por favor, instala la librería 'fer' con: pip install fer")
-    FER = None
-
 def initialize_detector():
     """
     Inicializa y devuelve el detector de emociones faciales.
+    FER (y TensorFlow) se importan aquí y no al importar el módulo: la api solo lo carga si se activa.
     """
-    if FER is None:
+    try:
+        from fer import FER
+    except ImportError:
+        print("Por favor, instala la librería 'fer' con: pip install fer")
         return None
-    
+
     print("Cargando modelo de detección facial (FER)...")
     detector = FER(mtcnn=True)
     print("Modelo cargado exitosamente.")
@@ -0,0 +1,166 @@
+# backend/src/analysis/inference_batcher.py | Micro-batching dinámico para la inferencia de emoción vocal
+
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+import numpy as np
+
+def pad_batch(values: list) -> tuple:
+    """Rellena con ceros una lista de arrays 1-D hasta el más largo; devuelve (input_values, attention_mask)."""
+    max_length = max(len(row) for row in values)
+    input_values = np.zeros((len(values), max_length), dtype=np.float32)
+    attention_mask = np.zeros((len(values), max_length), dtype=np.int64)
+    for index, row in enumerate(values):
+        input_values[index, :len(row)] = row
+        attention_mask[index, :len(row)] = 1
+    return input_values, attention_mask
+
+class InferenceQueueFull(RuntimeError):
+    """La cola de inferencia alcanzó su profundidad máxima."""
+
+class InferenceBatcher:
+    """
+    Planificador de micro-lotes con un hilo propio. Agrupa las entradas que llegan durante
+    una ventana corta (o hasta completar 'max_batch'), las separa por cubetas de longitud para
+    limitar el relleno, ejecuta una sola inferencia por cubeta y reparte los logits a cada llamador.
+
+    'run_fn(input_values, attention_mask)' recibe arrays (B, L) float32 / int64 y devuelve logits (B, C).
+    submit no bloquea y devuelve un concurrent.futures.Future (se puede esperar con asyncio.wrap_future).
+    """
+
+    _STOP = object()
+
+    def __init__(self, run_fn, max_batch: int = 8, max_wait_ms: float = 10.0,
+                 bucket_size: int = 16000, max_queue: int = 256, exact_length: bool = False):
+        self.run_fn = run_fn
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000
+        # ancho de cada cubeta en muestras: entradas de longitud parecida comparten lote
+        self.bucket_size = bucket_size
+        # sin máscara de atención el modelo promedia también el relleno: solo se agrupan entradas de igual longitud
+        self.exact_length = exact_length
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stats = {"submitted": 0, "rejected": 0, "cancelled": 0, "batches": 0, "items": 0, "errors": 0,
+                       "max_batch_seen": 0, "real_samples": 0, "padded_samples": 0}
+        self._last_batch_latency_s = 0.0
+
+    # --- CICLO DE VIDA ---
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="onnx-inference-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Procesa lo pendiente y detiene el hilo"""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # --- API PÚBLICA ---
+
+    def submit(self, input_values: np.ndarray) -> Future:
+        """Encola una entrada 1-D ya normalizada. El futuro se resuelve con sus logits (C,)."""
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((np.asarray(input_values, dtype=np.float32), future, time.monotonic()))
+        except queue.Full:
+            self._stats["rejected"] += 1
+            future.set_exception(InferenceQueueFull(f"Cola de inferencia llena ({self.max_queue} entradas)."))
+            return future
+        self._stats["submitted"] += 1
+        return future
+
+    def metrics(self) -> dict:
+        batches = self._stats["batches"]
+        real = self._stats["real_samples"]
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "max_queue": self.max_queue,
+            "avg_batch_size": self._stats["items"] / batches if batches else 0.0,
+            "padding_ratio": self._stats["padded_samples"] / real if real else 0.0,
+            "last_batch_latency_s": self._last_batch_latency_s,
+            **self._stats,
+        }
+
+    # --- WORKER ---
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            stop = item is self._STOP
+            batch = [] if stop else [item]
+            # agrupar lo que llegue durante la ventana de espera
+            deadline = time.monotonic() + self.max_wait_s
+            while not stop and len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            # los llamadores que ya cancelaron (p. ej. una frase abortada en /ws/voice) no entran en el lote;
+            # el resto queda en RUNNING y ya no se puede cancelar
+            pending = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            self._stats["cancelled"] += len(batch) - len(pending)
+            for bucket in self._bucketize(pending):
+                try:
+                    self._run_bucket(bucket)
+                except Exception as e:
+                    # un lote defectuoso no puede detener el hilo: los demás llamadores seguirían esperando
+                    self._stats["errors"] += 1
+                    logging.error(f"Error inesperado en el planificador de inferencia: {e}")
+                    self._fail_bucket(bucket, e)
+            if stop:
+                break
+
+    def _bucketize(self, batch) -> list:
+        buckets = defaultdict(list)
+        for item in batch:
+            key = len(item[0]) if self.exact_length else -(-len(item[0]) // self.bucket_size)
+            buckets[key].append(item)
+        return list(buckets.values())
+
+    def _run_bucket(self, bucket):
+        lengths = [len(values) for values, _, _ in bucket]
+        # relleno con ceros hasta la entrada más larga de la cubeta, con su máscara de atención
+        input_values, attention_mask = pad_batch([values for values, _, _ in bucket])
+        max_length = input_values.shape[1]
+
+        try:
+            logits = self.run_fn(input_values, attention_mask)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logging.error(f"Fallo en la inferencia por lotes ({len(bucket)} entradas): {e}")
+            self._fail_bucket(bucket, e)
+            return
+
+        now = time.monotonic()
+        self._stats["batches"] += 1
+        self._stats["items"] += len(bucket)
+        self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(bucket))
+        self._stats["real_samples"] += sum(lengths)
+        self._stats["padded_samples"] += len(bucket) * max_length - sum(lengths)
+        self._last_batch_latency_s = now - min(enqueued_at for _, _, enqueued_at in bucket)
+        for row, (_, future, _) in enumerate(bucket):
+            if not future.done():
+                future.set_result(logits[row])
+
+    def _fail_bucket(self, bucket, error: Exception):
+        for _, future, _ in bucket:
+            if not future.done():
+                future.set_exception(error)
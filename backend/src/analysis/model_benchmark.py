@@ -0,0 +1,113 @@
+# backend/src/analysis/model_benchmark.py | Medición de latencia, rendimiento y memoria de un modelo ONNX de emoción vocal
+#
+# se ejecuta en un proceso nuevo por variante para que la memoria medida sea solo la de ese modelo:
+#   python -m src.analysis.model_benchmark --model ruta.onnx --segments entrada.npz --output logits.npy
+# con varios --model se mide una variante de longitud fija (un modelo por cubeta)
+
+import argparse
+import json
+import resource
+import sys
+import time
+
+import numpy as np
+
+from src.analysis.bucketed_session import BucketedSession
+from src.analysis.inference_batcher import pad_batch
+from src.analysis.onnx_session import create_session
+
+def _peak_rss_mb() -> float:
+    # en linux ru_maxrss está en KB; en macOS en bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _load_runner(model_paths: list, intra_op_threads: int):
+    """Devuelve (run(input_values, attention_mask) -> logits, admite lotes, información de la carga)."""
+    if len(model_paths) > 1:
+        session = BucketedSession(model_paths, intra_op_threads=intra_op_threads, cache_optimized=False)
+        return session.run, True, {"bucket_lengths": session.lengths}
+
+    session, _ = create_session(model_paths[0], intra_op_threads=intra_op_threads, cache_optimized=False)
+    model_inputs = session.get_inputs()
+    input_name = model_inputs[0].name
+    has_attention_mask = any(model_input.name == "attention_mask" for model_input in model_inputs)
+
+    def run(input_values, attention_mask):
+        feeds = {input_name: input_values}
+        if has_attention_mask:
+            feeds["attention_mask"] = attention_mask
+        return session.run(None, feeds)[0]
+    return run, model_inputs[0].shape[0] != 1, {}
+
+def measure_variant(model_paths: list, segments: np.ndarray, lengths: np.ndarray, batch_size: int = 8,
+                    warmup: int = 2, intra_op_threads: int = 0) -> tuple:
+    """
+    Mide una variante (un modelo, o uno por cubeta de longitud fija) con segmentos normalizados
+    (N, L) rellenos con ceros y su longitud real. Devuelve (métricas, logits (N, C)).
+    La latencia es por segmento (lote de 1); el rendimiento, en segmentos por segundo con lotes de
+    'batch_size' segmentos de longitud parecida si el modelo los admite.
+    """
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    run, supports_batching, load_info = _load_runner(model_paths, intra_op_threads)
+    load_time_s = time.perf_counter() - start
+    rows = [segment[:length] for segment, length in zip(segments, lengths)]
+
+    for row in rows[:warmup]:
+        run(*pad_batch([row]))
+
+    latencies = []
+    logits = []
+    for row in rows:
+        t0 = time.perf_counter()
+        logits.append(run(*pad_batch([row]))[0])
+        latencies.append(time.perf_counter() - t0)
+
+    if supports_batching and batch_size > 1:
+        # como el planificador de micro-lotes: los segmentos de longitud parecida van juntos
+        order = np.argsort(lengths)
+        t0 = time.perf_counter()
+        for offset in range(0, len(rows), batch_size):
+            run(*pad_batch([rows[index] for index in order[offset:offset + batch_size]]))
+        throughput = len(rows) / (time.perf_counter() - t0)
+    else:
+        throughput = len(rows) / sum(latencies)
+
+    latencies_ms = np.array(latencies) * 1000
+    metrics = {
+        "load_time_s": load_time_s,
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "throughput_per_s": float(throughput),
+        "peak_rss_mb": _peak_rss_mb(),
+        "model_rss_mb": _peak_rss_mb() - rss_before,
+        "supports_batching": supports_batching,
+        **load_info,
+    }
+    return metrics, np.stack(logits)
+
+def agreement(reference_logits: np.ndarray, logits: np.ndarray) -> dict:
+    """Coincidencia de la emoción principal con la referencia y diferencia máxima de probabilidades."""
+    def softmax(x):
+        exp = np.exp(x - x.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+    return {
+        "top1_agreement": float(np.mean(reference_logits.argmax(axis=-1) == logits.argmax(axis=-1))),
+        "max_prob_diff": float(np.abs(softmax(reference_logits) - softmax(logits)).max()),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide un modelo ONNX de emoción vocal.")
+    parser.add_argument("--model", required=True, action="append", help="repetido: un modelo por cubeta de longitud fija")
+    parser.add_argument("--segments", required=True, help="fichero .npz con 'segments' (N, L) normalizados y 'lengths' (N,)")
+    parser.add_argument("--output", required=True, help="fichero .npy donde guardar los logits (N, C)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    data = np.load(args.segments)
+    segments = data["segments"]
+    lengths = data["lengths"] if "lengths" in data else np.full(len(segments), segments.shape[1])
+    metrics, logits = measure_variant(args.model, segments, lengths, args.batch_size, intra_op_threads=args.threads)
+    np.save(args.output, logits)
+    print(json.dumps(metrics))
@@ -0,0 +1,93 @@
+# backend/src/analysis/model_manifest.py | Manifiesto de los modelos exportados y selección automática de variante
+
+import json
+import logging
+import os
+
+MANIFEST_FILE = "manifest.json"
+
+# método de get_recognizer -> fichero del modelo exportado
+VARIANT_FILES = {
+    "onnx_fp32": "model_float32.onnx",
+    "onnx_dynamic": "model_quant_dynamic.onnx",
+    "onnx_static": "model_quant_static.onnx",
+}
+REFERENCE_VARIANT = "onnx_fp32"
+
+# variantes de longitud fija: un modelo por cubeta de duración; "<método>_bucketed" se compara con "<método>"
+BUCKET_LENGTHS_S = (2, 5, 10)
+BUCKETED_VARIANT_FILES = {
+    "onnx_fp32_bucketed": "model_float32_{seconds}s.onnx",
+    "onnx_dynamic_bucketed": "model_quant_dynamic_{seconds}s.onnx",
+    "onnx_static_bucketed": "model_quant_static_{seconds}s.onnx",
+}
+
+def variant_files(method: str, buckets_s=BUCKET_LENGTHS_S) -> list:
+    """Ficheros de una variante: uno solo, o uno por cubeta si es de longitud fija."""
+    if method in VARIANT_FILES:
+        return [VARIANT_FILES[method]]
+    if method in BUCKETED_VARIANT_FILES:
+        return [BUCKETED_VARIANT_FILES[method].format(seconds=seconds) for seconds in buckets_s]
+    raise ValueError(f"Método desconocido o no soportado en la aplicación: {method}")
+
+def load_manifest(onnx_dir: str) -> dict | None:
+    """Lee el manifiesto que escribe scripts/export_to_onnx.py. Devuelve None si no existe o no es válido."""
+    path = os.path.join(onnx_dir, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"No se pudo leer el manifiesto de modelos '{path}': {e}")
+        return None
+
+def model_info(name: str, id2label: dict, sampling_rate: int, do_normalize: bool) -> dict:
+    """Lo que la api necesita del modelo para servir sin transformers: etiquetas y preprocesamiento."""
+    return {
+        "name": name,
+        "id2label": {str(index): label for index, label in id2label.items()},
+        "sampling_rate": int(sampling_rate),
+        "do_normalize": bool(do_normalize),
+    }
+
+def load_model_info(onnx_dir: str) -> dict | None:
+    """Sección 'model' del manifiesto, con las etiquetas indexadas por entero; None si no existe."""
+    info = (load_manifest(onnx_dir) or {}).get("model")
+    if not info:
+        return None
+    return {**info, "id2label": {int(index): label for index, label in info["id2label"].items()}}
+
+def write_manifest(onnx_dir: str, manifest: dict) -> str:
+    """Escribe el manifiesto de forma atómica (la API puede estar leyéndolo)."""
+    path = os.path.join(onnx_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+def select_variant(manifest: dict | None, onnx_dir: str, min_agreement: float | None = None) -> str:
+    """
+    Elige la variante más rápida (latencia p50) cuya coincidencia con fp32 en el conjunto de validación
+    alcanza 'min_agreement' (por defecto la tolerancia guardada en el manifiesto) y cuyo fichero existe.
+    Sin manifiesto, sin candidatas o si la coincidencia no se midió con audios reales de validación,
+    devuelve la referencia fp32.
+    """
+    if not manifest or not manifest.get("variants"):
+        return REFERENCE_VARIANT
+    # con ruido sintético la coincidencia no dice nada de la voz: no se arriesga una variante cuantizada
+    if manifest.get("evaluation", {}).get("source") != "holdout":
+        return REFERENCE_VARIANT
+    if min_agreement is None:
+        min_agreement = manifest.get("min_agreement", 1.0)
+
+    candidates = []
+    for method, stats in manifest["variants"].items():
+        files = stats.get("files") or [stats.get("file", "")]
+        if stats.get("error") or not all(os.path.exists(os.path.join(onnx_dir, name)) for name in files):
+            continue
+        if method != REFERENCE_VARIANT and stats.get("top1_agreement", 0.0) < min_agreement:
+            continue
+        candidates.append((stats.get("latency_p50_ms", float("inf")), method))
+    return min(candidates)[1] if candidates else REFERENCE_VARIANT
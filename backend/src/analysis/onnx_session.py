@@ -0,0 +1,114 @@
+# backend/src/analysis/onnx_session.py | Sesiones de ONNX Runtime: perfiles, hilos por worker y caché del grafo optimizado
+
+import hashlib
+import logging
+import os
+import platform
+import time
+
+import onnxruntime as ort
+
+# --- PERFILES ---
+
+SESSION_PROFILES = {
+    # un solo proceso atendiendo turnos: los hilos esperan activamente entre operadores (menor latencia)
+    "latency": {"allow_spinning": True, "cpu_mem_arena": True, "mem_pattern": True},
+    # varios workers en la misma máquina: sin espera activa, para no quitar CPU a los demás procesos
+    "throughput": {"allow_spinning": False, "cpu_mem_arena": True, "mem_pattern": True},
+    # menos memoria residente a cambio de algo de latencia: sin arena ni planificación de memoria
+    "low_memory": {"allow_spinning": False, "cpu_mem_arena": False, "mem_pattern": False},
+}
+
+def available_cpus() -> int:
+    """Núcleos que puede usar este proceso (respeta la afinidad de CPU, p. ej. en contenedores)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def intra_op_threads_per_worker(workers: int = 1) -> int:
+    """
+    Hilos intra-op de cada sesión para que 'workers' procesos (uvicorn --workers) no se pisen.
+    Cada proceso ejecuta una sola inferencia a la vez (el planificador de micro-lotes).
+    """
+    return max(1, available_cpus() // max(1, workers))
+
+def build_session_options(profile: str = "latency", intra_op_threads: int = 0, inter_op_threads: int = 1,
+                          optimization_level=ort.GraphOptimizationLevel.ORT_ENABLE_ALL) -> ort.SessionOptions:
+    if profile not in SESSION_PROFILES:
+        raise ValueError(f"Perfil de sesión ONNX desconocido: {profile}")
+    settings = SESSION_PROFILES[profile]
+    options = ort.SessionOptions()
+    options.graph_optimization_level = optimization_level
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    # 0 deja que onnxruntime use todos los núcleos
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    options.enable_cpu_mem_arena = settings["cpu_mem_arena"]
+    options.enable_mem_pattern = settings["mem_pattern"]
+    options.add_session_config_entry("session.intra_op.allow_spinning", "1" if settings["allow_spinning"] else "0")
+    return options
+
+# --- CACHÉ DEL GRAFO OPTIMIZADO ---
+
+def optimized_model_path(onnx_path: str, cache_dir: str | None = None) -> str:
+    """
+    Ruta del modelo optimizado en caché. El nombre incluye una huella del modelo original y de la
+    versión de onnxruntime y la arquitectura, así un modelo nuevo o una actualización invalidan la caché.
+    """
+    stat = os.stat(onnx_path)
+    fingerprint = hashlib.sha256(
+        f"{stat.st_size}|{stat.st_mtime_ns}|{ort.__version__}|{platform.machine()}".encode()
+    ).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(onnx_path))[0]
+    return os.path.join(cache_dir or os.path.dirname(onnx_path), f"{name}.opt-{fingerprint}.onnx")
+
+def create_session(onnx_path: str, profile: str = "latency", intra_op_threads: int = 0, inter_op_threads: int = 1,
+                   cache_optimized: bool = True, cache_dir: str | None = None):
+    """
+    Crea la sesión de inferencia en CPU. Con 'cache_optimized', la primera carga optimiza el grafo y lo
+    guarda en disco; las siguientes cargan ese modelo y se saltan la optimización.
+    Devuelve (sesión, información de la carga).
+    """
+    start = time.perf_counter()
+    info = {"profile": profile, "intra_op_threads": intra_op_threads or available_cpus(),
+            "inter_op_threads": inter_op_threads, "optimized_from_cache": False}
+    providers = ["CPUExecutionProvider"]
+
+    if not cache_optimized:
+        options = build_session_options(profile, intra_op_threads, inter_op_threads)
+        session = ort.InferenceSession(onnx_path, options, providers=providers)
+        info["load_time_s"] = time.perf_counter() - start
+        return session, info
+
+    cached_path = optimized_model_path(onnx_path, cache_dir)
+    if os.path.exists(cached_path):
+        options = build_session_options(profile, intra_op_threads, inter_op_threads,
+                                        ort.GraphOptimizationLevel.ORT_DISABLE_ALL)
+        try:
+            session = ort.InferenceSession(cached_path, options, providers=providers)
+            info.update(optimized_from_cache=True, model_path=cached_path, load_time_s=time.perf_counter() - start)
+            return session, info
+        except Exception as e:
+            logging.warning(f"No se pudo cargar el modelo optimizado en caché '{cached_path}', se regenera: {e}")
+
+    # se guarda el nivel 'extended' (fusiones independientes del hardware); las optimizaciones de
+    # disposición de memoria de 'all' dependen de la CPU y no deben guardarse
+    options = build_session_options(profile, intra_op_threads, inter_op_threads,
+                                     ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED)
+    tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+    options.optimized_model_filepath = tmp_path
+    try:
+        os.makedirs(os.path.dirname(cached_path) or ".", exist_ok=True)
+        session = ort.InferenceSession(onnx_path, options, providers=providers)
+        # varios workers pueden arrancar a la vez: el último en terminar reemplaza el fichero sin dejarlo a medias
+        os.replace(tmp_path, cached_path)
+        info["model_path"] = cached_path
+        logging.info(f"Modelo ONNX optimizado guardado en '{cached_path}'")
+    except Exception as e:
+        logging.warning(f"No se pudo guardar el modelo optimizado, se carga sin caché: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        session = ort.InferenceSession(onnx_path, build_session_options(profile, intra_op_threads, inter_op_threads),
+                                       providers=providers)
+    info["load_time_s"] = time.perf_counter() - start
+    return session, info
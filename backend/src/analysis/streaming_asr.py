@@ -0,0 +1,162 @@
+# backend/src/analysis/streaming_asr.py | Adaptadores de transcripción en streaming (Deepgram en vivo y local)
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from urllib.parse import urlencode
+
+import aiohttp
+import numpy as np
+
+import config
+from src.analysis.voice_transcription import DEEPGRAM_OPTIONS, get_http_session
+from src.audio.audio_decoder import AudioInput
+
+DEEPGRAM_LIVE_URL = "wss://api.deepgram.com/v1/listen"
+
+def pcm16_bytes(samples: np.ndarray) -> bytes:
+    """Convierte audio float32 en [-1.0, 1.0] a PCM de 16 bits little-endian."""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+class StreamingASR(ABC):
+    """
+    Transcripción incremental de una frase: se abre al detectar voz, recibe el audio (mono
+    float32) según llega y devuelve el texto final al cerrar. 'on_partial' recibe el texto
+    provisional cuando el servicio lo ofrece.
+    """
+    def __init__(self, sample_rate: int = 16000, on_partial=None):
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+
+    @abstractmethod
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def send(self, samples: np.ndarray):
+        pass
+
+    @abstractmethod
+    async def finish(self) -> str | None:
+        """Cierra la frase y devuelve la transcripción final (None si falló)."""
+        pass
+
+    async def abort(self):
+        """Descarta la frase sin esperar a la transcripción."""
+        pass
+
+class DeepgramStreamingASR(StreamingASR):
+    """Adaptador para la API en vivo de Deepgram (websocket) con resultados provisionales."""
+
+    def __init__(self, sample_rate: int = 16000, on_partial=None, session: aiohttp.ClientSession | None = None):
+        super().__init__(sample_rate, on_partial)
+        self.session = session
+        self._ws = None
+        self._receiver = None
+        self._final_segments = []
+
+    async def start(self):
+        params = {
+            **DEEPGRAM_OPTIONS,
+            "encoding": "linear16",
+            "sample_rate": str(self.sample_rate),
+            "channels": "1",
+            "interim_results": "true",
+        }
+        session = self.session or get_http_session()
+        self._ws = await session.ws_connect(
+            f"{DEEPGRAM_LIVE_URL}?{urlencode(params)}",
+            headers={"Authorization": f"Token {config.DEEPGRAM_API_KEY}"},
+        )
+        self._receiver = asyncio.create_task(self._receive())
+
+    async def send(self, samples: np.ndarray):
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.send_bytes(pcm16_bytes(samples))
+
+    async def finish(self) -> str | None:
+        if self._ws is None:
+            return None
+        try:
+            # deepgram envía los resultados pendientes y cierra la conexión
+            await self._ws.send_str(json.dumps({"type": "CloseStream"}))
+            await asyncio.wait_for(self._receiver, timeout=config.STREAMING_ASR_FINISH_TIMEOUT_S)
+        except Exception as e:
+            logging.error(f"Error al cerrar la transcripción en streaming: {e}")
+            await self.abort()
+        return " ".join(self._final_segments).strip() or None
+
+    async def abort(self):
+        if self._receiver is not None:
+            self._receiver.cancel()
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+
+    async def _receive(self):
+        async for message in self._ws:
+            if message.type != aiohttp.WSMsgType.TEXT:
+                continue
+            body = json.loads(message.data)
+            if body.get("type") != "Results":
+                continue
+            transcript = body["channel"]["alternatives"][0]["transcript"]
+            if body.get("is_final"):
+                if transcript:
+                    self._final_segments.append(transcript)
+            elif transcript and self.on_partial:
+                await self.on_partial(" ".join(self._final_segments + [transcript]))
+
+class LocalStreamingASR(StreamingASR):
+    """
+    Sustituto local sin red para desarrollo y pruebas: acumula el audio y devuelve un texto fijo
+    (o uno que indica la duración de la frase), de modo que el endpoint funciona sin conexión.
+    """
+    def __init__(self, sample_rate: int = 16000, on_partial=None, transcript: str | None = None):
+        super().__init__(sample_rate, on_partial)
+        self.transcript = transcript
+        self.received_samples = 0
+
+    async def start(self):
+        self.received_samples = 0
+
+    async def send(self, samples: np.ndarray):
+        self.received_samples += len(samples)
+
+    async def finish(self) -> str | None:
+        if not self.received_samples:
+            return None
+        return self.transcript or f"(frase de {self.received_samples / self.sample_rate:.1f} segundos)"
+
+class BufferedStreamingASR(StreamingASR):
+    """
+    Adaptador para motores sin streaming (p. ej. Whisper local): acumula la frase y la transcribe
+    completa con 'asr_backend' al cerrarla. No hay resultados provisionales.
+    """
+    def __init__(self, sample_rate: int = 16000, on_partial=None, asr_backend=None):
+        super().__init__(sample_rate, on_partial)
+        self.asr_backend = asr_backend
+        self._chunks = []
+
+    async def start(self):
+        self._chunks = []
+
+    async def send(self, samples: np.ndarray):
+        self._chunks.append(np.array(samples, dtype=np.float32))
+
+    async def finish(self) -> str | None:
+        if not self._chunks:
+            return None
+        audio = AudioInput.from_pcm(np.concatenate(self._chunks), self.sample_rate)
+        return await self.asr_backend.transcribe(audio)
+
+def create_streaming_asr(backend: str = "deepgram", sample_rate: int = 16000, on_partial=None,
+                         asr_backend=None) -> StreamingASR:
+    """Función de fábrica del adaptador de transcripción en streaming."""
+    if backend == "deepgram":
+        return DeepgramStreamingASR(sample_rate, on_partial)
+    if backend == "batch":
+        return BufferedStreamingASR(sample_rate, on_partial, asr_backend)
+    if backend == "local":
+        return LocalStreamingASR(sample_rate, on_partial, transcript=config.LOCAL_ASR_TRANSCRIPT)
+    raise ValueError(f"Backend de transcripción en streaming desconocido: {backend}")
@@ -0,0 +1,141 @@
+# backend/src/analysis/streaming_emotion.py | Análisis de emoción vocal en streaming con ventanas deslizantes
+
+import asyncio
+import logging
+
+import numpy as np
+
+class StreamingEmotionRecognizer:
+    """
+    Análisis de emoción vocal incremental para una frase. El audio (mono float32 a la frecuencia del
+    reconocedor) entra por fragmentos en un buffer circular de 'window_s' segundos; cada 'hop_s'
+    segundos de audio nuevo se infiere la última ventana, de modo que las ventanas se solapan.
+
+    Reutiliza el reconocedor cargado (normalización, id2label) y 'infer(values)', una función que
+    devuelve un awaitable con los logits (C,) de una ventana (p. ej. el planificador de micro-lotes).
+    Las puntuaciones se suavizan con una media móvil exponencial y se notifican con 'on_update';
+    al terminar la frase solo queda por inferir el audio posterior al último salto.
+    """
+    def __init__(self, recognizer, infer, window_s: float = 3.0, hop_s: float = 1.0,
+                 ema_alpha: float = 0.5, min_window_s: float = 0.25, on_update=None):
+        self.recognizer = recognizer
+        self.infer = infer
+        self.sample_rate = recognizer.target_sampling_rate
+        self.window_length = int(window_s * self.sample_rate)
+        # el salto no puede superar la ventana: todo el audio debe caer en alguna ventana
+        self.hop_length = max(1, min(int(hop_s * self.sample_rate), self.window_length))
+        self.min_length = int(min_window_s * self.sample_rate)
+        self.ema_alpha = ema_alpha
+        self.on_update = on_update
+
+        self.smoothed = None
+        self._ring = np.zeros(self.window_length, dtype=np.float32)
+        self._write_pos = 0
+        self._filled = 0
+        self._received = 0
+        # muestras recibidas desde la última ventana inferida
+        self._unscored = 0
+        self._last_task = None
+        self._window_logits = []
+        # peso de cada ventana en el agregado: solo cuenta su audio nuevo, así el solape no pesa doble
+        self._window_weights = []
+        self._window_intervals = []
+
+    # --- API PÚBLICA ---
+
+    def push(self, samples: np.ndarray):
+        """Añade audio a la frase. No bloquea: las inferencias se lanzan como tareas en segundo plano."""
+        samples = samples.astype(np.float32, copy=False)
+        offset = 0
+        while offset < len(samples):
+            take = min(len(samples) - offset, self.hop_length - self._unscored)
+            self._write(samples[offset:offset + take])
+            offset += take
+            if self._unscored >= self.hop_length:
+                self._schedule()
+
+    async def finalize(self, include_windows: bool = False):
+        """
+        Infere el audio pendiente y devuelve (emociones de la frase, emociones por ventana o None),
+        con el mismo formato que el análisis del clip completo. (None, None) si no hubo audio suficiente.
+        """
+        if self._unscored and self._filled >= self.min_length:
+            self._schedule()
+        if self._last_task is not None:
+            await self._last_task
+        if not self._window_logits:
+            return None, None
+
+        recognizer = self.recognizer
+        all_logits = np.average(np.stack(self._window_logits), axis=0, weights=self._window_weights)
+        per_window = None
+        if include_windows:
+            scores = recognizer.probabilities(np.stack(self._window_logits))
+            per_window = [
+                {"start_s": start / self.sample_rate, "end_s": end / self.sample_rate,
+                 "emotions": recognizer.to_predictions(window_scores)}
+                for (start, end), window_scores in zip(self._window_intervals, scores)
+            ]
+        return recognizer.to_predictions(recognizer.probabilities(all_logits)), per_window
+
+    def cancel(self):
+        """Descarta las inferencias pendientes (p. ej. si el cliente se desconecta)."""
+        if self._last_task is not None:
+            self._last_task.cancel()
+
+    # --- BUFFER CIRCULAR ---
+
+    def _write(self, chunk: np.ndarray):
+        # cada fragmento es como mucho de un salto, que nunca supera la ventana
+        first = min(len(chunk), self.window_length - self._write_pos)
+        self._ring[self._write_pos:self._write_pos + first] = chunk[:first]
+        self._ring[:len(chunk) - first] = chunk[first:]
+        self._write_pos = (self._write_pos + len(chunk)) % self.window_length
+        self._filled = min(self.window_length, self._filled + len(chunk))
+        self._received += len(chunk)
+        self._unscored += len(chunk)
+
+    def _current_window(self) -> np.ndarray:
+        if self._filled < self.window_length:
+            return self._ring[:self._filled].copy()
+        return np.concatenate((self._ring[self._write_pos:], self._ring[:self._write_pos]))
+
+    # --- INFERENCIA ---
+
+    def _schedule(self):
+        window = self.recognizer.normalize(self._current_window())
+        interval = (self._received - len(window), self._received)
+        weight = self._unscored
+        self._unscored = 0
+        # cada tarea espera a la anterior antes de aplicar su resultado: el suavizado respeta el orden
+        self._last_task = asyncio.create_task(self._score(window, interval, weight, self._last_task))
+
+    async def _score(self, window: np.ndarray, interval: tuple, weight: int, previous):
+        try:
+            logits = await self.infer(window)
+        except Exception as e:
+            logits = None
+            logging.warning(f"Fallo en la inferencia de una ventana en streaming: {e}")
+        if previous is not None:
+            await previous
+        if logits is None:
+            return
+
+        scores = self.recognizer.probabilities(logits)
+        if self.smoothed is None:
+            self.smoothed = scores
+        else:
+            self.smoothed = self.ema_alpha * scores + (1 - self.ema_alpha) * self.smoothed
+        self._window_logits.append(logits)
+        self._window_weights.append(weight)
+        self._window_intervals.append(interval)
+
+        if self.on_update is not None:
+            try:
+                await self.on_update({
+                    "start_s": interval[0] / self.sample_rate,
+                    "end_s": interval[1] / self.sample_rate,
+                    "emotions": self.recognizer.to_predictions(self.smoothed),
+                })
+            except Exception as e:
+                logging.warning(f"No se pudo notificar la emoción en streaming: {e}")
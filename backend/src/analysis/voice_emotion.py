@@ -1,124 +1,274 @@
 # backend/src/analysis/voice_emotion.py | Lógica para analizar emociones vocales con Wav2Vec2.0
 
-import torch
-import librosa
 import numpy as np
 import os
-import onnxruntime as ort
 from abc import ABC, abstractmethod
-from transformers import Wav2Vec2FeatureExtractor, AutoConfig
-import io
-import soundfile as sf
 import logging
-from pydub import AudioSegment
+from collections import defaultdict
+from dataclasses import dataclass
+
+import config
+from src.analysis.inference_batcher import pad_batch
+from src.analysis.bucketed_session import BucketedSession
+from src.analysis.model_manifest import (BUCKET_LENGTHS_S, BUCKETED_VARIANT_FILES, load_manifest, load_model_info,
+                                         select_variant, variant_files)
+from src.analysis.onnx_session import create_session, intra_op_threads_per_worker
+from src.audio.audio_decoder import AudioInput
 
 # --- CONFIGURACIÓN ---
 MODEL_NAME = "superb/wav2vec2-base-superb-er"
 MODELS_BASE_DIR = os.path.join("ai_resources", "models", "voice_emotion")
 
+# etiquetas y preprocesamiento de superb/wav2vec2-base-superb-er, para modelos exportados sin la sección
+# 'model' del manifiesto (versiones anteriores de scripts/export_to_onnx.py)
+DEFAULT_MODEL_INFO = {
+    "name": MODEL_NAME,
+    "id2label": {0: "neu", 1: "hap", 2: "ang", 3: "sad"},
+    "sampling_rate": 16000,
+    "do_normalize": True,
+}
+
+def normalize_frames(frames: np.ndarray) -> np.ndarray:
+    """Normaliza cada fila (B, L) a media cero y varianza unitaria (la normalización de Wav2Vec2)."""
+    frames = frames.astype(np.float32, copy=False)
+    mean = frames.mean(axis=1, keepdims=True)
+    centered = frames - mean
+    # la varianza se calcula sobre el array ya centrado: una pasada menos que frames.var()
+    var = np.einsum("ij,ij->i", centered, centered)[:, np.newaxis] / frames.shape[1]
+    centered /= np.sqrt(var + 1e-7)
+    return centered
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Softmax estable sobre el último eje."""
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+@dataclass
+class AudioWindows:
+    """Ventanas normalizadas de un clip y su posición (en muestras) dentro del audio original."""
+    values: list
+    starts: list
+    sampling_rate: int
+
+    @property
+    def lengths(self) -> list:
+        return [len(window) for window in self.values]
+
 class BaseEmotionRecognizer(ABC):
     """Clase base abstracta para los reconocedores de emociones vocales."""
-    def __init__(self, model_name: str, **kwargs):
-        logging.info(f"Inicializando procesador de características para '{model_name}'...")
-        self.feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_name)
-        config = AutoConfig.from_pretrained(model_name)
-        self.id2label = config.id2label
-        self.target_sampling_rate = self.feature_extractor.sampling_rate
+    # si el modelo no acepta máscara de atención, solo se agrupan en un lote ventanas de igual longitud
+    has_attention_mask = False
+    supports_batching = True
+
+    def __init__(self, model_name: str, model_dir: str | None = None, **kwargs):
+        # etiquetas y preprocesamiento del manifiesto de la exportación: servir solo necesita numpy y onnxruntime
+        info = load_model_info(model_dir) if model_dir else None
+        if info is None:
+            logging.warning(f"El manifiesto de '{model_dir}' no describe el modelo; se usan las etiquetas de '{MODEL_NAME}'. "
+                            "Vuelve a ejecutar 'scripts/export_to_onnx.py' para generarlo.")
+            info = DEFAULT_MODEL_INFO
+        elif info["name"] != model_name:
+            logging.warning(f"Los modelos de '{model_dir}' se exportaron desde '{info['name']}', no desde '{model_name}'")
+        self.id2label = info["id2label"]
+        self.target_sampling_rate = info["sampling_rate"]
+        self.do_normalize = info["do_normalize"]
 
     @abstractmethod
-    def _predict_logits(self, processed_audio: np.ndarray):
-        """Método abstracto para la inferencia, implementado por las subclases."""
+    def run_batch(self, input_values: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Inferencia sobre un lote (B, L) relleno con ceros; devuelve logits (B, C). Implementado por las subclases."""
         pass
 
-    def _preprocess_audio(self, audio_bytes: bytes):
+    def _preprocess_audio(self, audio: AudioInput | bytes):
         """
         Preprocesa audio desde bytes en memoria sin escribir en disco.
+        Si recibe un AudioInput, reutiliza su decodificación (compartida con la transcripción).
         """
         try:
-            # --- preprocesamiento de audio ---
-            # pydub es bueno para manejar formatos como webm/opus
-            audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
-            
-            # estandarizar a mono y 16khz (requerido por el modelo)
-            audio = audio.set_channels(1)
-            audio = audio.set_frame_rate(self.target_sampling_rate)
-            
-            # convertir a array de numpy (float32)
-            # el rango de 16-bit es -32768 a 32767
-            speech_array = np.array(audio.get_array_of_samples()).astype(np.float32)
-            speech_array /= np.iinfo(np.int16).max # normalizar a [-1.0, 1.0]
-
-            return speech_array
+            if not isinstance(audio, AudioInput):
+                audio = AudioInput(audio)
+            # mono, float32 en [-1.0, 1.0] y 16khz (requerido por el modelo); el wav se lee sin copiar
+            return audio.samples(self.target_sampling_rate)
         except Exception as e:
-            logging.error(f"Error al preprocesar el audio con Pydub: {e}")
+            logging.error(f"Error al decodificar el audio: {e}")
             return np.array([]) # devolver array vacío si hay error
 
-    def predict(self, audio_bytes: bytes, chunk_length_s: float = 10.0):
+    def _normalize(self, frames: np.ndarray) -> np.ndarray:
+        """Normaliza cada fila (B, L) como el extractor de características del modelo."""
+        if not self.do_normalize:
+            return frames.astype(np.float32, copy=False)
+        return normalize_frames(frames)
+
+    def normalize(self, samples: np.ndarray) -> np.ndarray:
+        """Normaliza una sola ventana 1-D (p. ej. la del reconocedor en streaming)."""
+        return self._normalize(samples[np.newaxis])[0]
+
+    def prepare(self, audio: AudioInput | bytes, chunk_length_s: float = 10.0, overlap_s: float = 1.0) -> AudioWindows | None:
         """
-        Realiza la predicción de emociones a partir de datos de audio en bytes.
+        Decodifica el audio y lo divide en ventanas solapadas y normalizadas, listas para 'run_batch'
+        o para el planificador de micro-lotes. Devuelve None si el audio no es válido.
         """
-        processed_audio = self._preprocess_audio(audio_bytes)
+        processed_audio = self._preprocess_audio(audio)
 
         # si el preprocesamiento falla, no seguir
         if processed_audio.size == 0:
             return None
-        
-        if len(processed_audio) <= int(chunk_length_s * self.target_sampling_rate):
-            all_logits = self._predict_logits(processed_audio)
+
+        chunk_size = int(chunk_length_s * self.target_sampling_rate)
+        if len(processed_audio) <= chunk_size:
+            starts = [0]
         else:
-            print(f"Audio largo detectado. Procesando en segmentos de {chunk_length_s}s...")
-            chunk_size = int(chunk_length_s * self.target_sampling_rate)
-            num_chunks = int(np.ceil(len(processed_audio) / chunk_size))
-            
-            chunk_logits = [self._predict_logits(processed_audio[i*chunk_size:(i+1)*chunk_size]) for i in range(num_chunks)]
-            all_logits = np.mean(np.array(chunk_logits), axis=0)
-
-        scores = torch.nn.functional.softmax(torch.from_numpy(all_logits), dim=1).numpy()[0]
-        
-        predictions = sorted(
+            overlap = min(int(overlap_s * self.target_sampling_rate), chunk_size // 2)
+            # una ventana nueva solo si la anterior no llega al final del audio
+            starts = list(range(0, len(processed_audio) - overlap, chunk_size - overlap))
+
+        # las ventanas completas se normalizan juntas sobre una vista sin copia del audio;
+        # la última puede ser más corta
+        full_starts = [start for start in starts if start + chunk_size <= len(processed_audio)]
+        values = []
+        if full_starts:
+            frames = np.lib.stride_tricks.sliding_window_view(processed_audio, chunk_size)[full_starts]
+            values.extend(self._normalize(frames))
+        for start in starts[len(full_starts):]:
+            values.extend(self._normalize(processed_audio[np.newaxis, start:]))
+        return AudioWindows(values=values, starts=starts, sampling_rate=self.target_sampling_rate)
+
+    def probabilities(self, logits: np.ndarray) -> np.ndarray:
+        return softmax(logits)
+
+    def to_predictions(self, scores: np.ndarray) -> list:
+        return sorted(
             [{"label": self.id2label[i].upper(), "score": float(score)} for i, score in enumerate(scores)],
             key=lambda x: x["score"],
             reverse=True
         )
-        return predictions
+
+    def postprocess(self, windows: AudioWindows, window_logits: list) -> list:
+        """Media de los logits ponderada por la duración de cada ventana; devuelve las emociones ordenadas."""
+        all_logits = np.average(np.stack(window_logits), axis=0, weights=windows.lengths)
+        return self.to_predictions(self.probabilities(all_logits))
+
+    def window_scores(self, windows: AudioWindows, window_logits: list) -> list:
+        """Emociones de cada ventana con su intervalo en segundos."""
+        scores = self.probabilities(np.stack(window_logits))
+        return [
+            {
+                "start_s": start / windows.sampling_rate,
+                "end_s": (start + length) / windows.sampling_rate,
+                "emotions": self.to_predictions(window_scores),
+            }
+            for start, length, window_scores in zip(windows.starts, windows.lengths, scores)
+        ]
+
+    def run_windows(self, values: list) -> list:
+        """Inferencia de todas las ventanas de un clip con el menor número de llamadas al modelo."""
+        groups = defaultdict(list)
+        for index, window in enumerate(values):
+            if not self.supports_batching:
+                groups[index].append(index)
+            else:
+                groups[0 if self.has_attention_mask else len(window)].append(index)
+
+        window_logits = [None] * len(values)
+        for indices in groups.values():
+            logits = self.run_batch(*pad_batch([values[index] for index in indices]))
+            for row, index in enumerate(indices):
+                window_logits[index] = logits[row]
+        return window_logits
+
+    def predict(self, audio_bytes: bytes, chunk_length_s: float = 10.0, overlap_s: float = 1.0):
+        """
+        Realiza la predicción de emociones a partir de datos de audio en bytes (sin micro-lotes).
+        """
+        windows = self.prepare(audio_bytes, chunk_length_s, overlap_s)
+        if windows is None:
+            return None
+        return self.postprocess(windows, self.run_windows(windows.values))
 
 class ONNXEmotionRecognizer(BaseEmotionRecognizer):
     """Reconocedor usando un modelo ONNX optimizado."""
-    def __init__(self, model_name: str, onnx_path: str, **kwargs):
-        super().__init__(model_name)
+    def __init__(self, model_name: str, onnx_path: str, session_profile: str = "latency",
+                 intra_op_threads: int = 0, inter_op_threads: int = 1, cache_optimized: bool = True, **kwargs):
+        super().__init__(model_name, model_dir=os.path.dirname(onnx_path))
         logging.info(f"Cargando sesión de inferencia de ONNX Runtime desde '{onnx_path}'...")
         if not os.path.exists(onnx_path):
              raise FileNotFoundError(f"El modelo ONNX no fue encontrado en '{onnx_path}'. "
                                    f"Por favor, ejecuta el script 'scripts/export_to_onnx.py' y verifica la estructura de carpetas 'ai_resources/'.")
-        self.session = ort.InferenceSession(onnx_path)
-        self.input_name = self.session.get_inputs()[0].name
-        logging.info("Sesión ONNX cargada")
+        self.session, self.session_info = create_session(
+            onnx_path, profile=session_profile, intra_op_threads=intra_op_threads,
+            inter_op_threads=inter_op_threads, cache_optimized=cache_optimized
+        )
+        model_inputs = self.session.get_inputs()
+        self.input_name = model_inputs[0].name
+        self.has_attention_mask = any(model_input.name == "attention_mask" for model_input in model_inputs)
+        # los modelos exportados antes de admitir lotes tienen la dimensión de batch fija en 1
+        self.supports_batching = model_inputs[0].shape[0] != 1
+        logging.info(f"Sesión ONNX cargada: {self.session_info}")
 
-    def _predict_logits(self, chunk: np.ndarray):
-        inputs = self.feature_extractor(chunk, sampling_rate=self.target_sampling_rate, return_tensors="np", padding=True)
-        onnx_inputs = {self.input_name: inputs.input_values.astype(np.float32)}
+    def run_batch(self, input_values: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        onnx_inputs = {self.input_name: input_values.astype(np.float32, copy=False)}
+        if self.has_attention_mask:
+            onnx_inputs["attention_mask"] = attention_mask
         logits = self.session.run(None, onnx_inputs)[0]
         return logits
 
+class BucketedONNXEmotionRecognizer(BaseEmotionRecognizer):
+    """
+    Reconocedor con un modelo ONNX de longitud fija por cubeta (ver scripts/export_to_onnx.py).
+    Cada ventana se rellena hasta la cubeta más cercana y se ejecuta con buffers ligados por IOBinding.
+    """
+    has_attention_mask = True
+
+    def __init__(self, model_name: str, onnx_paths: list, session_profile: str = "latency", intra_op_threads: int = 0,
+                 inter_op_threads: int = 1, cache_optimized: bool = True, max_batch_size: int = 8, **kwargs):
+        super().__init__(model_name, model_dir=os.path.dirname(onnx_paths[0]) if onnx_paths else None)
+        missing = [path for path in onnx_paths if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"Modelos ONNX por cubetas no encontrados: {missing}. "
+                                    f"Por favor, ejecuta el script 'scripts/export_to_onnx.py'.")
+        logging.info(f"Cargando {len(onnx_paths)} sesiones de ONNX Runtime de longitud fija...")
+        self.session = BucketedSession(
+            onnx_paths, max_batch_size=max_batch_size, profile=session_profile, intra_op_threads=intra_op_threads,
+            inter_op_threads=inter_op_threads, cache_optimized=cache_optimized
+        )
+        self.has_attention_mask = self.session.has_attention_mask
+        self.session_info = self.session.session_info
+        logging.info(f"Sesiones ONNX cargadas: {self.session_info}")
+
+    def prepare(self, audio: AudioInput | bytes, chunk_length_s: float = 10.0, overlap_s: float = 1.0) -> AudioWindows | None:
+        # las ventanas no superan la mayor cubeta (los modelos no admiten entradas más largas)
+        max_chunk_s = self.session.max_length / self.target_sampling_rate
+        return super().prepare(audio, min(chunk_length_s, max_chunk_s), overlap_s)
+
+    def run_batch(self, input_values: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(input_values, attention_mask)
+
+def _session_settings() -> dict:
+    """Ajustes de la sesión ONNX desde la configuración; sin hilos fijados, se reparten los núcleos entre workers."""
+    return {
+        "session_profile": config.ORT_SESSION_PROFILE,
+        "intra_op_threads": config.ORT_INTRA_OP_THREADS or intra_op_threads_per_worker(config.WEB_CONCURRENCY),
+        "inter_op_threads": config.ORT_INTER_OP_THREADS,
+        "cache_optimized": config.ORT_OPTIMIZED_MODEL_CACHE,
+    }
+
 def get_recognizer(method: str = "onnx_fp32", model_name: str = MODEL_NAME, onnx_dir: str = MODELS_BASE_DIR):
     """
     Función de fábrica que devuelve el tipo correcto de reconocedor según el método.
+    Con "auto" se usa la variante que recomienda el manifiesto de scripts/export_to_onnx.py
+    (la más rápida dentro de la tolerancia de precisión), o fp32 si no hay manifiesto.
     """
+    manifest = load_manifest(onnx_dir)
+    if method == "auto":
+        method = select_variant(manifest, onnx_dir, config.VOCAL_MODEL_MIN_AGREEMENT)
+
     print("-" * 20)
     print(f"Cargando modelo de emoción vocal (Método: {method})")
     print("-" * 20)
 
-    if method == "onnx_dynamic": 
-        onnx_path = os.path.join(onnx_dir, "model_quant_dynamic.onnx")
-        return ONNXEmotionRecognizer(model_name, onnx_path=onnx_path)
-        
-    elif method == "onnx_static":
-        onnx_path = os.path.join(onnx_dir, "model_quant_static.onnx")
-        return ONNXEmotionRecognizer(model_name, onnx_path=onnx_path)
-        
-    elif method == "onnx_fp32":
-        onnx_path = os.path.join(onnx_dir, "model_float32.onnx")
-        return ONNXEmotionRecognizer(model_name, onnx_path=onnx_path)
-        
-    else:
-        raise ValueError(f"Método desconocido o no soportado en la aplicación: {method}")
\ No newline at end of file
+    if method in BUCKETED_VARIANT_FILES:
+        buckets_s = (manifest or {}).get("buckets_s", BUCKET_LENGTHS_S)
+        onnx_paths = [os.path.join(onnx_dir, name) for name in variant_files(method, buckets_s)]
+        return BucketedONNXEmotionRecognizer(model_name, onnx_paths, max_batch_size=config.VOCAL_BATCH_MAX_SIZE,
+                                             **_session_settings())
+    onnx_path = os.path.join(onnx_dir, variant_files(method)[0])
+    return ONNXEmotionRecognizer(model_name, onnx_path=onnx_path, **_session_settings())
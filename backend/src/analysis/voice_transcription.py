@@ -1,37 +1,219 @@
 # backend/src/analysis/voice_transcription.py
 
-from deepgram import Deepgram
+import aiohttp
 import asyncio
 import config
 import logging
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
-# inicializar cliente de deepgram
-try:
-    dg_client = Deepgram(config.DEEPGRAM_API_KEY)
-except Exception as e:
-    logging.error(f"Error al inicializar el cliente de Deepgram: {e}")
-    dg_client = None
+from src.audio.audio_decoder import AudioInput
 
-async def transcribe_audio_deepgram(audio_data: bytes) -> str | None:
+# --- CONFIGURACIÓN ---
+DEEPGRAM_LISTEN_URL = "https://api.deepgram.com/v1/listen"
+# mismo idioma que Whisper (ASR_LANGUAGE), para que los motores se comporten igual con la misma configuración
+DEEPGRAM_OPTIONS = {"punctuate": "true", "language": config.ASR_LANGUAGE, "model": "nova-3", "smart_format": "true"}
+DEEPGRAM_TIMEOUT_S = 30
+
+# sesión http compartida: reutiliza conexiones tls con deepgram entre peticiones
+_http_session: aiohttp.ClientSession | None = None
+
+def _new_http_session() -> aiohttp.ClientSession:
+    return aiohttp.ClientSession(
+        headers={"Authorization": f"Token {config.DEEPGRAM_API_KEY}"},
+        timeout=aiohttp.ClientTimeout(total=DEEPGRAM_TIMEOUT_S),
+    )
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Devuelve la sesión compartida, creándola en el event loop actual si no existe."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = _new_http_session()
+    return _http_session
+
+async def close_transcription_client():
+    """Cierra la sesión compartida (se llama al apagar la API)."""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+async def transcribe_audio_deepgram(audio_data: bytes, mimetype: str = "audio/wav",
+                                    session: aiohttp.ClientSession | None = None) -> str | None:
     """
     Transcribe audio usando Deepgram. Devuelve el texto o None en caso de error.
     """
-    if not dg_client:
-        logging.error("Error: El cliente de Deepgram no está inicializado.")
+    if not config.DEEPGRAM_API_KEY:
+        logging.error("Error: no hay clave de API de Deepgram configurada.")
         return None
 
+    session = session or get_http_session()
     try:
-        source = {"buffer": audio_data, "mimetype": "audio/wav"}
-        response = await dg_client.transcription.prerecorded(
-            source, 
-            {"punctuate": True, "language": "es", "model": "nova-3", "smart_format": True}
-        )
-        transcript = response["results"]["channels"][0]["alternatives"][0]["transcript"]
+        async with session.post(
+            DEEPGRAM_LISTEN_URL,
+            params=DEEPGRAM_OPTIONS,
+            data=audio_data,
+            headers={"Content-Type": mimetype},
+        ) as response:
+            response.raise_for_status()
+            body = await response.json()
+        transcript = body["results"]["channels"][0]["alternatives"][0]["transcript"]
         return transcript
     except Exception as e:
-        print(f"Error durante la transcripción con Deepgram: {e}")
+        logging.error(f"Error durante la transcripción con Deepgram: {e}")
         return None # devolver none para señalar el error
-        
-def run_transcription(audio_data: bytes) -> str | None:
-    """Función de conveniencia para ejecutar el código asíncrono desde Streamlit."""
-    return asyncio.run(transcribe_audio_deepgram(audio_data))
\ No newline at end of file
+
+def run_transcription(audio_data: bytes, backend: "ASRBackend | None" = None) -> str | None:
+    """
+    Función de conveniencia para scripts síncronos (p. ej. benchmarks sin red con un WhisperASR).
+    Sin 'backend' usa Deepgram con una sesión propia, porque la compartida pertenece al event loop de la API.
+    """
+    async def _run():
+        if backend is not None:
+            return await backend.transcribe(AudioInput(audio_data))
+        async with _new_http_session() as session:
+            return await transcribe_audio_deepgram(audio_data, session=session)
+    return asyncio.run(_run())
+
+# --- MOTORES DE TRANSCRIPCIÓN ---
+
+class ASRBackend(ABC):
+    """
+    Motor de transcripción de un turno completo. Recibe el AudioInput compartido con el análisis
+    vocal (que ya sabe su formato y guarda su decodificación) y devuelve el texto o None si falla.
+    """
+    name = "base"
+
+    def __init__(self):
+        self._stats = {"requests": 0, "failures": 0, "total_latency_s": 0.0}
+
+    async def transcribe(self, audio: AudioInput, profiling_data: dict | None = None) -> str | None:
+        start = time.perf_counter()
+        self._stats["requests"] += 1
+        transcript = await self._transcribe(audio, profiling_data if profiling_data is not None else {})
+        if transcript is None:
+            self._stats["failures"] += 1
+        self._stats["total_latency_s"] += time.perf_counter() - start
+        return transcript
+
+    @abstractmethod
+    async def _transcribe(self, audio: AudioInput, profiling_data: dict) -> str | None:
+        pass
+
+    def metrics(self) -> dict:
+        requests = self._stats["requests"]
+        return {
+            "backend": self.name,
+            "avg_latency_s": self._stats["total_latency_s"] / requests if requests else 0.0,
+            **self._stats,
+        }
+
+    def close(self):
+        pass
+
+class DeepgramASR(ASRBackend):
+    """
+    Deepgram por HTTP. Los formatos comprimidos se envían tal cual con su mimetype real;
+    el WAV se recodifica a FLAC (fuera del event loop) reutilizando la decodificación compartida.
+    """
+    name = "deepgram"
+
+    def __init__(self, compress_pcm: bool = True):
+        super().__init__()
+        self.compress_pcm = compress_pcm
+
+    async def _transcribe(self, audio: AudioInput, profiling_data: dict) -> str | None:
+        if self.compress_pcm and audio.format == "wav":
+            payload, mimetype = await asyncio.to_thread(audio.transcription_payload)
+        else:
+            payload, mimetype = audio.transcription_payload(compress_pcm=False)
+        profiling_data['transcription_payload_bytes'] = len(payload)
+        return await transcribe_audio_deepgram(payload, mimetype=mimetype)
+
+class WhisperASR(ASRBackend):
+    """
+    Whisper local en CPU con faster-whisper (CTranslate2, int8 por defecto). El modelo se carga una
+    vez al arrancar; cada transcripción corre en un pool propio de 'max_concurrency' hilos y las
+    peticiones que no caben esperan su turno, así la CPU no se reparte entre demasiados turnos.
+    Con 'batch_size' > 1 los segmentos de un mismo audio se decodifican en lotes.
+    """
+    name = "whisper"
+
+    def __init__(self, model: str = "small", compute_type: str = "int8", beam_size: int = 1,
+                 batch_size: int = 8, max_concurrency: int = 2, cpu_threads: int = 0, language: str = "es"):
+        super().__init__()
+        # faster-whisper (CTranslate2) es opcional (pip install faster-whisper) y pesado: solo se importa si se usa
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise ImportError("faster-whisper no está instalado. Instálalo con: pip install faster-whisper")
+        logging.info(f"Cargando modelo de Whisper '{model}' ({compute_type})...")
+        self.model = WhisperModel(model, device="cpu", compute_type=compute_type,
+                                  cpu_threads=cpu_threads, num_workers=max_concurrency)
+        self.beam_size = beam_size
+        self.language = language
+        self.max_concurrency = max_concurrency
+        self.pipeline = None
+        self.batch_size = batch_size
+        if batch_size > 1:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+                self.pipeline = BatchedInferencePipeline(model=self.model)
+            except ImportError:
+                logging.warning("Esta versión de faster-whisper no admite lotes; se transcribe segmento a segmento.")
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="whisper")
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._running = 0
+        logging.info("Modelo de Whisper cargado")
+
+    def _run(self, samples) -> str:
+        if self.pipeline is not None:
+            segments, _ = self.pipeline.transcribe(samples, language=self.language, beam_size=self.beam_size,
+                                                   batch_size=self.batch_size)
+        else:
+            segments, _ = self.model.transcribe(samples, language=self.language, beam_size=self.beam_size)
+        # los segmentos se generan de forma perezosa: la decodificación ocurre al recorrerlos
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    async def _transcribe(self, audio: AudioInput, profiling_data: dict) -> str | None:
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            samples = await loop.run_in_executor(self._executor, audio.samples, 16000)
+            return await loop.run_in_executor(self._executor, self._run, samples) or None
+        except Exception as e:
+            logging.error(f"Error durante la transcripción con Whisper: {e}")
+            return None
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), "max_concurrency": self.max_concurrency, "running": self._running,
+                "waiting": self._waiting, "beam_size": self.beam_size}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def create_asr_backend(backend: str = config.ASR_BACKEND) -> ASRBackend:
+    """Función de fábrica del motor de transcripción configurado."""
+    if backend == "deepgram":
+        return DeepgramASR(compress_pcm=config.DEEPGRAM_COMPRESS_PCM)
+    if backend == "whisper":
+        return WhisperASR(
+            model=config.WHISPER_MODEL,
+            compute_type=config.WHISPER_COMPUTE_TYPE,
+            beam_size=config.WHISPER_BEAM_SIZE,
+            batch_size=config.WHISPER_BATCH_SIZE,
+            max_concurrency=config.ASR_MAX_CONCURRENCY,
+            cpu_threads=config.WHISPER_CPU_THREADS,
+            language=config.ASR_LANGUAGE,
+        )
+    raise ValueError(f"Motor de transcripción desconocido: {backend}")
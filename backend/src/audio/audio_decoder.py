@@ -0,0 +1,236 @@
+# backend/src/audio/audio_decoder.py | Decodificación de audio en memoria a mono float32
+
+import io
+import logging
+import struct
+import threading
+from functools import lru_cache
+
+import numpy as np
+import soundfile as sf
+from pydub import AudioSegment
+
+# --- DETECCIÓN DE FORMATO ---
+
+# firmas (offset, bytes) de los contenedores que envían los navegadores y los clientes de prueba
+_MAGIC_NUMBERS = [
+    ("wav", 0, b"RIFF"),
+    ("ogg", 0, b"OggS"),
+    ("flac", 0, b"fLaC"),
+    ("webm", 0, b"\x1aE\xdf\xa3"),
+    ("mp4", 4, b"ftyp"),
+    ("mp3", 0, b"ID3"),
+    ("mp3", 0, b"\xff\xfb"),
+    ("mp3", 0, b"\xff\xf3"),
+    ("mp3", 0, b"\xff\xf2"),
+]
+
+# formatos que libsndfile lee directamente, sin ffmpeg
+_SOUNDFILE_FORMATS = {"wav", "flac", "ogg"}
+
+MIME_TYPES = {
+    "wav": "audio/wav",
+    "ogg": "audio/ogg",
+    "flac": "audio/flac",
+    "webm": "audio/webm",
+    "mp4": "audio/mp4",
+    "mp3": "audio/mpeg",
+}
+
+def detect_audio_format(audio_bytes: bytes) -> str | None:
+    """Detecta el contenedor a partir de sus primeros bytes. Devuelve None si no se reconoce."""
+    for name, offset, magic in _MAGIC_NUMBERS:
+        if audio_bytes[offset:offset + len(magic)] == magic:
+            if name == "wav" and audio_bytes[8:12] != b"WAVE":
+                continue
+            return name
+    return None
+
+# --- WAV / PCM SIN COPIA ---
+
+# (formato, bits) -> dtype de numpy; 1 = PCM entero, 3 = IEEE float
+_WAV_DTYPES = {
+    (1, 8): np.dtype("u1"),
+    (1, 16): np.dtype("<i2"),
+    (1, 32): np.dtype("<i4"),
+    (3, 32): np.dtype("<f4"),
+    (3, 64): np.dtype("<f8"),
+}
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+def _read_wav_pcm(audio_bytes: bytes):
+    """
+    Lee un WAV PCM/float como vista de numpy sobre el propio buffer (sin copiar).
+    Devuelve (frames (N, canales), sample_rate) o None si el WAV no es de un tipo soportado.
+    """
+    buffer = memoryview(audio_bytes)
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(buffer):
+        chunk_id = bytes(buffer[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", buffer, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            format_tag, channels, sample_rate, _, block_align, bits = struct.unpack_from("<HHIIHH", buffer, body)
+            if format_tag == _WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                format_tag = struct.unpack_from("<H", buffer, body + 24)[0]
+            fmt = (format_tag, channels, sample_rate, block_align, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            format_tag, channels, sample_rate, block_align, bits = fmt
+            dtype = _WAV_DTYPES.get((format_tag, bits))
+            if dtype is None or channels == 0 or block_align != channels * dtype.itemsize:
+                return None
+            # los navegadores que graban en streaming dejan el tamaño a 0 o 0xFFFFFFFF
+            available = len(buffer) - body
+            if chunk_size == 0 or chunk_size > available:
+                chunk_size = available
+            frame_count = chunk_size // block_align
+            samples = np.frombuffer(buffer, dtype=dtype, count=frame_count * channels, offset=body)
+            return samples.reshape(frame_count, channels), sample_rate
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+def _to_mono_float32(frames: np.ndarray) -> np.ndarray:
+    """Convierte frames (N, canales) de cualquier dtype a mono float32 en [-1.0, 1.0]."""
+    dtype = frames.dtype
+    if frames.shape[1] == 1:
+        mono = frames[:, 0].astype(np.float32)
+    else:
+        mono = frames.mean(axis=1, dtype=np.float32)
+    if dtype.kind == "u":
+        mono -= 128.0
+        mono *= 1.0 / 128.0
+    elif dtype.kind == "i":
+        mono *= 1.0 / (np.iinfo(dtype).max + 1)
+    return mono
+
+# --- REMUESTREO ---
+
+@lru_cache(maxsize=16)
+def _lowpass_kernel(cutoff: float, num_taps: int = 63) -> np.ndarray:
+    """Filtro FIR sinc con ventana de Hamming; 'cutoff' es relativo a la frecuencia de Nyquist."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    kernel = cutoff * np.sinc(cutoff * n) * np.hamming(num_taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+def resample(samples: np.ndarray, orig_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Remuestreo vectorizado en numpy. Al bajar la frecuencia se filtra antes para evitar aliasing;
+    las razones enteras (48 kHz -> 16 kHz) se diezman directamente y el resto se interpola.
+    """
+    if orig_rate == target_rate or samples.size == 0:
+        return samples
+    if orig_rate > target_rate:
+        samples = np.convolve(samples, _lowpass_kernel(target_rate / orig_rate), mode="same")
+        if orig_rate % target_rate == 0:
+            return np.ascontiguousarray(samples[::orig_rate // target_rate], dtype=np.float32)
+    output_length = int(round(len(samples) * target_rate / orig_rate))
+    positions = np.arange(output_length, dtype=np.float64) * (orig_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+# --- FORMATOS COMPRIMIDOS ---
+
+@lru_cache(maxsize=1)
+def _load_av():
+    """
+    pyav decodifica webm/mp4 dentro del proceso; sin él se usa pydub (un subproceso de ffmpeg por petición).
+    Se importa la primera vez que llega un formato comprimido, no al arrancar la api.
+    """
+    try:
+        import av
+    except ImportError:
+        return None
+    return av
+
+def _decode_with_av(av, audio_bytes: bytes, target_rate: int) -> np.ndarray:
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=target_rate)
+    chunks = []
+    with av.open(io.BytesIO(audio_bytes)) as container:
+        for frame in container.decode(audio=0):
+            chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(frame))
+        chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(None))
+    return np.concatenate(chunks).astype(np.float32, copy=False) if chunks else np.array([], dtype=np.float32)
+
+def _decode_with_pydub(audio_bytes: bytes, target_rate: int) -> np.ndarray:
+    audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
+    audio = audio.set_channels(1).set_frame_rate(target_rate)
+    samples = np.frombuffer(audio.raw_data, dtype=np.dtype(f"<i{audio.sample_width}"))
+    return _to_mono_float32(samples.reshape(-1, 1))
+
+# --- API PÚBLICA ---
+
+def decode_audio(audio_bytes: bytes, target_rate: int = 16000, audio_format: str | None = None) -> np.ndarray:
+    """
+    Decodifica audio en memoria a mono float32 a 'target_rate'. El WAV PCM se lee sin copiar el buffer,
+    FLAC/OGG con soundfile, y solo los contenedores comprimidos (webm, mp4, mp3) pasan por ffmpeg.
+    """
+    audio_format = audio_format or detect_audio_format(audio_bytes)
+
+    if audio_format == "wav":
+        wav = _read_wav_pcm(audio_bytes)
+        if wav is not None:
+            frames, sample_rate = wav
+            return resample(_to_mono_float32(frames), sample_rate, target_rate)
+
+    if audio_format in _SOUNDFILE_FORMATS:
+        try:
+            frames, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype="float32", always_2d=True)
+            return resample(_to_mono_float32(frames), sample_rate, target_rate)
+        except RuntimeError as e:
+            logging.warning(f"soundfile no pudo leer el audio ({audio_format}), se usa ffmpeg: {e}")
+
+    av = _load_av()
+    if av is not None:
+        return _decode_with_av(av, audio_bytes, target_rate)
+    return _decode_with_pydub(audio_bytes, target_rate)
+
+class AudioInput:
+    """
+    Audio de una petición compartido por todos sus consumidores: el formato se detecta una vez
+    y cada decodificación (p. ej. mono float32 a 16 kHz) se hace una sola vez y se reutiliza.
+    Es seguro usarlo desde varios hilos.
+    """
+    def __init__(self, data: bytes, declared_mimetype: str | None = None):
+        self.data = data
+        self.format = detect_audio_format(data)
+        self.declared_mimetype = declared_mimetype
+        self._decoded = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_pcm(cls, samples: np.ndarray, sample_rate: int = 16000) -> "AudioInput":
+        """Crea un AudioInput a partir de audio ya decodificado (mono float32), p. ej. del micrófono en streaming."""
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, sample_rate, format="WAV", subtype="PCM_16")
+        audio = cls(buffer.getvalue())
+        audio._decoded[sample_rate] = samples.astype(np.float32, copy=False)
+        return audio
+
+    @property
+    def mimetype(self) -> str:
+        """Mimetype real del contenedor; si no se reconoce, el declarado por el cliente."""
+        return MIME_TYPES.get(self.format) or self.declared_mimetype or "application/octet-stream"
+
+    def samples(self, target_rate: int = 16000) -> np.ndarray:
+        """Audio mono float32 a 'target_rate', decodificado en la primera llamada."""
+        with self._lock:
+            if target_rate not in self._decoded:
+                self._decoded[target_rate] = decode_audio(self.data, target_rate, self.format)
+            return self._decoded[target_rate]
+
+    def duration_s(self, target_rate: int = 16000) -> float:
+        return len(self.samples(target_rate)) / target_rate
+
+    def transcription_payload(self, compress_pcm: bool = True, target_rate: int = 16000) -> tuple:
+        """
+        Devuelve (bytes, mimetype) para el servicio de transcripción. Los formatos comprimidos se
+        envían tal cual; el WAV sin comprimir se recodifica a FLAC mono a 'target_rate' (mucho más
+        pequeño) reutilizando la decodificación que ya hace el análisis vocal.
+        """
+        if not compress_pcm or self.format != "wav":
+            return self.data, self.mimetype
+        buffer = io.BytesIO()
+        sf.write(buffer, self.samples(target_rate), target_rate, format="FLAC", subtype="PCM_16")
+        return buffer.getvalue(), MIME_TYPES["flac"]
@@ -0,0 +1,188 @@
+# backend/src/audio/tts_cache.py | Caché de audio sintetizado (LRU en memoria y almacenamiento en disco por contenido)
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+
+def normalize_text(text: str) -> str:
+    """Normaliza el texto para la clave: espacios repetidos o en los extremos no cambian el audio."""
+    return re.sub(r"\s+", " ", text).strip()
+
+class TTSCache:
+    """
+    Caché de síntesis de voz indexada por (texto normalizado, voz y sus ajustes, formato).
+    Los audios recientes se guardan en un LRU en memoria acotado en bytes; opcionalmente también
+    en disco, en ficheros nombrados por el hash de la clave y acotados en tamaño total, de modo
+    que sobreviven a reinicios. Las síntesis concurrentes del mismo texto se hacen una sola vez.
+    Está pensada para usarse desde el event loop de la API.
+    """
+    def __init__(self, max_memory_bytes: int = 32 * 1024 * 1024, cache_dir: str | None = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        # índice del disco: hash -> tamaño, en orden de uso (el más antiguo primero)
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._inflight = {}
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0,
+                       "memory_evictions": 0, "disk_evictions": 0, "failures": 0}
+        if cache_dir:
+            self._load_disk_index()
+
+    @staticmethod
+    def key(text: str, voice: str, audio_format: str = "mp3") -> str:
+        """Clave de contenido (sha256) de una síntesis; 'voice' identifica la voz y todo ajuste que cambie el audio."""
+        raw = "\x1f".join([normalize_text(text), voice, audio_format])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # --- API PÚBLICA ---
+
+    async def get_or_synthesize(self, key: str, synthesize) -> bytes | None:
+        """
+        Devuelve el audio de 'key' desde memoria o disco; si no está, espera a 'synthesize()'
+        (una corrutina) y guarda el resultado. Los fallos (None) no se guardan.
+        """
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._stats["hits"] += 1
+            return audio
+
+        # otra petición ya está sintetizando (o leyendo) el mismo texto
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._load_or_synthesize(key, synthesize))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # si quien la lanzó se cancela, la síntesis sigue para los demás y para la caché
+        return await asyncio.shield(task)
+
+    async def warm_up(self, phrases: list, synthesize_fn, voice: str, audio_format: str = "mp3"):
+        """Pre-sintetiza frases fijas conocidas (mensajes de error, respuestas de respaldo)."""
+        for phrase in phrases:
+            key = self.key(phrase, voice, audio_format)
+            try:
+                await self.get_or_synthesize(key, lambda phrase=phrase: synthesize_fn(phrase))
+            except Exception as e:
+                logging.warning(f"No se pudo pre-sintetizar '{phrase}': {e}")
+
+    def metrics(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "hit_ratio": (self._stats["hits"] + self._stats["disk_hits"]) / lookups if lookups else 0.0,
+            **self._stats,
+        }
+
+    # --- MEMORIA ---
+
+    def _store_in_memory(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats["memory_evictions"] += 1
+
+    async def _load_or_synthesize(self, key: str, synthesize) -> bytes | None:
+        if key in self._disk:
+            audio = await asyncio.to_thread(self._read_file, key)
+            if audio is not None:
+                self._disk.move_to_end(key)
+                self._stats["disk_hits"] += 1
+                self._store_in_memory(key, audio)
+                return audio
+            # el fichero desapareció o está dañado
+            self._disk_bytes -= self._disk.pop(key, 0)
+
+        self._stats["misses"] += 1
+        audio = await synthesize()
+        if not audio:
+            self._stats["failures"] += 1
+            return audio
+        self._store_in_memory(key, audio)
+        if self.cache_dir and await asyncio.to_thread(self._write_file, key, audio):
+            # el índice solo se modifica desde el event loop; los hilos solo tocan ficheros
+            self._disk_bytes += len(audio) - self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+            evicted = self._evict_disk()
+            if evicted:
+                await asyncio.to_thread(self._remove_files, evicted)
+        return audio
+
+    # --- DISCO ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _load_disk_index(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self._disk_bytes += size
+        self._remove_files(self._evict_disk())
+
+    def _read_file(self, key: str) -> bytes | None:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_file(self, key: str, audio: bytes) -> bool:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # escritura atómica: nunca se lee un fichero a medio escribir
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"No se pudo guardar el audio en la caché de disco: {e}")
+            return False
+        return True
+
+    def _evict_disk(self) -> list:
+        """Saca del índice las entradas más antiguas hasta respetar el límite; devuelve sus claves."""
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._stats["disk_evictions"] += 1
+            evicted.append(key)
+        return evicted
+
+    def _remove_files(self, keys: list):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
@@ -1,41 +1,153 @@
-# backend/src/audio/tts_player.py
+# backend/src/audio/tts_player.py | Motores de síntesis de voz (Edge-TTS remoto y Piper local)
 
 import asyncio
+import io
+import logging
 import os
-import tempfile
+from abc import ABC, abstractmethod
+
+import numpy as np
+import soundfile as sf
 from edge_tts import Communicate
-from pydub import AudioSegment
+
 import config
+from src.audio.audio_decoder import MIME_TYPES
+
+# formato de salida -> (formato, subtipo) de soundfile para codificar el PCM de los motores locales
+_SOUNDFILE_FORMATS = {
+    "wav": ("WAV", "PCM_16"),
+    "flac": ("FLAC", "PCM_16"),
+    "ogg": ("OGG", "VORBIS"),
+    "mp3": ("MP3", "MPEG_LAYER_III"),
+}
 
-async def synthesize_speech_edge(text: str):
+class TTSBackend(ABC):
     """
-    Sintetiza el texto a voz usando Edge-TTS y devuelve los datos de audio en bytes.
+    Motor de síntesis de voz. 'stream' devuelve el audio codificado en 'audio_format' por
+    fragmentos según se genera; 'voice_id' identifica la voz y sus ajustes (clave de la caché).
+    La API sintetiza cada frase de la respuesta por separado, así que el audio sale frase a frase.
     """
-    try:
-        communicate = Communicate(text, config.EDGE_VOICE)
-        
-        # guardar en un archivo temporal para procesar con pydub
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-            tmp_path = tmp_file.name
-
-        await communicate.save(tmp_path)
-        
-        # aumentar volumen y leer bytes
-        audio = AudioSegment.from_file(tmp_path, format="mp3")
-        audio = audio.apply_gain(+6)
-        
-        # exportar a un buffer en memoria
-        buffer = audio.export(format="mp3").read()
-
-        # limpiar el archivo temporal
-        os.remove(tmp_path)
-        
-        return buffer
-
-    except Exception as e:
-        print(f"Error durante la síntesis de voz: {e}")
-        return None
-
-# función de ayuda para ejecutar desde streamlit
-def run_synthesis(text: str) -> bytes:
-    return asyncio.run(synthesize_speech_edge(text))
\ No newline at end of file
+    name = "base"
+    audio_format = "mp3"
+
+    @property
+    def mimetype(self) -> str:
+        return MIME_TYPES[self.audio_format]
+
+    @property
+    @abstractmethod
+    def voice_id(self) -> str:
+        pass
+
+    @abstractmethod
+    def stream(self, text: str):
+        """Generador asíncrono de fragmentos de audio codificado."""
+        pass
+
+    async def synthesize(self, text: str) -> bytes | None:
+        """
+        Sintetiza el texto a voz y devuelve los datos de audio en bytes (None si falla).
+        """
+        try:
+            buffer = bytearray()
+            async for data in self.stream(text):
+                buffer.extend(data)
+            return bytes(buffer) or None
+        except Exception as e:
+            logging.error(f"Error durante la síntesis de voz ({self.name}): {e}")
+            return None
+
+class EdgeTTSBackend(TTSBackend):
+    """Servicio remoto de Edge-TTS. Devuelve MP3 y aplica el volumen en el propio servicio."""
+    name = "edge"
+    audio_format = "mp3"
+
+    def __init__(self, voice: str = config.EDGE_VOICE, volume: str = config.EDGE_VOLUME):
+        self.voice = voice
+        self.volume = volume
+
+    @property
+    def voice_id(self) -> str:
+        return f"edge:{self.voice}:{self.volume}"
+
+    async def stream(self, text: str):
+        # los fragmentos MP3 llegan del servicio y se entregan tal cual, sin disco ni recodificación
+        communicate = Communicate(text, self.voice, volume=self.volume)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio" and chunk["data"]:
+                yield chunk["data"]
+
+class PiperTTSBackend(TTSBackend):
+    """
+    Voz local de Piper (VITS en ONNX) en CPU, sin red. El modelo se carga una vez (al arrancar la API)
+    y se calienta con una frase corta; la síntesis corre en un hilo y el PCM se codifica en 'audio_format'.
+    """
+    name = "piper"
+
+    def __init__(self, model_path: str, audio_format: str = "wav", length_scale: float = 1.0, volume: float = 1.0):
+        # piper sintetiza en local con una voz VITS en ONNX (pip install piper-tts); es opcional y solo se importa si se usa
+        try:
+            from piper import PiperVoice
+        except ImportError:
+            raise ImportError("Piper no está instalado. Instálalo con: pip install piper-tts")
+        if audio_format not in _SOUNDFILE_FORMATS:
+            raise ValueError(f"Formato de audio no soportado por Piper: {audio_format}")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"La voz de Piper no fue encontrada en '{model_path}'.")
+        logging.info(f"Cargando voz de Piper desde '{model_path}'...")
+        self.model_path = model_path
+        self.audio_format = audio_format
+        self.length_scale = length_scale
+        self.volume = volume
+        self.voice = PiperVoice.load(model_path)
+        self.sample_rate = self.voice.config.sample_rate
+        # la primera inferencia de onnxruntime es lenta: se paga aquí y no en el primer turno
+        self._synthesize_pcm("Hola.")
+        logging.info("Voz de Piper cargada")
+
+    @property
+    def voice_id(self) -> str:
+        return f"piper:{os.path.basename(self.model_path)}:{self.length_scale}:{self.volume}"
+
+    def _synthesize_pcm(self, text: str) -> np.ndarray:
+        """Audio mono int16 de todo el texto (trabajo bloqueante)."""
+        if hasattr(self.voice, "synthesize_stream_raw"):
+            # piper-tts < 1.3
+            raw = b"".join(self.voice.synthesize_stream_raw(text, length_scale=self.length_scale))
+            samples = np.frombuffer(raw, dtype="<i2")
+        else:
+            from piper import SynthesisConfig
+            chunks = self.voice.synthesize(text, SynthesisConfig(length_scale=self.length_scale))
+            samples = np.concatenate([chunk.audio_int16_array for chunk in chunks] or [np.zeros(0, dtype=np.int16)])
+        if self.volume != 1.0:
+            # la ganancia se aplica en PCM, antes de codificar
+            samples = np.clip(samples.astype(np.float32) * self.volume, -32768, 32767).astype(np.int16)
+        return samples
+
+    def _encode(self, samples: np.ndarray) -> bytes:
+        file_format, subtype = _SOUNDFILE_FORMATS[self.audio_format]
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, self.sample_rate, format=file_format, subtype=subtype)
+        return buffer.getvalue()
+
+    async def stream(self, text: str):
+        samples = await asyncio.to_thread(self._synthesize_pcm, text)
+        if samples.size:
+            yield await asyncio.to_thread(self._encode, samples)
+
+def create_tts_backend(backend: str = config.TTS_BACKEND) -> TTSBackend:
+    """Función de fábrica del motor de síntesis configurado."""
+    if backend == "edge":
+        return EdgeTTSBackend()
+    if backend == "piper":
+        return PiperTTSBackend(
+            config.PIPER_MODEL_PATH,
+            audio_format=config.TTS_AUDIO_FORMAT,
+            length_scale=config.PIPER_LENGTH_SCALE,
+            volume=config.PIPER_VOLUME,
+        )
+    raise ValueError(f"Motor de síntesis de voz desconocido: {backend}")
+
+# función de ayuda para ejecutar desde scripts síncronos (la API usa el motor cargado al arrancar)
+def run_synthesis(text: str, backend: TTSBackend | None = None) -> bytes:
+    return asyncio.run((backend or create_tts_backend()).synthesize(text))
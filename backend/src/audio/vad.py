@@ -0,0 +1,104 @@
+# backend/src/audio/vad.py | Detección de voz por energía y detección de fin de frase (endpointing)
+
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+@dataclass
+class VADEvent:
+    type: str  # "speech_start" | "speech_end"
+    # posición (en muestras desde el inicio del stream) en la que se detectó el evento
+    sample_index: int
+
+class EnergyEndpointer:
+    """
+    Detector de actividad de voz por energía para audio mono float32 que llega en fragmentos.
+    El umbral se adapta al ruido de fondo. Una frase empieza tras 'start_ms' de voz continua y
+    termina tras 'end_silence_ms' de silencio (o al llegar a 'max_utterance_s'). El audio de la
+    frase incluye 'pre_roll_ms' previos para no cortar el inicio de la primera palabra.
+    Los primeros 'calibration_ms' del stream solo sirven para medir el ruido de fondo.
+    """
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, threshold_db: float = -45.0,
+                 noise_margin_db: float = 10.0, start_ms: int = 90, end_silence_ms: int = 600,
+                 pre_roll_ms: int = 300, max_utterance_s: float = 30.0, calibration_ms: int = 150):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_silence_ms // frame_ms)
+        self.max_frames = int(max_utterance_s * 1000 / frame_ms)
+        self._calibration_left = calibration_ms // frame_ms
+
+        self.in_speech = False
+        self.noise_floor_db = None
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll = deque(maxlen=max(self.start_frames, pre_roll_ms // frame_ms))
+        self._utterance = []
+        self._speech_run = 0
+        self._silence_run = 0
+        self._processed_samples = 0
+
+    def process(self, samples: np.ndarray) -> list:
+        """Procesa un fragmento de audio y devuelve los eventos detectados en él."""
+        samples = np.concatenate([self._pending, samples.astype(np.float32, copy=False)])
+        frame_count = len(samples) // self.frame_length
+        self._pending = samples[frame_count * self.frame_length:]
+        if not frame_count:
+            return []
+
+        frames = samples[:frame_count * self.frame_length].reshape(frame_count, self.frame_length)
+        # energía de todos los frames del fragmento de una vez, en dBFS
+        energies_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+        events = []
+        for frame, energy_db in zip(frames, energies_db):
+            self._processed_samples += self.frame_length
+            event = self._process_frame(frame, float(energy_db))
+            if event:
+                events.append(VADEvent(event, self._processed_samples))
+        return events
+
+    def pop_utterance(self) -> np.ndarray:
+        """Devuelve el audio de la última frase detectada y lo descarta del detector."""
+        utterance = np.concatenate(self._utterance) if self._utterance else np.zeros(0, dtype=np.float32)
+        self._utterance = []
+        return utterance
+
+    def current_utterance(self) -> np.ndarray:
+        """Audio acumulado de la frase en curso (incluye el pre-roll)."""
+        return np.concatenate(self._utterance) if self._utterance else np.zeros(0, dtype=np.float32)
+
+    def _threshold_db(self) -> float:
+        if self.noise_floor_db is None:
+            return self.threshold_db
+        return max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+
+    def _process_frame(self, frame: np.ndarray, energy_db: float) -> str | None:
+        is_speech = energy_db > self._threshold_db()
+
+        if not self.in_speech:
+            if self._calibration_left > 0:
+                self._calibration_left -= 1
+                is_speech = False
+            if not is_speech:
+                # el ruido de fondo solo se aprende fuera de las frases
+                self.noise_floor_db = energy_db if self.noise_floor_db is None else 0.95 * self.noise_floor_db + 0.05 * energy_db
+            self._pre_roll.append(frame)
+            self._speech_run = self._speech_run + 1 if is_speech else 0
+            if self._speech_run >= self.start_frames:
+                self.in_speech = True
+                self._silence_run = 0
+                self._utterance = list(self._pre_roll)
+                self._pre_roll.clear()
+                return "speech_start"
+            return None
+
+        self._utterance.append(frame)
+        self._silence_run = 0 if is_speech else self._silence_run + 1
+        if self._silence_run >= self.end_frames or len(self._utterance) >= self.max_frames:
+            self.in_speech = False
+            self._speech_run = 0
+            return "speech_end"
+        return None
@@ -0,0 +1,85 @@
+# backend/src/chat/context_window.py | Ventana de contexto con presupuesto de tokens y resumen incremental
+
+import asyncio
+import logging
+import math
+
+from src.chat.prompt_builder import SYSTEM_PROMPT_MESSAGE, build_dynamic_context, build_llm_prompt, build_summary_prompt
+
+# estimación conservadora para llama 3 en español (~3.5 caracteres por token) sin cargar un tokenizador
+CHARS_PER_TOKEN = 3.5
+# coste fijo aproximado de cada mensaje en la plantilla de chat (rol y delimitadores)
+TOKENS_PER_MESSAGE = 4
+
+def count_tokens(text: str) -> int:
+    """Estimación del número de tokens de un texto."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+def count_message_tokens(messages: list) -> int:
+    return sum(count_tokens(message["content"]) + TOKENS_PER_MESSAGE for message in messages)
+
+# el prefijo estático no cambia entre turnos: su coste se calcula una sola vez
+SYSTEM_PROMPT_TOKENS = count_message_tokens([SYSTEM_PROMPT_MESSAGE])
+
+class ContextWindowManager:
+    """
+    Construye el prompt de cada turno sin superar un presupuesto de tokens: mantiene
+    literalmente los turnos más recientes que caben y pliega los antiguos en un resumen
+    por sesión, que se actualiza en segundo plano en lugar de recalcularse en cada turno.
+    """
+    def __init__(self, summarize_fn, token_budget: int = 3000, summary_max_words: int = 120):
+        # summarize_fn: corrutina prompt -> str | None
+        self.summarize_fn = summarize_fn
+        self.token_budget = token_budget
+        self.summary_max_words = summary_max_words
+        self._stats = {"summary_updates": 0, "summary_failures": 0, "folded_messages": 0}
+
+    def build_prompt(self, context, user_text: str, emotion_data: dict) -> list:
+        """Devuelve los mensajes para el LLM usando el contexto de la sesión (SessionContext)."""
+        user_message = {"role": "user", "content": user_text}
+        summary = context.summary or None
+
+        # coste fijo: prefijo estático, contexto dinámico (memoria, emociones y resumen) y mensaje actual
+        dynamic_message = {"role": "system", "content": build_dynamic_context(emotion_data, context.long_term_memory, summary)}
+        available = self.token_budget - SYSTEM_PROMPT_TOKENS - count_message_tokens([dynamic_message, user_message])
+
+        history = context.history()
+        kept = 0
+        for message in reversed(history):
+            cost = count_message_tokens([message])
+            if cost > available:
+                break
+            available -= cost
+            kept += 1
+
+        overflow = len(history) - kept
+        if overflow:
+            context.fold_oldest(overflow)
+            self._stats["folded_messages"] += overflow
+        if context.pending_summary:
+            self._schedule_summary(context)
+
+        recent = history[overflow:]
+        return build_llm_prompt(recent + [user_message], user_text, emotion_data, context.long_term_memory, summary)
+
+    def metrics(self) -> dict:
+        return {"token_budget": self.token_budget, **self._stats}
+
+    def _schedule_summary(self, context):
+        if context.summary_task is None or context.summary_task.done():
+            context.summary_task = asyncio.create_task(self._update_summary(context))
+
+    async def _update_summary(self, context):
+        # los mensajes que lleguen mientras se resume se incorporan en la siguiente vuelta
+        while context.pending_summary:
+            batch = list(context.pending_summary)
+            prompt = build_summary_prompt(context.summary, batch, max_words=self.summary_max_words)
+            new_summary = await self.summarize_fn(prompt)
+            if not new_summary:
+                # se reintenta en el siguiente turno; los mensajes siguen pendientes
+                self._stats["summary_failures"] += 1
+                logging.warning(f"No se pudo actualizar el resumen de la sesión {context.session_id}.")
+                return
+            context.summary = new_summary
+            del context.pending_summary[:len(batch)]
+            self._stats["summary_updates"] += 1
@@ -1,14 +1,23 @@
 # backend/src/chat/llm_client.py
 
-from groq import Groq
+from groq import Groq, AsyncGroq
 import config
 import json
 
+LLM_MODEL = "llama-3.1-8b-instant"
+LLM_ERROR_MESSAGE = "Lo siento, tuve un problema al generar una respuesta."
+
+class LLMStreamInterrupted(RuntimeError):
+    """El stream del LLM falló después de emitir parte de la respuesta."""
+
 try:
     groq_client = Groq(api_key=config.GROQ_API_KEY)
+    # cliente asíncrono compartido: mantiene el pool de conexiones httpx entre peticiones
+    async_groq_client = AsyncGroq(api_key=config.GROQ_API_KEY)
 except Exception as e:
     print(f"Error al inicializar el cliente de Groq: {e}")
     groq_client = None
+    async_groq_client = None
 
 def get_groq_response(messages: list):
     """Envía una lista de mensajes al LLM de Groq y devuelve la respuesta."""
@@ -17,12 +26,55 @@ def get_groq_response(messages: list):
     try:
         response = groq_client.chat.completions.create(
             messages=messages,
-            model="llama-3.1-8b-instant"
+            model=LLM_MODEL
         )
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error al comunicarse con la API de Groq: {e}")
-        return "Lo siento, tuve un problema al generar una respuesta."
+        return LLM_ERROR_MESSAGE
+
+async def get_groq_response_async(messages: list):
+    """Versión asíncrona de get_groq_response para los endpoints de la API."""
+    if not async_groq_client:
+        return "Error: Cliente de Groq no inicializado."
+    try:
+        response = await async_groq_client.chat.completions.create(
+            messages=messages,
+            model=LLM_MODEL
+        )
+        return response.choices[0].message.content
+    except Exception as e:
+        print(f"Error al comunicarse con la API de Groq: {e}")
+        return LLM_ERROR_MESSAGE
+
+async def stream_groq_response(messages: list):
+    """
+    Generador asíncrono que devuelve los tokens de la respuesta a medida que llegan.
+    Si la llamada falla antes del primer token emite el mensaje de error como único token; si falla
+    a mitad de la respuesta lanza LLMStreamInterrupted (el mensaje de error no se pega a lo ya enviado).
+    """
+    if not async_groq_client:
+        yield "Error: Cliente de Groq no inicializado."
+        return
+    sent_tokens = False
+    try:
+        stream = await async_groq_client.chat.completions.create(
+            messages=messages,
+            model=LLM_MODEL,
+            stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                sent_tokens = True
+                yield token
+    except Exception as e:
+        print(f"Error al comunicarse con la API de Groq (streaming): {e}")
+        if sent_tokens:
+            raise LLMStreamInterrupted(str(e)) from e
+        yield LLM_ERROR_MESSAGE
 
 def extract_memory_from_text(prompt: str) -> dict:
     """Envía un prompt de extracción y espera una respuesta JSON."""
@@ -31,12 +83,57 @@ def extract_memory_from_text(prompt: str) -> dict:
     try:
         response = groq_client.chat.completions.create(
             messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
+            model=LLM_MODEL,
+            temperature=0.0,
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content
+        return json.loads(content)
+    except (json.JSONDecodeError, IndexError, TypeError, Exception) as e:
+        print(f"Error al extraer o parsear memoria JSON: {e}")
+        return {}
+
+async def extract_memory_from_text_async(prompt: str, raise_errors: bool = False) -> dict:
+    """
+    Versión asíncrona de extract_memory_from_text. Con raise_errors=True propaga los
+    errores para que el llamador (la cola de memoria) pueda reintentar.
+    """
+    if not async_groq_client:
+        if raise_errors:
+            raise RuntimeError("Cliente de Groq no inicializado.")
+        return {}
+    try:
+        response = await async_groq_client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=LLM_MODEL,
             temperature=0.0,
             response_format={"type": "json_object"}
         )
         content = response.choices[0].message.content
         return json.loads(content)
     except (json.JSONDecodeError, IndexError, TypeError, Exception) as e:
+        if raise_errors:
+            raise
         print(f"Error al extraer o parsear memoria JSON: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+async def summarize_conversation_async(prompt: str) -> str | None:
+    """Genera el resumen incremental de la conversación. Devuelve None si la llamada falla."""
+    if not async_groq_client:
+        return None
+    try:
+        response = await async_groq_client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=LLM_MODEL,
+            temperature=0.2,
+            max_tokens=300
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Error al resumir la conversación: {e}")
+        return None
+
+async def close_llm_client():
+    """Cierra el cliente asíncrono (se llama al apagar la API)."""
+    if async_groq_client:
+        await async_groq_client.close()
@@ -0,0 +1,147 @@
+# backend/src/chat/memory_worker.py | Extracción de memoria a largo plazo en segundo plano
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from src.chat.prompt_builder import build_memory_extraction_prompt
+
+@dataclass
+class MemoryJob:
+    session_id: int
+    user_text: str
+    ai_text: str
+    fingerprint: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+class MemoryExtractionQueue:
+    """
+    Cola asíncrona con un worker que extrae hechos de memoria de cada turno sin bloquear
+    la respuesta. Reintenta con backoff exponencial, descarta turnos duplicados por sesión
+    y guarda los hechos nuevos para entregarlos al cliente por sondeo.
+    """
+    def __init__(self, extract_fn, save_fn, on_facts=None, max_retries: int = 3, retry_backoff_s: float = 1.0,
+                 maxsize: int = 1000):
+        # extract_fn: corrutina prompt -> dict que lanza una excepción si la llamada falla
+        # save_fn: función bloqueante que persiste un dict de hechos nuevos
+        # on_facts: función (session_id, hechos) que se llama en el event loop tras guardarlos
+        self.extract_fn = extract_fn
+        self.save_fn = save_fn
+        self.on_facts = on_facts
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self.maxsize = maxsize
+
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._pending = {}  # fingerprint -> job, para deduplicar y medir el retraso
+        self._new_facts = defaultdict(dict)  # session_id -> hechos aún no entregados
+        self._known_facts = {}  # último valor guardado por clave, evita reescrituras idénticas
+        self._stats = {"enqueued": 0, "processed": 0, "failed": 0, "retried": 0, "deduplicated": 0, "dropped": 0}
+        self._last_job_lag_s = 0.0
+
+    # --- CICLO DE VIDA ---
+
+    def start(self):
+        """Arranca el worker en el event loop actual."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._worker = asyncio.create_task(self._run(), name="memory-extraction-worker")
+
+    async def stop(self, timeout: float = 5.0):
+        """Intenta vaciar la cola antes de detener el worker."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Se descartan {self._queue.qsize()} trabajos de memoria pendientes al apagar.")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    # --- API PÚBLICA ---
+
+    def submit(self, session_id: int, user_text: str, ai_text: str) -> bool:
+        """Encola la extracción de un turno. Devuelve False si es un duplicado o la cola está llena."""
+        if self._worker is None or self._worker.done():
+            self.start()
+        fingerprint = hashlib.sha1(f"{session_id}\x00{user_text}\x00{ai_text}".encode()).hexdigest()
+        if fingerprint in self._pending:
+            self._stats["deduplicated"] += 1
+            return False
+        job = MemoryJob(session_id, user_text, ai_text, fingerprint)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+            logging.warning(f"Cola de memoria llena, se descarta el turno de la sesión {session_id}.")
+            return False
+        self._pending[fingerprint] = job
+        self._stats["enqueued"] += 1
+        return True
+
+    def pop_new_facts(self, session_id: int) -> dict:
+        """Devuelve (y marca como entregados) los hechos extraídos desde la última entrega."""
+        return self._new_facts.pop(session_id, {})
+
+    def pending_jobs(self, session_id: int) -> int:
+        return sum(1 for job in self._pending.values() if job.session_id == session_id)
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        oldest = min((job.enqueued_at for job in self._pending.values()), default=None)
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._pending),
+            "oldest_pending_age_s": (now - oldest) if oldest is not None else 0.0,
+            "last_job_lag_s": self._last_job_lag_s,
+            **self._stats,
+        }
+
+    # --- WORKER ---
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                self._stats["failed"] += 1
+                logging.error(f"Error inesperado en el worker de memoria: {e}")
+            finally:
+                self._pending.pop(job.fingerprint, None)
+                self._queue.task_done()
+
+    async def _process(self, job: MemoryJob):
+        prompt = build_memory_extraction_prompt(job.user_text, job.ai_text)
+        while True:
+            job.attempts += 1
+            try:
+                facts = await self.extract_fn(prompt)
+                break
+            except Exception as e:
+                if job.attempts > self.max_retries:
+                    self._stats["failed"] += 1
+                    logging.error(f"Extracción de memoria fallida tras {job.attempts} intentos (sesión {job.session_id}): {e}")
+                    return
+                self._stats["retried"] += 1
+                await asyncio.sleep(self.retry_backoff_s * 2 ** (job.attempts - 1))
+
+        new_facts = {key: value for key, value in (facts or {}).items() if self._known_facts.get(key) != value}
+        if new_facts:
+            await asyncio.to_thread(self.save_fn, new_facts)
+            self._known_facts.update(new_facts)
+            self._new_facts[job.session_id].update(new_facts)
+            if self.on_facts:
+                self.on_facts(job.session_id, new_facts)
+
+        self._stats["processed"] += 1
+        self._last_job_lag_s = time.monotonic() - job.enqueued_at
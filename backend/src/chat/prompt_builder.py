@@ -1,32 +1,12 @@
 # backend/src/chat/prompt_builder.py
 
-def build_llm_prompt(chat_history: list, latest_user_text: str, emotion_data: dict, long_term_memory: dict) -> list:
-    """
-    Construye la lista de mensajes para el LLM, optimizada para un razonamiento empático y estructurado.
-    """
-    
-    # --- construcción del contexto dinámico ---
-    context_sections = []
-    if long_term_memory:
-        memory_str = "\n".join([f"- {key.replace('_', ' ').capitalize()}: {value}" for key, value in long_term_memory.items()])
-        context_sections.append(f"<Datos_Recordados_Usuario>\n{memory_str}\n</Datos_Recordados_Usuario>")
+from src.chat.prompt_templates import register_template
 
-    facial_emotion = emotion_data.get('facial_dominant', 'No detectada')
-    vocal_emotion_data = emotion_data.get('vocal_emotions', [])
-    vocal_emotion = vocal_emotion_data[0]['label'].lower() if vocal_emotion_data else 'No detectado'
-    
-    emotional_context_str = (
-        f"<Contexto_Emocional_Detectado>\n"
-        f"- Expresión facial predominante: {facial_emotion}\n"
-        f"- Tono de voz principal: {vocal_emotion}\n"
-        f"</Contexto_Emocional_Detectado>"
-    )
-    context_sections.append(emotional_context_str)
-    
-    dynamic_context_block = "\n\n".join(context_sections)
-
-    # --- system prompt estructurado y mejorado ---
-    system_prompt = f"""
+# --- PREFIJO ESTÁTICO DEL SYSTEM PROMPT ---
+# se compila una vez al importar y es idéntico byte a byte en cada turno, así el proveedor
+# (o una caché local) puede reutilizar el procesamiento del prefijo. Cualquier cambio en el
+# texto requiere una versión nueva.
+SYSTEM_PROMPT_TEMPLATE = register_template("lumen_system", 1, """
 <Directiva_Principal>
 Tu única misión es ser un oyente empático. NUNCA analices, resumas, debatas o expliques el tema del que habla el usuario. Ignora el contenido y enfócate 100% en el sentimiento subyacente. Tu respuesta DEBE ser breve y humana.
 </Directiva_Principal>
@@ -41,8 +21,6 @@ Eres Lumen, un asistente de IA compasivo y sabio. Tu propósito es ser un espaci
 3.  **Seguridad Primero:** Ante riesgo de autolesión, recomienda ayuda profesional inmediata.
 </Principios_Clave>
 
-{dynamic_context_block}
-
 <Reglas_De_Respuesta>
 -   **BREVEDAD MÁXIMA (1-3 frases):** Tu respuesta debe ser muy corta y empática. Una frase para validar, seguida de una pregunta abierta.
 -   **NUNCA RESUMAS:** No repitas lo que el usuario dijo. Ve directo al punto.
@@ -66,11 +44,56 @@ Antes de responder, realiza una reflexión interna (que no mostrarás). Luego, p
 2.  **[Respuesta para el Usuario - SOLO ESTO DEBE SER TU SALIDA]:**
     - Basándote en tu reflexión, escribe tu respuesta final. Recuerda, debe ser breve y seguir TODAS las reglas y principios. TU SALIDA FINAL DEBE SER ÚNICAMENTE EL TEXTO DIRIGIDO AL USUARIO, SIN NINGÚN TIPO DE EXPLICACIÓN O ANÁLISIS ADICIONAL.
 </Instrucciones_Respuesta>
-"""
+
+<Contexto_Dinamico>
+Justo antes del último mensaje del usuario recibirás un mensaje de sistema con el contexto del turno: las emociones detectadas, los datos recordados del usuario y, si existe, un resumen de la conversación previa. Úsalo para contextualizar tu respuesta, pero nunca lo menciones de forma explícita.
+</Contexto_Dinamico>
+""")
+SYSTEM_PROMPT_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT_TEMPLATE.text}
+
+def build_dynamic_context(emotion_data: dict, long_term_memory: dict, conversation_summary: str | None = None) -> str:
+    """
+    Construye el sufijo dinámico del prompt (resumen, memoria y contexto emocional).
+    """
+    context_sections = []
+    if conversation_summary:
+        context_sections.append(f"<Resumen_Conversacion_Previa>\n{conversation_summary}\n</Resumen_Conversacion_Previa>")
+    if long_term_memory:
+        memory_str = "\n".join([f"- {key.replace('_', ' ').capitalize()}: {value}" for key, value in long_term_memory.items()])
+        context_sections.append(f"<Datos_Recordados_Usuario>\n{memory_str}\n</Datos_Recordados_Usuario>")
+
+    facial_emotion = emotion_data.get('facial_dominant', 'No detectada')
+    vocal_emotion_data = emotion_data.get('vocal_emotions', [])
+    vocal_emotion = vocal_emotion_data[0]['label'].lower() if vocal_emotion_data else 'No detectado'
+    
+    emotional_context_str = (
+        f"<Contexto_Emocional_Detectado>\n"
+        f"- Expresión facial predominante: {facial_emotion}\n"
+        f"- Tono de voz principal: {vocal_emotion}\n"
+        f"</Contexto_Emocional_Detectado>"
+    )
+    context_sections.append(emotional_context_str)
+    
+    return "\n\n".join(context_sections)
+
+def build_llm_prompt(chat_history: list, latest_user_text: str, emotion_data: dict, long_term_memory: dict,
+                     conversation_summary: str | None = None) -> list:
+    """
+    Construye la lista de mensajes para el LLM, optimizada para un razonamiento empático y estructurado.
+    El orden (prefijo estático, historial, contexto dinámico, último mensaje) mantiene estable el
+    mayor prefijo posible entre turnos. 'conversation_summary' resume los turnos antiguos.
+    """
+    dynamic_message = {"role": "system", "content": build_dynamic_context(emotion_data, long_term_memory, conversation_summary)}
 
     # --- ensamblaje final de mensajes ---
-    messages = [{"role": "system", "content": system_prompt.strip()}]
-    messages.extend(chat_history)
+    messages = [SYSTEM_PROMPT_MESSAGE.copy()]
+    if chat_history and chat_history[-1]["role"] == "user":
+        messages.extend(chat_history[:-1])
+        messages.append(dynamic_message)
+        messages.append(chat_history[-1])
+    else:
+        messages.extend(chat_history)
+        messages.append(dynamic_message)
     
     return messages
 
@@ -93,4 +116,29 @@ def build_memory_extraction_prompt(user_text: str, ai_response: str) -> str:
         "--- FIN DE LA CONVERSACIÓN ---\n\n"
         "JSON_EXTRAIDO:"
     )
-    return prompt
\ No newline at end of file
+    return prompt
+
+def build_summary_prompt(previous_summary: str, messages: list, max_words: int = 120) -> str:
+    """
+    Construye el prompt para actualizar de forma incremental el resumen de la conversación
+    con los turnos que salen de la ventana de contexto.
+    """
+    transcript = "\n".join(
+        f"{'Usuario' if message['role'] == 'user' else 'Lumen'}: \"{message['content']}\"" for message in messages
+    )
+    prompt = (
+        "Actúa como el registro de memoria de corto plazo de la IA Lumen. Actualiza el resumen de la conversación "
+        "incorporando los nuevos turnos. Conserva los sentimientos expresados por el usuario, los temas que le "
+        "preocupan y cualquier pregunta pendiente. Escribe en tercera persona y en español.\n\n"
+        "Reglas importantes:\n"
+        f"- Máximo {max_words} palabras.\n"
+        "- No inventes información ni añadas consejos.\n"
+        "- Devuelve únicamente el resumen actualizado, sin texto introductorio.\n\n"
+        "--- RESUMEN ACTUAL ---\n"
+        f"{previous_summary or '(vacío)'}\n"
+        "--- NUEVOS TURNOS ---\n"
+        f"{transcript}\n"
+        "--- FIN ---\n\n"
+        "RESUMEN_ACTUALIZADO:"
+    )
+    return prompt
@@ -0,0 +1,55 @@
+# backend/src/chat/prompt_templates.py | Registro versionado de plantillas estáticas de prompt
+
+import hashlib
+from dataclasses import dataclass, field
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    Texto estático de un prompt, compilado una sola vez. Su contenido no cambia entre turnos,
+    por lo que puede reutilizarse byte a byte como prefijo cacheable.
+    """
+    name: str
+    version: int
+    text: str
+    sha256: str = field(init=False)
+
+    def __post_init__(self):
+        # se normaliza una sola vez para que el prefijo sea idéntico en cada llamada
+        object.__setattr__(self, "text", self.text.strip())
+        object.__setattr__(self, "sha256", hashlib.sha256(self.text.encode("utf-8")).hexdigest())
+
+    @property
+    def cache_key(self) -> str:
+        """Identificador corto y estable (nombre, versión y hash) para logs y cachés."""
+        return f"{self.name}@v{self.version}:{self.sha256[:12]}"
+
+_REGISTRY: dict[str, dict[int, PromptTemplate]] = {}
+
+def register_template(name: str, version: int, text: str) -> PromptTemplate:
+    """Registra una versión de una plantilla. Una versión ya publicada no puede cambiar de contenido."""
+    template = PromptTemplate(name, version, text)
+    versions = _REGISTRY.setdefault(name, {})
+    existing = versions.get(version)
+    if existing is not None and existing.sha256 != template.sha256:
+        raise ValueError(f"La plantilla '{name}' v{version} ya existe con otro contenido; incrementa la versión.")
+    versions[version] = template
+    return template
+
+def get_template(name: str, version: int | None = None) -> PromptTemplate:
+    """Devuelve la versión indicada de una plantilla, o la más reciente si no se indica."""
+    versions = _REGISTRY.get(name)
+    if not versions:
+        raise KeyError(f"Plantilla de prompt desconocida: '{name}'")
+    if version is None:
+        version = max(versions)
+    if version not in versions:
+        raise KeyError(f"La plantilla '{name}' no tiene la versión {version}")
+    return versions[version]
+
+def list_templates() -> list:
+    """Resumen de las plantillas registradas (nombre, versión y hash)."""
+    return [
+        {"name": t.name, "version": t.version, "sha256": t.sha256}
+        for versions in _REGISTRY.values() for t in versions.values()
+    ]
@@ -0,0 +1,51 @@
+# backend/src/chat/sentence_splitter.py | Segmenta el texto del LLM en frases a medida que llega
+
+import re
+
+# abreviaturas frecuentes en español que terminan en punto pero no cierran una frase
+ABBREVIATIONS = {"sr", "sra", "srta", "dr", "dra", "ud", "uds", "etc", "p.ej", "ej", "aprox", "núm", "pág"}
+
+# fin de frase: signo de cierre (posiblemente repetido) seguido de espacio o comillas
+_SENTENCE_END = re.compile(r'([.!?…]+["»”)]*)(\s+)')
+
+class SentenceSplitter:
+    """
+    Acumula tokens del LLM y devuelve las frases completas en cuanto se cierran,
+    para poder sintetizarlas sin esperar al final de la respuesta.
+    """
+    def __init__(self, min_chars: int = 12):
+        # evita mandar a TTS fragmentos diminutos como "Sí." por separado
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> list:
+        """Añade un token y devuelve la lista de frases que quedaron completas."""
+        self._buffer += token
+        sentences = []
+        search_from = 0
+        while True:
+            match = _SENTENCE_END.search(self._buffer, search_from)
+            if not match:
+                break
+            end = match.end(1)
+            candidate = self._buffer[:end].strip()
+            if len(candidate) < self.min_chars or self._ends_with_abbreviation(candidate):
+                search_from = match.end()
+                continue
+            sentences.append(candidate)
+            self._buffer = self._buffer[match.end():]
+            search_from = 0
+        return sentences
+
+    def flush(self) -> str | None:
+        """Devuelve el texto pendiente al terminar el stream."""
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return remainder or None
+
+    @staticmethod
+    def _ends_with_abbreviation(text: str) -> bool:
+        if not text.endswith("."):
+            return False
+        last_word = text[:-1].rsplit(maxsplit=1)[-1].lower() if text[:-1].strip() else ""
+        return last_word in ABBREVIATIONS
@@ -0,0 +1,118 @@
+# backend/src/chat/session_store.py | Contexto de conversación por sesión, mantenido en el servidor
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+@dataclass
+class SessionContext:
+    session_id: int
+    chat_history: deque
+    long_term_memory: dict = field(default_factory=dict)
+    last_access: float = field(default_factory=time.monotonic)
+    # resumen incremental de los turnos que ya salieron de la ventana de contexto
+    summary: str = ""
+    # mensajes fuera de la ventana que aún no se han incorporado al resumen
+    pending_summary: list = field(default_factory=list)
+    # total de mensajes de la sesión que ya no están en chat_history (resumidos o pendientes)
+    summarized_count: int = 0
+    summary_task: asyncio.Task | None = None
+
+    def history(self) -> list:
+        return list(self.chat_history)
+
+    def fold_oldest(self, count: int):
+        """Saca los 'count' mensajes más antiguos del historial y los deja pendientes de resumir."""
+        for _ in range(min(count, len(self.chat_history))):
+            self.pending_summary.append(self.chat_history.popleft())
+            self.summarized_count += 1
+
+class SessionStore:
+    """
+    Caché LRU acotada de contextos de sesión (historial reciente y memoria) indexada por
+    session_id, para que el cliente no tenga que reenviar toda la conversación en cada turno.
+    Si una sesión no está en caché (reinicio, expiración o desalojo) se reconstruye con 'loader'.
+    Está pensada para usarse desde el event loop de la API.
+    """
+    def __init__(self, loader=None, max_sessions: int = 1000, max_messages: int = 40, ttl_s: float = 3600.0):
+        # loader: función bloqueante session_id -> (chat_history, long_term_memory)
+        self.loader = loader
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_s = ttl_s
+        self._sessions = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    async def get(self, session_id: int) -> SessionContext:
+        """Devuelve el contexto de la sesión, cargándolo desde la base de datos si hace falta."""
+        context = self._lookup(session_id)
+        if context is not None:
+            self._stats["hits"] += 1
+            return context
+
+        self._stats["misses"] += 1
+        chat_history, long_term_memory = [], {}
+        if self.loader:
+            chat_history, long_term_memory = await asyncio.to_thread(self.loader, session_id)
+        # otra petición pudo cargarla mientras esperábamos
+        return self._lookup(session_id) or self.put(session_id, chat_history, long_term_memory)
+
+    def put(self, session_id: int, chat_history: list, long_term_memory: dict | None = None) -> SessionContext:
+        """
+        Reemplaza el contexto de la sesión (p. ej. con el historial completo que envía un cliente antiguo).
+        Si la sesión ya existía y el historial recibido la continúa, se conserva su resumen y se
+        descartan los mensajes que ya estaban resumidos. La memoria recibida se añade a la guardada.
+        """
+        previous = self._sessions.get(session_id)
+        # los hechos extraídos en el servidor no se pierden si el cliente no envía su memoria
+        memory = {**(previous.long_term_memory if previous is not None else {}), **(long_term_memory or {})}
+        if previous is not None and len(chat_history) >= previous.summarized_count:
+            # se actualiza en el sitio para que una tarea de resumen en curso siga viendo este contexto
+            context = previous
+            context.chat_history = deque(chat_history[previous.summarized_count:])
+            context.long_term_memory = memory
+        else:
+            context = SessionContext(
+                session_id=session_id,
+                chat_history=deque(chat_history),
+                long_term_memory=memory,
+            )
+        context.fold_oldest(len(context.chat_history) - self.max_messages)
+        self._sessions[session_id] = context
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._stats["evictions"] += 1
+        return context
+
+    def append(self, session_id: int, messages: list):
+        """Añade los mensajes nuevos del turno; los que superan el límite quedan pendientes de resumir."""
+        context = self._sessions.get(session_id)
+        if context is None:
+            # desalojada durante el turno: un contexto con solo este turno ocultaría el historial y la
+            # memoria de la base de datos; el siguiente 'get' la recarga con el turno ya guardado
+            return
+        context.chat_history.extend(messages)
+        context.fold_oldest(len(context.chat_history) - self.max_messages)
+        context.last_access = time.monotonic()
+
+    def update_memory(self, session_id: int, facts: dict):
+        context = self._sessions.get(session_id)
+        if context is not None and facts:
+            context.long_term_memory.update(facts)
+
+    def metrics(self) -> dict:
+        return {"sessions": len(self._sessions), **self._stats}
+
+    def _lookup(self, session_id: int) -> SessionContext | None:
+        context = self._sessions.get(session_id)
+        if context is None:
+            return None
+        if time.monotonic() - context.last_access > self.ttl_s:
+            del self._sessions[session_id]
+            self._stats["expirations"] += 1
+            return None
+        context.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return context
@@ -4,6 +4,11 @@ import sqlite3
 from sqlite3 import Error
 import os
 import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
 from cryptography.fernet import Fernet
 import config
@@ -34,22 +39,97 @@ cipher = CipherManager(config.ENCRYPTION_KEY)
 # ubicación del archivo de la base de datos
 DB_FILE = os.path.join("data", "lumenai.db")
 
+# pragmas aplicados a cada conexión: WAL permite lecturas concurrentes con un escritor y
+# synchronous=NORMAL es seguro en WAL (solo se arriesga la última transacción ante un corte de luz)
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",   # ~8 MB de caché de páginas
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+# tamaño de la caché de sentencias preparadas de sqlite3 por conexión
+STATEMENT_CACHE_SIZE = 128
+
+_db_dir_ready = False
+_thread_local = threading.local()
+_open_connections = set()
+_connections_lock = threading.Lock()
+
 # --- CONEXIÓN Y CONFIGURACIÓN DE LA BASE DE DATOS ---
 
+def _ensure_db_dir():
+    global _db_dir_ready
+    if not _db_dir_ready:
+        os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+        _db_dir_ready = True
+
+def _apply_pragmas(conn):
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
 def create_connection():
-    """Crea una conexión a la base de datos SQLite"""
-    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+    """Crea una conexión nueva e independiente a la base de datos SQLite (el llamador la cierra)"""
+    _ensure_db_dir()
     conn = None
     try:
-        # check_same_thread=False es necesario para streamlit
-        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        # check_same_thread=False: la conexión puede cerrarse desde otro hilo al apagar la API
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        _apply_pragmas(conn)
     except Error as e:
         print(f"Error al conectar con la base de datos: {e}")
     return conn
 
+def get_connection():
+    """
+    Devuelve la conexión persistente del hilo actual, creándola la primera vez.
+    Las funciones de este módulo la usan cuando no se les pasa una conexión explícita.
+    """
+    conn = getattr(_thread_local, "conn", None)
+    if conn is None:
+        conn = create_connection()
+        if conn is None:
+            return None
+        _thread_local.conn = conn
+        with _connections_lock:
+            _open_connections.add(conn)
+    return conn
+
+def close_all_connections():
+    """Cierra las conexiones persistentes de todos los hilos (se llama al apagar la API)"""
+    with _connections_lock:
+        for conn in _open_connections:
+            try:
+                conn.close()
+            except Error:
+                pass
+        _open_connections.clear()
+    _thread_local.__dict__.clear()
+
+# migraciones del esquema, aplicadas en orden según PRAGMA user_version
+# cada entrada es la lista de sentencias que llevan la base de datos a la versión i+1
+SCHEMA_MIGRATIONS = [
+    # v1: índices para leer el historial por sesión (paginación por interaction_id) y por fecha
+    [
+        "CREATE INDEX IF NOT EXISTS idx_interactions_session_id ON interactions(session_id, interaction_id)",
+        "CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions(timestamp)",
+    ],
+]
+
+def _apply_migrations(conn):
+    """Aplica las migraciones pendientes; cada una en su propia transacción"""
+    current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, statements in enumerate(SCHEMA_MIGRATIONS[current_version:], start=current_version + 1):
+        with conn:
+            for statement in statements:
+                conn.execute(statement)
+            # PRAGMA no admite parámetros; version es un entero interno
+            conn.execute(f"PRAGMA user_version = {version}")
+        logging.info(f"Base de datos migrada a la versión {version} del esquema.")
+
 def setup_database(connection=None):
     """
-    Crea todas las tablas necesarias si no existen
+    Crea todas las tablas necesarias si no existen y aplica las migraciones pendientes
     Utiliza una conexión existente si se proporciona, si no, crea una nueva
     """
     conn = connection if connection else create_connection()
@@ -93,6 +173,7 @@ def setup_database(connection=None):
         cursor.execute(sql_create_interactions_table)
         cursor.execute(sql_create_memory_table)
         conn.commit()
+        _apply_migrations(conn)
     except Error as e:
         print(f"Error al crear las tablas: {e}")
     finally:
@@ -102,42 +183,58 @@ def setup_database(connection=None):
 
 # --- OPERACIONES CON LA BASE DE DATOS ---
 
-def start_new_session(model_used="llama-3.1-8b-instant", settings=None):
-    conn = create_connection()
+# sentencias constantes: sqlite3 las reutiliza desde su caché de sentencias preparadas
+SQL_INSERT_SESSION = '''INSERT INTO sessions(start_time, model_used, settings_json) VALUES(?,?,?)'''
+SQL_INSERT_INTERACTION = '''INSERT INTO interactions(session_id, timestamp, role, text_content, 
+                                      facial_emotion_dominant, facial_emotion_scores_json, vocal_analysis_json)
+             VALUES(?,?,?,?,?,?,?)'''
+SQL_UPSERT_MEMORY = '''INSERT OR REPLACE INTO user_memory(key, value, last_updated) VALUES(?,?,?)'''
+
+def start_new_session(model_used="llama-3.1-8b-instant", settings=None, connection=None):
+    conn = connection if connection else get_connection()
     if conn is None: return None
-    sql = '''INSERT INTO sessions(start_time, model_used, settings_json) VALUES(?,?,?)'''
     session_id = None
     try:
         cursor = conn.cursor()
         start_time = datetime.now().isoformat()
         settings_str = json.dumps(settings) if settings else None
-        cursor.execute(sql, (start_time, model_used, settings_str))
+        cursor.execute(SQL_INSERT_SESSION, (start_time, model_used, settings_str))
         conn.commit()
         session_id = cursor.lastrowid
     except Error as e:
         print(f"Error al iniciar una nueva sesión: {e}")
-    finally:
-        if conn:
-            conn.close()
     return session_id
 
+def _interaction_row(session_id, role, data):
+    """Construye la tupla de parámetros de una fila de 'interactions'"""
+    timestamp = data.get("timestamp", datetime.now().isoformat())
+    scores_json = json.dumps(data.get("facial_scores")) if data.get("facial_scores") else None
+    vocal_json = json.dumps(data.get("vocal_analysis")) if data.get("vocal_analysis") else None
+    return (
+        session_id, timestamp, role, data.get("text"),
+        data.get("facial_dominant"), scores_json, vocal_json
+    )
+
+def _encrypt_interaction(data):
+    """Devuelve una copia de la interacción con el texto cifrado"""
+    text = data.get("text")
+    return {
+        "text": cipher.encrypt(text) if text else text,
+        "timestamp": data.get("timestamp", datetime.now().isoformat()),
+        "facial_dominant": data.get("facial_dominant"),
+        "facial_scores": data.get("facial_scores"),
+        "vocal_analysis": data.get("vocal_analysis")
+    }
+
+def _memory_rows(facts: dict):
+    now = datetime.now().isoformat()
+    return [(key, cipher.encrypt(str(value)), now) for key, value in facts.items()]
 
 def _save_interaction_internal(conn, session_id, role, data):
     """Función interna que guarda una interacción usando una conexión existente"""
-    sql = '''INSERT INTO interactions(session_id, timestamp, role, text_content, 
-                                      facial_emotion_dominant, facial_emotion_scores_json, vocal_analysis_json)
-             VALUES(?,?,?,?,?,?,?)'''
     try:
         cursor = conn.cursor()
-        timestamp = data.get("timestamp", datetime.now().isoformat())
-        scores_json = json.dumps(data.get("facial_scores")) if data.get("facial_scores") else None
-        vocal_json = json.dumps(data.get("vocal_analysis")) if data.get("vocal_analysis") else None
-        
-        data_tuple = (
-            session_id, timestamp, role, data.get("text"),
-            data.get("facial_dominant"), scores_json, vocal_json
-        )
-        cursor.execute(sql, data_tuple)
+        cursor.execute(SQL_INSERT_INTERACTION, _interaction_row(session_id, role, data))
         conn.commit()
         return cursor.lastrowid
     except Error as e:
@@ -146,46 +243,27 @@ def _save_interaction_internal(conn, session_id, role, data):
 
 def save_interaction_encrypted(session_id, role, data, connection=None):
     """Cifra los datos de texto sensibles y los guarda en la base de datos"""
-    conn = connection if connection else create_connection()
+    conn = connection if connection else get_connection()
     if conn is None: return None
-    
-    interaction_id = None
-    try:
-        encrypted_data = data.copy()
-        if 'text' in encrypted_data and encrypted_data['text']:
-            encrypted_data['text'] = cipher.encrypt(encrypted_data['text'])
-        
-        db_payload = {
-            "text": encrypted_data.get("text"),
-            "facial_dominant": data.get("facial_dominant"),
-            "facial_scores": data.get("facial_scores"),
-            "vocal_analysis": data.get("vocal_analysis")
-        }
-        interaction_id = _save_interaction_internal(conn, session_id, role, db_payload)
-    finally:
-        # cerrar la conexión solo si se creó dentro de esta función
-        if not connection and conn:
-            conn.close()
-    return interaction_id
+    return _save_interaction_internal(conn, session_id, role, _encrypt_interaction(data))
+
+def save_memory_fact(key: str, value, connection=None):
+    save_memory_facts({key: value}, connection=connection)
 
-def save_memory_fact(key: str, value):
-    conn = create_connection()
+def save_memory_facts(facts: dict, connection=None):
+    """Guarda varios hechos de memoria en una sola transacción"""
+    if not facts:
+        return
+    conn = connection if connection else get_connection()
     if conn is None: return
-    value_str = str(value)
-    sql = '''INSERT OR REPLACE INTO user_memory(key, value, last_updated) VALUES(?,?,?)'''
     try:
-        encrypted_value = cipher.encrypt(value_str)
-        cursor = conn.cursor()
-        cursor.execute(sql, (key, encrypted_value, datetime.now().isoformat()))
-        conn.commit()
+        with conn:
+            conn.executemany(SQL_UPSERT_MEMORY, _memory_rows(facts))
     except Error as e:
         print(f"Error al guardar en memoria: {e}")
-    finally:
-        if conn:
-            conn.close()
 
-def get_all_memory():
-    conn = create_connection()
+def get_all_memory(connection=None):
+    conn = connection if connection else get_connection()
     if conn is None: return {}
     memories = {}
     try:
@@ -196,7 +274,233 @@ def get_all_memory():
             memories[row[0]] = cipher.decrypt(row[1])
     except Error as e:
         print(f"Error al recuperar memoria: {e}")
-    finally:
-        if conn:
+    return memories
+
+# --- LECTURA PAGINADA DEL HISTORIAL ---
+
+# paginación por clave (keyset): 'after_id' es el último interaction_id ya recibido,
+# así cada página es un recorrido acotado del índice (session_id, interaction_id)
+SQL_SELECT_SESSION_PAGE = '''SELECT interaction_id, timestamp, role, text_content, facial_emotion_dominant,
+                                    facial_emotion_scores_json, vocal_analysis_json
+                             FROM interactions
+                             WHERE session_id = ? AND interaction_id > ?
+                             ORDER BY interaction_id
+                             LIMIT ?'''
+SQL_SELECT_EMOTION_PAGE = '''SELECT interaction_id, timestamp, facial_emotion_dominant,
+                                    facial_emotion_scores_json, vocal_analysis_json
+                             FROM interactions
+                             WHERE session_id = ? AND interaction_id > ? AND role = 'user'
+                             ORDER BY interaction_id
+                             LIMIT ?'''
+
+def _load_json(value):
+    return json.loads(value) if value else None
+
+def _fetch_page(conn, sql, session_id, after_id, limit):
+    """Devuelve (filas, next_after_id); se pide una fila extra para saber si hay más páginas"""
+    rows = conn.execute(sql, (session_id, after_id, limit + 1)).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_after_id = rows[-1][0] if has_more else None
+    return rows, next_after_id
+
+def get_session_interactions(session_id, after_id: int = 0, limit: int = 50, connection=None):
+    """
+    Devuelve una página del historial de una sesión y el cursor de la siguiente página.
+    Solo se descifra el texto de las filas de la página devuelta.
+    """
+    conn = connection if connection else get_connection()
+    if conn is None: return [], None
+    try:
+        rows, next_after_id = _fetch_page(conn, SQL_SELECT_SESSION_PAGE, session_id, after_id, limit)
+    except Error as e:
+        print(f"Error al leer el historial de la sesión: {e}")
+        return [], None
+
+    interactions = [
+        {
+            "interaction_id": interaction_id,
+            "timestamp": timestamp,
+            "role": role,
+            "text": cipher.decrypt(text_content),
+            "facial_dominant": facial_dominant,
+            "facial_scores": _load_json(scores_json),
+            "vocal_analysis": _load_json(vocal_json)
+        }
+        for interaction_id, timestamp, role, text_content, facial_dominant, scores_json, vocal_json in rows
+    ]
+    return interactions, next_after_id
+
+SQL_SELECT_RECENT_MESSAGES = '''SELECT role, text_content FROM interactions
+                                WHERE session_id = ?
+                                ORDER BY interaction_id DESC
+                                LIMIT ?'''
+
+def get_recent_messages(session_id, limit: int = 40, connection=None) -> list:
+    """Devuelve los últimos mensajes de la sesión, en orden cronológico y en formato de chat"""
+    conn = connection if connection else get_connection()
+    if conn is None: return []
+    try:
+        rows = conn.execute(SQL_SELECT_RECENT_MESSAGES, (session_id, limit)).fetchall()
+    except Error as e:
+        print(f"Error al leer los mensajes recientes: {e}")
+        return []
+    return [{"role": role, "content": cipher.decrypt(text_content)} for role, text_content in reversed(rows) if text_content]
+
+def get_emotion_timeseries(session_id, after_id: int = 0, limit: int = 200, connection=None):
+    """
+    Devuelve una página de la serie temporal de emociones (facial y vocal) de los turnos
+    del usuario. No toca el texto cifrado.
+    """
+    conn = connection if connection else get_connection()
+    if conn is None: return [], None
+    try:
+        rows, next_after_id = _fetch_page(conn, SQL_SELECT_EMOTION_PAGE, session_id, after_id, limit)
+    except Error as e:
+        print(f"Error al leer la serie de emociones: {e}")
+        return [], None
+
+    points = []
+    for interaction_id, timestamp, facial_dominant, scores_json, vocal_json in rows:
+        vocal_analysis = _load_json(vocal_json)
+        points.append({
+            "interaction_id": interaction_id,
+            "timestamp": timestamp,
+            "facial_dominant": facial_dominant,
+            "facial_scores": _load_json(scores_json),
+            "vocal_dominant": vocal_analysis[0]["label"] if vocal_analysis else None,
+            "vocal_scores": {item["label"]: item["score"] for item in vocal_analysis} if vocal_analysis else None
+        })
+    return points, next_after_id
+
+# --- ESCRITURA DIFERIDA POR LOTES ---
+
+class WriteBatcher:
+    """
+    Escritor diferido (write-behind) con un hilo propio. Cada unidad encolada (un turno
+    completo o un grupo de hechos de memoria) se escribe junto con las demás unidades
+    pendientes en una única transacción, lo que reduce los commits (y fsyncs) por turno.
+
+    Es seguro llamarlo desde código asíncrono: submit_* no bloquea y devuelve un
+    concurrent.futures.Future que se puede esperar con asyncio.wrap_future.
+    """
+
+    _STOP = object()
+
+    def __init__(self, connection_factory=create_connection, max_batch: int = 64, flush_interval_s: float = 0.05):
+        self.connection_factory = connection_factory
+        self.max_batch = max_batch
+        self.flush_interval_s = flush_interval_s
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stats = {"units_written": 0, "transactions": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="sqlite-write-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Escribe lo pendiente y detiene el hilo"""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit_turn(self, session_id, user_data: dict, assistant_data: dict | None = None, memory_facts: dict | None = None) -> Future:
+        """
+        Encola el turno completo (fila del usuario, fila del asistente y hechos de memoria).
+        El futuro se resuelve con la lista de interaction_id insertados.
+        """
+        # el orden de las filas se fija ahora; el cifrado se hace en el hilo escritor
+        timestamp = datetime.now().isoformat()
+        turn = [('user', {"timestamp": timestamp, **user_data})]
+        if assistant_data:
+            turn.append(('assistant', {"timestamp": timestamp, **assistant_data}))
+
+        def write(cursor):
+            rows = [_interaction_row(session_id, role, _encrypt_interaction(data)) for role, data in turn]
+            memory_rows = _memory_rows(memory_facts) if memory_facts else []
+            interaction_ids = []
+            for row in rows:
+                cursor.execute(SQL_INSERT_INTERACTION, row)
+                interaction_ids.append(cursor.lastrowid)
+            if memory_rows:
+                cursor.executemany(SQL_UPSERT_MEMORY, memory_rows)
+            return interaction_ids
+
+        return self._submit(write)
+
+    def submit_memory_facts(self, facts: dict) -> Future:
+        facts = dict(facts)
+
+        def write(cursor):
+            cursor.executemany(SQL_UPSERT_MEMORY, _memory_rows(facts))
+
+        return self._submit(write)
+
+    def flush(self, timeout: float | None = None):
+        """Bloquea hasta que todo lo encolado hasta ahora esté escrito"""
+        self._submit(lambda cursor: None).result(timeout)
+
+    def metrics(self) -> dict:
+        return {"pending_units": self._queue.qsize(), **self._stats}
+
+    def _submit(self, write_fn) -> Future:
+        self.start()
+        future = Future()
+        self._queue.put((write_fn, future))
+        return future
+
+    def _run(self):
+        conn = self.connection_factory()
+        if conn is None:
+            logging.error("El escritor por lotes no pudo abrir la base de datos.")
+            return
+        try:
+            while True:
+                item = self._queue.get()
+                stop = item is self._STOP
+                batch = [] if stop else [item]
+                # agrupar lo que llegue durante la ventana de espera
+                deadline = time.monotonic() + self.flush_interval_s
+                while not stop and len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is self._STOP:
+                        stop = True
+                    else:
+                        batch.append(item)
+                if batch:
+                    self._write_batch(conn, batch)
+                if stop:
+                    break
+        finally:
             conn.close()
-    return memories
\ No newline at end of file
+
+    def _write_batch(self, conn, batch):
+        try:
+            with conn:
+                cursor = conn.cursor()
+                results = [write_fn(cursor) for write_fn, _ in batch]
+            self._stats["transactions"] += 1
+            self._stats["units_written"] += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            # si falla el lote, reintentar cada unidad en su propia transacción para aislar la culpable
+            logging.warning(f"Fallo al escribir un lote de {len(batch)} unidades, reintentando por separado: {e}")
+            for write_fn, future in batch:
+                try:
+                    with conn:
+                        result = write_fn(conn.cursor())
+                    self._stats["transactions"] += 1
+                    self._stats["units_written"] += 1
+                    future.set_result(result)
+                except Exception as unit_error:
+                    self._stats["errors"] += 1
+                    future.set_exception(unit_error)
@@ -0,0 +1,90 @@
+# backend/src/utils/startup.py | Estado y tiempos del arranque de la api (para /health/ready y el informe de arranque)
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+
+class StartupTracker:
+    """
+    Registra cada paso del arranque (estado y duración). Los modelos se cargan en hilos con 'load', en
+    paralelo entre sí; el arranque termina al llamar a 'finish'. Si falla un componente opcional la api
+    queda 'degraded' y funciona sin él; si falla uno obligatorio, el estado es 'failed' (no atiende turnos).
+    """
+    def __init__(self, import_time_s: float | None = None):
+        self.import_time_s = import_time_s
+        self.components = {}
+        self.required = set()
+        self._started_at = time.perf_counter()
+        self._finished_at = None
+
+    @property
+    def ready(self) -> bool:
+        return self._finished_at is not None
+
+    @property
+    def degraded(self) -> bool:
+        return any(component["status"] == "failed" for component in self.components.values())
+
+    @property
+    def failed(self) -> bool:
+        return any(self.components.get(name, {}).get("status") == "failed" for name in self.required)
+
+    def _record(self, name: str, status: str, start: float, error: Exception | None = None):
+        self.components[name] = {"status": status, "duration_s": round(time.perf_counter() - start, 3)}
+        if error is not None:
+            self.components[name]["error"] = str(error)
+
+    @contextmanager
+    def step(self, name: str):
+        """Paso síncrono y rápido del arranque; si falla, el error se propaga (el arranque no puede seguir)."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._record(name, "failed", start, e)
+            raise
+        self._record(name, "loaded", start)
+
+    async def load(self, name: str, load_fn, *args, required: bool = True):
+        """Ejecuta 'load_fn' en un hilo. Si falla, registra el error y devuelve None."""
+        start = time.perf_counter()
+        if required:
+            self.required.add(name)
+        self.components[name] = {"status": "loading"}
+        try:
+            result = await asyncio.to_thread(load_fn, *args)
+        except Exception as e:
+            logging.error(f"Fallo al cargar '{name}' durante el arranque: {e}")
+            self._record(name, "failed", start, e)
+            return None
+        self._record(name, "loaded", start)
+        return result
+
+    def skip(self, name: str, reason: str):
+        self.components[name] = {"status": "skipped", "reason": reason}
+
+    def finish(self):
+        self._finished_at = time.perf_counter()
+        self.log_report()
+
+    def report(self) -> dict:
+        end = self._finished_at or time.perf_counter()
+        return {
+            "status": "starting" if not self.ready else "failed" if self.failed else "ready",
+            "degraded": self.degraded,
+            "import_time_s": round(self.import_time_s, 3) if self.import_time_s is not None else None,
+            "startup_time_s": round(end - self._started_at, 3),
+            "components": self.components,
+        }
+
+    def log_report(self):
+        """Informe de arranque en el log: los pasos más lentos primero."""
+        report = self.report()
+        lines = [f"Arranque completado en {report['startup_time_s']:.2f}s (importaciones: {report['import_time_s'] or 0:.2f}s)"]
+        ordered = sorted(self.components.items(), key=lambda item: item[1].get("duration_s", 0), reverse=True)
+        for name, component in ordered:
+            duration = f"{component['duration_s']:.2f}s" if "duration_s" in component else "-"
+            detail = component.get("error") or component.get("reason") or ""
+            lines.append(f"  {name:<20}{component['status']:<9}{duration:>8}  {detail}".rstrip())
+        (logging.warning if self.degraded else logging.info)("\n".join(lines))
@@ -4,7 +4,7 @@ import sys
 import os
 from pathlib import Path
 import pytest
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 # --- Corrección de la ruta ---
 # El script se encuentra en backend/tests/integration
@@ -17,19 +17,38 @@ sys.path.insert(0, str(BACKEND_ROOT))
 # Ahora las importaciones desde 'src' deberían funcionar
 from src.analysis.voice_transcription import transcribe_audio_deepgram
 from src.chat.llm_client import get_groq_response
-# --- Corrección del nombre de la función importada ---
-from src.chat.prompt_builder import build_llm_prompt_from_chunks
+from src.chat.prompt_builder import build_llm_prompt
 
 # --- Configuración de la prueba ---
 # Usamos una ruta relativa desde la raíz del 'backend' para mayor consistencia
 AUDIO_FILE_PATH = BACKEND_ROOT / "tests" / "fixtures" / "short_spanish_test.wav"
 TEST_USER_TEXT = "Hola, esta es una prueba para ver si la transcripción y el LLM funcionan."
 
+# --- Dobles de prueba ---
+
+class FakeDeepgramResponse:
+    """Respuesta http simulada compatible con 'async with session.post(...)'."""
+    def __init__(self, body=None, error=None):
+        self.body = body
+        self.error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.error:
+            raise self.error
+
+    async def json(self):
+        return self.body
+
 # --- Pruebas principales con Pytest ---
 
 @pytest.mark.asyncio
-@patch('src.analysis.voice_transcription.dg_client', new_callable=AsyncMock)
-async def test_deepgram_transcription_success(mock_dg_client):
+async def test_deepgram_transcription_success():
     """
     Prueba que la transcripción de Deepgram funciona correctamente con una respuesta simulada.
     """
@@ -38,13 +57,14 @@ async def test_deepgram_transcription_success(mock_dg_client):
     mock_response = {
         "results": {"channels": [{"alternatives": [{"transcript": "hola esta es una prueba de voz"}]}]}
     }
-    mock_dg_client.transcription.prerecorded.return_value = mock_response
+    mock_session = MagicMock()
+    mock_session.post.return_value = FakeDeepgramResponse(body=mock_response)
 
     try:
         with open(AUDIO_FILE_PATH, "rb") as audio_file:
             audio_bytes = audio_file.read()
         
-        user_text_from_audio = await transcribe_audio_deepgram(audio_bytes)
+        user_text_from_audio = await transcribe_audio_deepgram(audio_bytes, session=mock_session)
         
         assert user_text_from_audio == "hola esta es una prueba de voz"
         print(f"  -> Transcripción correcta: '{user_text_from_audio}'")
@@ -55,18 +75,18 @@ async def test_deepgram_transcription_success(mock_dg_client):
         pytest.fail(f"Falló la prueba de transcripción con una excepción inesperada: {e}")
 
 @pytest.mark.asyncio
-@patch('src.analysis.voice_transcription.dg_client', new_callable=AsyncMock)
-async def test_deepgram_transcription_failure(mock_dg_client):
+async def test_deepgram_transcription_failure():
     """
     Prueba que la transcripción de Deepgram maneja correctamente los errores de la API.
     """
     print("\n[1] Probando la transcripción de Deepgram (Fallo)")
-    mock_dg_client.transcription.prerecorded.side_effect = Exception("Error de API simulado")
+    mock_session = MagicMock()
+    mock_session.post.return_value = FakeDeepgramResponse(error=Exception("Error de API simulado"))
 
     with open(AUDIO_FILE_PATH, "rb") as audio_file:
         audio_bytes = audio_file.read()
     
-    result = await transcribe_audio_deepgram(audio_bytes)
+    result = await transcribe_audio_deepgram(audio_bytes, session=mock_session)
     assert result is None
     print("  -> Manejo de errores de Deepgram verificado.")
 
@@ -81,14 +101,12 @@ def test_groq_llm_response_success(mock_groq_client):
     mock_choice.message.content = "Respuesta de IA simulada."
     mock_groq_client.chat.completions.create.return_value.choices = [mock_choice]
     
-    # --- Adaptación a la nueva firma de la función ---
     mock_memory = {"nombre": "Leo"}
-    mock_analysis_chunks = [{'transcript': TEST_USER_TEXT}]
     
-    # Usar la función correcta y la estructura de datos adecuada
-    prompt_messages = build_llm_prompt_from_chunks(
-        chat_history=[], 
-        analysis_chunks=mock_analysis_chunks, 
+    prompt_messages = build_llm_prompt(
+        chat_history=[{"role": "user", "content": TEST_USER_TEXT}],
+        latest_user_text=TEST_USER_TEXT,
+        emotion_data={},
         long_term_memory=mock_memory
     )
     
@@ -106,10 +124,10 @@ def test_groq_llm_response_failure(mock_groq_client):
 
     mock_groq_client.chat.completions.create.side_effect = Exception("Error de API de Groq simulado")
 
-    # Adaptar la llamada para que coincida con la firma de la función
-    prompt_messages = build_llm_prompt_from_chunks(
-        chat_history=[],
-        analysis_chunks=[{'transcript': TEST_USER_TEXT}],
+    prompt_messages = build_llm_prompt(
+        chat_history=[{"role": "user", "content": TEST_USER_TEXT}],
+        latest_user_text=TEST_USER_TEXT,
+        emotion_data={},
         long_term_memory={}
     )
     
@@ -0,0 +1,191 @@
+# backend/tests/integration/test_voice_websocket.py
+
+import sys
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import pytest
+from cryptography.fernet import Fernet
+from fastapi.testclient import TestClient
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+# config exige las claves al importarse; la prueba no usa ningún servicio externo
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+os.environ.setdefault("DEEPGRAM_API_KEY", "test")
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+import api
+import config
+from src.analysis.voice_emotion import BaseEmotionRecognizer
+from src.audio.tts_cache import TTSCache
+from src.chat.context_window import ContextWindowManager
+from src.chat.llm_client import LLMStreamInterrupted
+from src.chat.memory_worker import MemoryExtractionQueue
+from src.chat.session_store import SessionStore
+
+TRANSCRIPT = "hoy me siento un poco cansado"
+SAMPLE_RATE = 16000
+
+# --- Dobles de prueba ---
+
+class FakeRecognizer(BaseEmotionRecognizer):
+    """Reconocedor sin modelo: el logit de la segunda etiqueta es la energía de la ventana."""
+    def run_batch(self, input_values, attention_mask):
+        logits = np.zeros((len(input_values), len(self.id2label)), dtype=np.float32)
+        logits[:, 1] = np.square(input_values).mean(axis=1)
+        return logits
+
+class FakeTTS:
+    voice_id = "test"
+    audio_format = "mp3"
+    mimetype = "audio/mpeg"
+
+    async def synthesize(self, text):
+        return text.encode()
+
+class FakeWriter:
+    """Sustituye a WriteBatcher: guarda los turnos en memoria en lugar de en SQLite."""
+    def __init__(self):
+        self.turns = []
+
+    def submit_turn(self, session_id, user_data, assistant_data=None, memory_facts=None):
+        self.turns.append((session_id, user_data, assistant_data))
+
+    def submit_memory_facts(self, facts):
+        pass
+
+async def fake_stream(prompt_messages):
+    for token in ["Vaya, ", "descansa un poco. ", "¿Dormiste bien?"]:
+        yield token
+
+async def fake_extract(prompt):
+    return {}
+
+async def fake_summarize(prompt):
+    return ""
+
+def _utterance_pcm() -> bytes:
+    """Silencio, un segundo de tono (voz) y silencio suficiente para cerrar la frase, en PCM de 16 bits."""
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    samples = np.concatenate([rng.standard_normal(SAMPLE_RATE // 2) * 0.001, 0.3 * np.sin(2 * np.pi * 220 * t),
+                              rng.standard_normal(SAMPLE_RATE) * 0.001])
+    return (samples * 32767).astype("<i2").tobytes()
+
+# --- FIXTURES DE PYTEST ---
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    """api con el estado que crearía el arranque, pero con dobles locales (sin red ni modelos)."""
+    monkeypatch.setattr(config, "STREAMING_ASR_BACKEND", "local")
+    monkeypatch.setattr(config, "LOCAL_ASR_TRANSCRIPT", TRANSCRIPT)
+    monkeypatch.setattr(api, "stream_groq_response", fake_stream)
+
+    state = api.app.state
+    state.startup = None
+    state.vocal_recognizer = FakeRecognizer("test", model_dir=str(tmp_path))
+    state.inference_executor = ThreadPoolExecutor(max_workers=1)
+    state.inference_batcher = api._create_inference_batcher(state.vocal_recognizer)
+    state.asr_backend = None
+    state.tts_backend = FakeTTS()
+    state.db_writer = FakeWriter()
+    state.session_store = SessionStore()
+    state.context_window = ContextWindowManager(fake_summarize)
+    state.memory_queue = MemoryExtractionQueue(fake_extract, state.db_writer.submit_memory_facts)
+    state.tts_cache = TTSCache()
+    # sin 'with' la TestClient no ejecuta los eventos de arranque (que cargarían los modelos reales)
+    yield TestClient(api.app)
+    state.inference_batcher.stop()
+    state.inference_executor.shutdown()
+
+def _receive_until_done(ws) -> list:
+    """Eventos del servidor hasta 'done' o 'error'; los frames binarios se anotan como ('bytes', tamaño)."""
+    events = []
+    while True:
+        message = ws.receive()
+        if message.get("bytes") is not None:
+            events.append(("bytes", len(message["bytes"])))
+            continue
+        event = json.loads(message["text"])
+        events.append((event["type"], event))
+        if event["type"] in ("done", "error"):
+            return events
+
+# --- PRUEBAS DE INTEGRACIÓN ---
+
+def test_voice_session_detects_end_of_utterance_and_answers(client):
+    """
+    Los frames PCM pasan por el VAD; al terminar la frase se lanza el turno con la transcripción
+    en streaming y el análisis vocal, y llegan los mismos eventos que en /ws/interact
+    """
+    pcm = _utterance_pcm()
+    with client.websocket_connect("/ws/voice") as ws:
+        ws.send_json({"type": "start", "session_id": 11, "sample_rate": SAMPLE_RATE})
+        # fragmentos de 20 ms, como los envía el navegador
+        for offset in range(0, len(pcm), 640):
+            ws.send_bytes(pcm[offset:offset + 640])
+        events = _receive_until_done(ws)
+        ws.send_json({"type": "stop"})
+
+    kinds = [kind for kind, _ in events]
+    vad_states = [event["state"] for kind, event in events if kind == "vad"]
+    assert vad_states == ["speech_start", "speech_end"]
+    assert kinds.index("transcript") > kinds.index("vad")
+    assert kinds[-1] == "done"
+
+    transcript = dict(events)["transcript"]
+    assert transcript["user_text"] == TRANSCRIPT
+    assert transcript["vocal_analysis_result"][0]["label"]
+    assert "".join(event["text"] for kind, event in events if kind == "token") == "Vaya, descansa un poco. ¿Dormiste bien?"
+
+    # cada evento 'audio' va seguido del frame binario con el audio de la frase
+    for index, (kind, event) in enumerate(events):
+        if kind == "audio":
+            assert events[index + 1] == ("bytes", event["size"])
+    assert any(kind == "audio" for kind in kinds)
+    assert client.app.state.db_writer.turns[0][0] == 11
+
+def test_malformed_control_messages_do_not_end_the_session(client):
+    """
+    Un mensaje de control que no es JSON o una emoción facial inválida devuelven un evento de error
+    y la sesión sigue atendiendo frases
+    """
+    pcm = _utterance_pcm()
+    with client.websocket_connect("/ws/voice") as ws:
+        ws.send_json({"type": "start", "session_id": 12})
+        ws.send_text("{esto no es json")
+        assert ws.receive_json()["status"] == 400
+        ws.send_json({"type": "facial_emotion", "average_scores": "feliz"})
+        assert ws.receive_json()["status"] == 400
+
+        for offset in range(0, len(pcm), 640):
+            ws.send_bytes(pcm[offset:offset + 640])
+        assert _receive_until_done(ws)[-1][0] == "done"
+        ws.send_json({"type": "stop"})
+
+def test_interrupted_llm_stream_keeps_only_the_partial_reply(client, monkeypatch):
+    """
+    Si el LLM se corta a mitad de la respuesta, el turno termina con 'interrupted' y se guarda
+    solo el texto generado, sin el mensaje de error
+    """
+    async def broken_stream(prompt_messages):
+        yield "Vaya, "
+        raise LLMStreamInterrupted("conexión cortada")
+
+    monkeypatch.setattr(api, "stream_groq_response", broken_stream)
+    pcm = _utterance_pcm()
+    with client.websocket_connect("/ws/voice") as ws:
+        ws.send_json({"type": "start", "session_id": 13})
+        for offset in range(0, len(pcm), 640):
+            ws.send_bytes(pcm[offset:offset + 640])
+        done = _receive_until_done(ws)[-1][1]
+        ws.send_json({"type": "stop"})
+
+    assert done["type"] == "done" and done["interrupted"]
+    assert done["ai_text"] == "Vaya,"
+    assert done["new_messages"][-1]["content"] == "Vaya,"
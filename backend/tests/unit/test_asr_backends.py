@@ -0,0 +1,82 @@
+# backend/tests/unit/test_asr_backends.py
+
+import sys
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.analysis.voice_transcription import WhisperASR
+from src.analysis.streaming_asr import create_streaming_asr
+from src.audio.audio_decoder import AudioInput
+
+Segment = namedtuple("Segment", "text")
+
+class FakeWhisperModel:
+    """Sustituto de faster_whisper.WhisperModel que registra las llamadas simultáneas."""
+    def __init__(self, model, **kwargs):
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def transcribe(self, samples, language=None, beam_size=5):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+            self.calls.append((len(samples), language, beam_size))
+        if len(samples) == 0:
+            raise RuntimeError("audio vacío")
+        return iter([Segment(" Hola, "), Segment("¿qué tal? ")]), None
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_whisper_pool_bounds_concurrency_and_uses_beam_size(monkeypatch):
+    """
+    Las transcripciones locales respetan el máximo de hilos, usan el haz configurado
+    y un fallo del modelo devuelve None sin romper el resto
+    """
+    monkeypatch.setitem(sys.modules, "faster_whisper", SimpleNamespace(WhisperModel=FakeWhisperModel))
+    asr = WhisperASR(model="tiny", beam_size=3, batch_size=1, max_concurrency=2)
+    audio = AudioInput.from_pcm(np.zeros(1600, dtype=np.float32))
+
+    results = await asyncio.gather(*(asr.transcribe(audio) for _ in range(5)))
+    assert results == ["Hola, ¿qué tal?"] * 5
+    assert asr.model.max_active == 2
+    assert asr.model.calls[0] == (1600, "es", 3)
+
+    assert await asr.transcribe(AudioInput.from_pcm(np.zeros(0, dtype=np.float32))) is None
+    metrics = asr.metrics()
+    assert (metrics["requests"], metrics["failures"], metrics["running"], metrics["waiting"]) == (6, 1, 0, 0)
+    asr.close()
+
+@pytest.mark.asyncio
+async def test_batch_streaming_adapter_transcribes_the_whole_utterance():
+    """
+    En la sesión de voz, un motor sin streaming recibe la frase completa al cerrarla
+    """
+    received = []
+
+    class FakeASR:
+        async def transcribe(self, audio):
+            received.append(audio.samples(16000))
+            return "frase completa"
+
+    asr = create_streaming_asr("batch", 16000, asr_backend=FakeASR())
+    await asr.start()
+    await asr.send(np.ones(800, dtype=np.float32))
+    await asr.send(np.zeros(400, dtype=np.float32))
+    assert await asr.finish() == "frase completa"
+    assert len(received[0]) == 1200 and received[0][:800].all()
@@ -0,0 +1,80 @@
+# backend/tests/unit/test_audio_decoder.py
+
+import io
+import sys
+import wave
+from pathlib import Path
+import numpy as np
+import soundfile as sf
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.audio.audio_decoder import AudioInput, _read_wav_pcm, decode_audio, detect_audio_format
+
+def _sine(rate, seconds=1.0, freq=440.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return 0.5 * np.sin(2 * np.pi * freq * t)
+
+def _wav_bytes(samples, rate, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        pcm = (np.repeat(samples[:, None], channels, axis=1) * 32767).astype("<i2")
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_wav_is_read_without_copy_and_resampled_to_mono_16k():
+    """
+    Un WAV estéreo a 48 kHz se lee como vista del buffer y se convierte a mono float32 a 16 kHz
+    """
+    audio_bytes = _wav_bytes(_sine(48000), 48000, channels=2)
+
+    frames, rate = _read_wav_pcm(audio_bytes)
+    assert rate == 48000 and frames.shape == (48000, 2)
+    assert np.shares_memory(frames, np.frombuffer(audio_bytes, dtype=np.uint8))
+
+    samples = decode_audio(audio_bytes, target_rate=16000)
+    assert samples.dtype == np.float32 and samples.shape == (16000,)
+    # la señal conserva su amplitud y su frecuencia tras el remuestreo
+    assert abs(np.abs(samples[100:-100]).max() - 0.5) < 0.02
+    assert np.argmax(np.abs(np.fft.rfft(samples))) == 440
+
+def test_streaming_wav_header_and_flac_are_decoded_in_process():
+    """
+    Un WAV con tamaño de datos desconocido (grabación en streaming) y un FLAC se decodifican sin ffmpeg
+    """
+    audio_bytes = bytearray(_wav_bytes(_sine(16000, 0.5), 16000))
+    data_offset = audio_bytes.index(b"data")
+    audio_bytes[data_offset + 4:data_offset + 8] = b"\xff\xff\xff\xff"
+    samples = decode_audio(bytes(audio_bytes))
+    assert samples.shape == (8000,)
+
+    flac = io.BytesIO()
+    sf.write(flac, _sine(22050, 0.5), 22050, format="FLAC")
+    assert detect_audio_format(flac.getvalue()) == "flac"
+    samples = decode_audio(flac.getvalue(), target_rate=16000)
+    assert samples.shape == (8000,)
+    assert detect_audio_format(b"\x1aE\xdf\xa3" + b"\x00" * 8) == "webm"
+
+def test_audio_input_decodes_once_and_sends_compact_payload():
+    """
+    AudioInput decodifica una sola vez y envía FLAC para el WAV y los bytes originales para webm
+    """
+    audio = AudioInput(_wav_bytes(_sine(48000, 2.0), 48000, channels=2))
+    assert audio.format == "wav" and audio.mimetype == "audio/wav"
+    assert audio.samples() is audio.samples() and audio.duration_s() == 2.0
+
+    payload, mimetype = audio.transcription_payload()
+    assert mimetype == "audio/flac" and len(payload) < len(audio.data) / 4
+    assert sf.read(io.BytesIO(payload))[0].shape == (32000,)
+
+    webm = AudioInput(b"\x1aE\xdf\xa3" + b"\x00" * 32, declared_mimetype="audio/webm;codecs=opus")
+    assert webm.transcription_payload() == (webm.data, "audio/webm")
+    unknown = AudioInput(b"\x00" * 32, declared_mimetype="audio/x-custom")
+    assert unknown.mimetype == "audio/x-custom"
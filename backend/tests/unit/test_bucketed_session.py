@@ -0,0 +1,83 @@
+# backend/tests/unit/test_bucketed_session.py
+
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+onnx = pytest.importorskip("onnx")
+from onnx import helper, numpy_helper, TensorProto
+
+from src.analysis.bucketed_session import BucketedSession
+from src.analysis.model_benchmark import measure_variant, agreement
+
+def _write_masked_model(path: Path, length):
+    """Modelo (B, L) + máscara -> (B, 2): [suma del audio sin relleno, muestras válidas]."""
+    graph = helper.make_graph(
+        [helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+         helper.make_node("Mul", ["input_values", "mask"], ["masked"]),
+         helper.make_node("ReduceSum", ["masked", "axes"], ["total"], keepdims=1),
+         helper.make_node("ReduceSum", ["mask", "axes"], ["valid"], keepdims=1),
+         helper.make_node("Concat", ["total", "valid"], ["logits"], axis=1)],
+        "masked",
+        [helper.make_tensor_value_info("input_values", TensorProto.FLOAT, ["batch_size", length]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch_size", length])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch_size", 2])],
+        initializer=[numpy_helper.from_array(np.array([1], dtype=np.int64), "axes")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_inputs_are_padded_to_nearest_bucket_with_reused_buffers(tmp_path):
+    """
+    Cada lote va a la cubeta más pequeña que lo contiene, el relleno queda fuera de la máscara y los
+    buffers ligados se reutilizan sin arrastrar datos de la llamada anterior
+    """
+    paths = [tmp_path / "model_8.onnx", tmp_path / "model_4.onnx"]
+    _write_masked_model(paths[0], 8)
+    _write_masked_model(paths[1], 4)
+    session = BucketedSession([str(path) for path in paths], max_batch_size=2, cache_optimized=False)
+    assert session.lengths == [4, 8] and session.has_attention_mask
+    assert [session.bucket_for(n) for n in (1, 4, 5, 8, 20)] == [0, 0, 1, 1, 1]
+
+    np.testing.assert_allclose(session.run(np.ones((2, 3), np.float32)), [[3, 3], [3, 3]])
+    buffers = session._local.buffers[0]
+    np.testing.assert_allclose(session.run(np.full((2, 2), 5, np.float32)), [[10, 2], [10, 2]])
+    assert session._local.buffers[0] is buffers
+
+    # lote más grande que los buffers: se amplían; la máscara del llamador se respeta
+    values = np.ones((3, 6), np.float32)
+    mask = np.array([[1] * 6, [1] * 5 + [0], [1] * 2 + [0] * 4])
+    np.testing.assert_allclose(session.run(values, mask)[:, 1], [6, 5, 2])
+    assert session._local.buffers[1].capacity == 3
+
+    # más largo que la mayor cubeta: se recorta
+    np.testing.assert_allclose(session.run(np.ones((1, 10), np.float32)), [[8, 8]])
+
+def test_benchmark_measures_bucketed_variant_against_dynamic_shape(tmp_path):
+    """
+    El benchmark mide la variante por cubetas con segmentos de distinta duración y da los mismos
+    logits que el modelo de longitud dinámica
+    """
+    dynamic_path, small_path, large_path = tmp_path / "dynamic.onnx", tmp_path / "b4.onnx", tmp_path / "b8.onnx"
+    _write_masked_model(dynamic_path, "sequence_length")
+    _write_masked_model(small_path, 4)
+    _write_masked_model(large_path, 8)
+    lengths = np.array([2, 4, 7, 8, 3])
+    segments = np.zeros((5, 8), np.float32)
+    for row, length in enumerate(lengths):
+        segments[row, :length] = row + 1
+
+    dynamic_metrics, dynamic_logits = measure_variant([str(dynamic_path)], segments, lengths, batch_size=2)
+    metrics, logits = measure_variant([str(small_path), str(large_path)], segments, lengths, batch_size=2)
+    assert metrics["bucket_lengths"] == [4, 8] and metrics["supports_batching"]
+    assert "bucket_lengths" not in dynamic_metrics
+    np.testing.assert_allclose(logits, dynamic_logits)
+    assert agreement(dynamic_logits, logits)["top1_agreement"] == 1.0
@@ -0,0 +1,67 @@
+# backend/tests/unit/test_context_window.py
+
+import sys
+from pathlib import Path
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.chat.context_window import ContextWindowManager, count_message_tokens
+from src.chat.session_store import SessionStore
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_prompt_stays_within_budget_and_old_turns_are_summarised():
+    """
+    Con un historial largo, el prompt respeta el presupuesto, conserva los turnos recientes
+    y los antiguos pasan a un resumen que se usa en el turno siguiente
+    """
+    prompts = []
+
+    async def fake_summarize(prompt):
+        prompts.append(prompt)
+        return "El usuario habló de su trabajo."
+
+    store = SessionStore(max_messages=100)
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"mensaje número {i} " * 20} for i in range(30)]
+    context = store.put(1, history)
+
+    manager = ContextWindowManager(fake_summarize, token_budget=1500)
+    messages = manager.build_prompt(context, "¿Y ahora qué hago?", {})
+
+    assert count_message_tokens(messages) <= 1500
+    assert messages[-1]["content"] == "¿Y ahora qué hago?"
+    assert messages[-3]["content"] == history[-1]["content"]
+    assert context.summarized_count > 0 and len(context.history()) < len(history)
+
+    await context.summary_task
+    assert len(prompts) == 1 and "mensaje número 0" in prompts[0]
+    assert context.pending_summary == []
+
+    messages = manager.build_prompt(context, "Sigo aquí.", {})
+    assert "El usuario habló de su trabajo." in messages[-2]["content"]
+    assert count_message_tokens(messages) <= 1500
+
+@pytest.mark.asyncio
+async def test_failed_summary_keeps_messages_pending():
+    """
+    Si el resumen falla, los mensajes quedan pendientes para el siguiente intento
+    """
+    async def failing_summarize(prompt):
+        return None
+
+    store = SessionStore(max_messages=2)
+    store.put(1, [])
+    store.append(1, [{"role": "user", "content": "uno"}, {"role": "assistant", "content": "dos"},
+                     {"role": "user", "content": "tres"}])
+    context = await store.get(1)
+
+    manager = ContextWindowManager(failing_summarize, token_budget=3000)
+    manager.build_prompt(context, "cuatro", {})
+    await context.summary_task
+
+    assert [m["content"] for m in context.pending_summary] == ["uno"]
+    assert manager.metrics()["summary_failures"] == 1
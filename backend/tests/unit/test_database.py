@@ -13,7 +13,10 @@ from cryptography.fernet import Fernet
 BACKEND_ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(BACKEND_ROOT))
 
-from src.database.data_manager import setup_database, save_interaction_encrypted, CipherManager
+from src.database.data_manager import (
+    setup_database, save_interaction_encrypted, save_memory_facts, get_all_memory,
+    get_session_interactions, get_emotion_timeseries, CipherManager, WriteBatcher, SCHEMA_MIGRATIONS
+)
 
 # --- FIXTURES DE PYTEST ---
 
@@ -50,6 +53,26 @@ def test_database_setup(db_connection):
         assert cursor.fetchone() is not None, f"la tabla '{table}' no fue creada"
         print(f"  -> verificación de la tabla '{table}' correcta")
 
+def test_migrations_add_indexes_to_existing_database():
+    """
+    Verifica que una base de datos creada sin índices se migra a la última versión
+    """
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE interactions (interaction_id INTEGER PRIMARY KEY, session_id INTEGER NOT NULL, "
+                 "timestamp TEXT NOT NULL, role TEXT NOT NULL, text_content TEXT, facial_emotion_dominant TEXT, "
+                 "facial_emotion_scores_json TEXT, vocal_analysis_json TEXT)")
+
+    setup_database(conn)
+    setup_database(conn)  # idempotente
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(SCHEMA_MIGRATIONS)
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list('interactions')")}
+    assert "idx_interactions_session_id" in indexes
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM interactions WHERE session_id = 1 AND interaction_id > 0").fetchall()
+    assert any("idx_interactions_session_id" in row[-1] for row in plan)
+    conn.close()
+    print("  -> verificación de migraciones correcta")
+
 def test_save_and_read_encrypted_interaction(db_connection, test_cipher):
     """
     Prueba el flujo de guardar una interacción cifrada y verificar su descifrado
@@ -83,4 +106,71 @@ def test_save_and_read_encrypted_interaction(db_connection, test_cipher):
     # verificar que se puede descifrar correctamente al original
     decrypted_text = test_cipher.decrypt(encrypted_text)
     assert decrypted_text == original_text
-    print("  -> verificación de cifrado y descifrado correcta")
\ No newline at end of file
+    print("  -> verificación de cifrado y descifrado correcta")
+
+def test_save_memory_facts_in_one_call(db_connection, test_cipher):
+    """
+    Verifica que varios hechos se guardan cifrados y se recuperan descifrados
+    """
+    from src.database import data_manager
+    data_manager.cipher = test_cipher
+
+    save_memory_facts({"nombre": "Leo", "edad": 30}, connection=db_connection)
+
+    assert get_all_memory(connection=db_connection) == {"nombre": "Leo", "edad": "30"}
+    print("  -> verificación de guardado de memoria en lote correcta")
+
+def test_write_batcher_groups_turn_in_single_transaction(tmp_path, test_cipher):
+    """
+    Prueba que el escritor diferido guarda usuario, asistente y memoria de un turno
+    en una sola transacción y que flush espera a que todo esté escrito
+    """
+    from src.database import data_manager
+    data_manager.cipher = test_cipher
+
+    db_path = tmp_path / "batch.db"
+    conn = sqlite3.connect(db_path)
+    setup_database(conn)
+
+    batcher = WriteBatcher(connection_factory=lambda: sqlite3.connect(db_path, check_same_thread=False))
+    future = batcher.submit_turn(
+        1, {"text": "Hola", "facial_dominant": "happy"}, {"text": "Hola, ¿cómo estás?"}, memory_facts={"nombre": "Leo"}
+    )
+    batcher.flush(timeout=5)
+    batcher.stop()
+
+    assert len(future.result()) == 2
+    rows = conn.execute("SELECT role, text_content FROM interactions ORDER BY interaction_id").fetchall()
+    assert [role for role, _ in rows] == ["user", "assistant"]
+    assert test_cipher.decrypt(rows[1][1]) == "Hola, ¿cómo estás?"
+    assert get_all_memory(connection=conn) == {"nombre": "Leo"}
+    assert batcher.metrics()["errors"] == 0
+    conn.close()
+    print("  -> verificación del escritor por lotes correcta")
+
+def test_paginated_history_and_emotion_timeseries(db_connection, test_cipher):
+    """
+    Prueba la paginación por clave del historial y de la serie de emociones
+    """
+    from src.database import data_manager
+    data_manager.cipher = test_cipher
+
+    for i in range(3):
+        save_interaction_encrypted(1, 'user', {
+            "text": f"mensaje {i}", "facial_dominant": "sad",
+            "vocal_analysis": [{"label": "SAD", "score": 0.8}, {"label": "NEU", "score": 0.2}]
+        }, connection=db_connection)
+        save_interaction_encrypted(1, 'assistant', {"text": f"respuesta {i}"}, connection=db_connection)
+    save_interaction_encrypted(2, 'user', {"text": "otra sesión"}, connection=db_connection)
+
+    first_page, cursor_id = get_session_interactions(1, limit=4, connection=db_connection)
+    second_page, last_cursor = get_session_interactions(1, after_id=cursor_id, limit=4, connection=db_connection)
+
+    assert [item["text"] for item in first_page] == ["mensaje 0", "respuesta 0", "mensaje 1", "respuesta 1"]
+    assert [item["text"] for item in second_page] == ["mensaje 2", "respuesta 2"]
+    assert last_cursor is None
+
+    points, _ = get_emotion_timeseries(1, connection=db_connection)
+    assert len(points) == 3
+    assert points[0]["vocal_dominant"] == "SAD" and points[0]["vocal_scores"]["NEU"] == 0.2
+    print("  -> verificación de la paginación correcta")
@@ -0,0 +1,113 @@
+# backend/tests/unit/test_inference_batcher.py
+
+import sys
+import threading
+from pathlib import Path
+import numpy as np
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.analysis.inference_batcher import InferenceBatcher, InferenceQueueFull
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_concurrent_requests_share_batches_by_length_bucket():
+    """
+    Las entradas que llegan en la misma ventana se agrupan por cubeta de longitud, se rellenan
+    con su máscara y cada llamador recibe sus propios logits
+    """
+    calls = []
+
+    def fake_run(input_values, attention_mask):
+        calls.append((input_values.shape, attention_mask.sum(axis=1).tolist()))
+        # logit = suma de la entrada real, para comprobar el reparto por fila
+        return np.stack([input_values.sum(axis=1), attention_mask.sum(axis=1)], axis=1)
+
+    batcher = InferenceBatcher(fake_run, max_batch=8, max_wait_ms=200, bucket_size=100)
+    inputs = [np.full(90, 1.0), np.full(50, 2.0), np.full(250, 1.0)]
+    futures = [batcher.submit(values) for values in inputs]
+    results = [future.result(timeout=2) for future in futures]
+    batcher.stop()
+
+    assert [result.tolist() for result in results] == [[90.0, 90.0], [100.0, 50.0], [250.0, 250.0]]
+    assert sorted(calls) == [((1, 250), [250]), ((2, 90), [90, 50])]
+    metrics = batcher.metrics()
+    assert metrics["batches"] == 2 and metrics["items"] == 3 and metrics["max_batch_seen"] == 2
+
+def test_models_without_attention_mask_only_batch_equal_lengths():
+    """
+    Sin máscara de atención, una entrada nunca se rellena con ceros por culpa de otra petición
+    """
+    shapes = []
+
+    def fake_run(input_values, attention_mask):
+        shapes.append(input_values.shape)
+        return input_values.sum(axis=1, keepdims=True)
+
+    batcher = InferenceBatcher(fake_run, max_batch=8, max_wait_ms=200, bucket_size=100, exact_length=True)
+    futures = [batcher.submit(np.ones(length)) for length in (90, 50, 90)]
+    results = [future.result(timeout=2).tolist() for future in futures]
+    batcher.stop()
+
+    assert results == [[90.0], [50.0], [90.0]]
+    assert sorted(shapes) == [(1, 50), (2, 90)]
+    assert batcher.metrics()["padded_samples"] == 0
+
+def test_full_queue_rejects_and_errors_reach_callers():
+    """
+    Con la cola llena se rechaza la entrada y un fallo del modelo llega a todos los llamadores del lote
+    """
+    release = threading.Event()
+
+    def blocking_run(input_values, attention_mask):
+        release.wait(2)
+        raise RuntimeError("fallo del modelo")
+
+    batcher = InferenceBatcher(blocking_run, max_batch=1, max_wait_ms=0, max_queue=1)
+    first = batcher.submit(np.ones(10))
+    # esperar a que el hilo saque la primera entrada y quede bloqueado en la inferencia
+    while batcher.metrics()["queue_depth"]:
+        pass
+    second = batcher.submit(np.ones(10))
+    rejected = batcher.submit(np.ones(10))
+
+    with pytest.raises(InferenceQueueFull):
+        rejected.result(timeout=1)
+    release.set()
+    for future in (first, second):
+        with pytest.raises(RuntimeError):
+            future.result(timeout=2)
+    batcher.stop()
+    assert batcher.metrics()["rejected"] == 1 and batcher.metrics()["errors"] == 2
+
+def test_cancelled_futures_are_skipped_and_the_worker_survives():
+    """
+    Una entrada cancelada antes de llegar al lote se descarta sin detener el hilo y las demás
+    (y las que llegan después) se resuelven
+    """
+    release = threading.Event()
+    shapes = []
+
+    def slow_run(input_values, attention_mask):
+        release.wait(2)
+        shapes.append(input_values.shape)
+        return input_values.sum(axis=1, keepdims=True)
+
+    batcher = InferenceBatcher(slow_run, max_batch=1, max_wait_ms=0)
+    # la primera ocupa el hilo; las siguientes esperan en la cola
+    first = batcher.submit(np.ones(10))
+    cancelled = batcher.submit(np.ones(20))
+    kept = batcher.submit(np.ones(30))
+    assert cancelled.cancel()
+    release.set()
+
+    assert first.result(timeout=2).tolist() == [10.0]
+    assert kept.result(timeout=2).tolist() == [30.0]
+    assert batcher.submit(np.ones(40)).result(timeout=2).tolist() == [40.0]
+    batcher.stop()
+
+    assert (1, 20) not in shapes
+    assert batcher.metrics()["cancelled"] == 1
@@ -0,0 +1,46 @@
+# backend/tests/unit/test_llm_client.py
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.chat import llm_client
+from src.chat.llm_client import stream_groq_response, LLMStreamInterrupted, LLM_ERROR_MESSAGE
+
+def _fake_client(tokens: list, fail_after: bool):
+    """Cliente de Groq cuyo stream devuelve 'tokens' y después falla (o falla antes de empezar)."""
+    async def stream():
+        for token in tokens:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+        if fail_after:
+            raise ConnectionError("conexión cortada")
+
+    async def create(**kwargs):
+        if not fail_after:
+            raise ConnectionError("groq caído")
+        return stream()
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_stream_error_text_only_replaces_an_empty_response(monkeypatch):
+    """
+    Si Groq falla antes del primer token se emite el mensaje de error; si falla a mitad de la
+    respuesta, el mensaje no se pega a los tokens enviados y se avisa con LLMStreamInterrupted
+    """
+    monkeypatch.setattr(llm_client, "async_groq_client", _fake_client([], fail_after=False))
+    assert [token async for token in stream_groq_response([])] == [LLM_ERROR_MESSAGE]
+
+    monkeypatch.setattr(llm_client, "async_groq_client", _fake_client(["Hola, ", "¿qué"], fail_after=True))
+    received = []
+    with pytest.raises(LLMStreamInterrupted):
+        async for token in stream_groq_response([]):
+            received.append(token)
+    assert received == ["Hola, ", "¿qué"]
@@ -0,0 +1,75 @@
+# backend/tests/unit/test_memory_worker.py
+
+import sys
+from pathlib import Path
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.chat.memory_worker import MemoryExtractionQueue
+from src.chat.session_store import SessionStore
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_retries_deduplicates_and_delivers_facts_once():
+    """
+    Un fallo transitorio se reintenta, un turno repetido se descarta y los hechos
+    se entregan una sola vez
+    """
+    calls = []
+    saved = {}
+
+    async def flaky_extract(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise RuntimeError("fallo transitorio")
+        return {"nombre": "Leo"}
+
+    queue = MemoryExtractionQueue(flaky_extract, saved.update, max_retries=2, retry_backoff_s=0.0)
+
+    assert queue.submit(1, "Me llamo Leo", "Encantada, Leo.") is True
+    assert queue.submit(1, "Me llamo Leo", "Encantada, Leo.") is False
+    await queue.stop()
+
+    metrics = queue.metrics()
+    assert len(calls) == 2
+    assert saved == {"nombre": "Leo"}
+    assert metrics["retried"] == 1 and metrics["deduplicated"] == 1 and metrics["processed"] == 1
+    assert metrics["queue_depth"] == 0
+    assert queue.pop_new_facts(1) == {"nombre": "Leo"}
+    assert queue.pop_new_facts(1) == {}
+
+@pytest.mark.asyncio
+async def test_saved_facts_reach_the_cached_session_before_the_poll():
+    """
+    Los hechos guardados entran en el contexto de la sesión aunque el cliente los recoja antes por sondeo
+    """
+    async def extract(prompt):
+        return {"ciudad": "Valencia"}
+
+    store = SessionStore()
+    context = store.put(3, [])
+    queue = MemoryExtractionQueue(extract, lambda facts: None, on_facts=store.update_memory, retry_backoff_s=0.0)
+    queue.submit(3, "Vivo en Valencia", "¡Qué bonita ciudad!")
+    await queue.stop()
+
+    assert queue.pop_new_facts(3) == {"ciudad": "Valencia"}
+    assert context.long_term_memory == {"ciudad": "Valencia"}
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    """
+    Tras agotar los reintentos el trabajo se cuenta como fallido y no bloquea la cola
+    """
+    async def broken_extract(prompt):
+        raise RuntimeError("groq caído")
+
+    queue = MemoryExtractionQueue(broken_extract, lambda facts: None, max_retries=1, retry_backoff_s=0.0)
+    queue.submit(7, "hola", "hola")
+    await queue.stop()
+
+    assert queue.metrics()["failed"] == 1
+    assert queue.pending_jobs(7) == 0
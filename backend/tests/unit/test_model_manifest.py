@@ -0,0 +1,99 @@
+# backend/tests/unit/test_model_manifest.py
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+import numpy as np
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.analysis.model_manifest import load_manifest, write_manifest, select_variant
+from src.analysis.model_benchmark import agreement
+
+def _variant(file, p50, top1):
+    return {"file": file, "latency_p50_ms": p50, "top1_agreement": top1}
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_auto_selects_fastest_variant_within_tolerance(tmp_path):
+    """
+    'auto' elige la variante más rápida que coincide lo bastante con fp32 y cuyo fichero existe;
+    sin manifiesto se queda con fp32
+    """
+    for name in ("model_float32.onnx", "model_quant_dynamic.onnx", "model_quant_static.onnx"):
+        (tmp_path / name).write_bytes(b"")
+    manifest = {
+        "min_agreement": 0.95,
+        "evaluation": {"source": "holdout"},
+        "variants": {
+            "onnx_fp32": _variant("model_float32.onnx", 40.0, 1.0),
+            "onnx_dynamic": _variant("model_quant_dynamic.onnx", 25.0, 0.97),
+            "onnx_static": _variant("model_quant_static.onnx", 15.0, 0.80),
+        },
+    }
+    write_manifest(str(tmp_path), manifest)
+    loaded = load_manifest(str(tmp_path))
+    assert loaded == manifest
+
+    assert select_variant(loaded, str(tmp_path)) == "onnx_dynamic"
+    assert select_variant(loaded, str(tmp_path), min_agreement=0.75) == "onnx_static"
+    assert select_variant(loaded, str(tmp_path), min_agreement=0.99) == "onnx_fp32"
+
+    # una variante por cubetas solo cuenta si están los modelos de todas sus cubetas
+    loaded["variants"]["onnx_fp32_bucketed"] = {
+        "files": ["model_float32_2s.onnx", "model_float32_5s.onnx"], "latency_p50_ms": 10.0, "top1_agreement": 1.0
+    }
+    (tmp_path / "model_float32_2s.onnx").write_bytes(b"")
+    assert select_variant(loaded, str(tmp_path)) == "onnx_dynamic"
+    (tmp_path / "model_float32_5s.onnx").write_bytes(b"")
+    assert select_variant(loaded, str(tmp_path)) == "onnx_fp32_bucketed"
+    del loaded["variants"]["onnx_fp32_bucketed"]
+
+    # medida con ruido sintético, la coincidencia no basta para dejar la referencia
+    synthetic = {**loaded, "evaluation": {"source": "synthetic"}}
+    assert select_variant(synthetic, str(tmp_path)) == "onnx_fp32"
+    assert select_variant({**loaded, "evaluation": {}}, str(tmp_path)) == "onnx_fp32"
+
+    (tmp_path / "model_quant_dynamic.onnx").unlink()
+    assert select_variant(loaded, str(tmp_path)) == "onnx_fp32"
+    assert select_variant(load_manifest(str(tmp_path / "vacio")), str(tmp_path)) == "onnx_fp32"
+
+def test_benchmark_runs_in_fresh_process_and_measures_agreement(tmp_path):
+    """
+    El benchmark de una variante se ejecuta como proceso aparte y devuelve métricas y logits
+    comparables con la referencia
+    """
+    onnx = pytest.importorskip("onnx")
+    from onnx import helper, numpy_helper, TensorProto
+    weights = numpy_helper.from_array(np.eye(4, 3, dtype=np.float32), "W")
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["input_values", "W"], ["logits"])], "tiny",
+        [helper.make_tensor_value_info("input_values", TensorProto.FLOAT, ["batch_size", 4])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch_size", 3])],
+        initializer=[weights],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(tmp_path / "model.onnx"))
+
+    segments = np.array([[3, 1, 0, 0], [0, 2, 1, 0], [0, 0, 5, 9]], dtype=np.float32)
+    np.savez(tmp_path / "segments.npz", segments=segments)
+    completed = subprocess.run(
+        [sys.executable, "-m", "src.analysis.model_benchmark", "--model", str(tmp_path / "model.onnx"),
+         "--segments", str(tmp_path / "segments.npz"), "--output", str(tmp_path / "logits.npy")],
+        cwd=BACKEND_ROOT, capture_output=True, text=True, check=True,
+    )
+    metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert metrics["supports_batching"] and metrics["throughput_per_s"] > 0
+    assert metrics["latency_p95_ms"] >= metrics["latency_p50_ms"] > 0
+
+    logits = np.load(tmp_path / "logits.npy")
+    np.testing.assert_allclose(logits, segments[:, :3])
+    assert agreement(logits, logits) == {"top1_agreement": 1.0, "max_prob_diff": 0.0}
+    flipped = logits.copy()
+    flipped[0] = [0, 0, 9]
+    assert agreement(logits, flipped)["top1_agreement"] == pytest.approx(2 / 3)
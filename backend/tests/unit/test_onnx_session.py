@@ -0,0 +1,76 @@
+# backend/tests/unit/test_onnx_session.py
+
+import sys
+import os
+from pathlib import Path
+import numpy as np
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+onnx = pytest.importorskip("onnx")
+from onnx import helper, numpy_helper, TensorProto
+
+from src.analysis import onnx_session
+from src.analysis.onnx_session import create_session, build_session_options, optimized_model_path
+
+def _write_tiny_model(path: Path):
+    """Modelo (B, 4) -> (B, 2) con un MatMul + Add que el optimizador fusiona en un Gemm."""
+    weights = numpy_helper.from_array(np.arange(8, dtype=np.float32).reshape(4, 2), "W")
+    bias = numpy_helper.from_array(np.ones(2, dtype=np.float32), "B")
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["input_values", "W"], ["mm"]),
+         helper.make_node("Add", ["mm", "B"], ["added"]),
+         helper.make_node("Identity", ["added"], ["logits"])],
+        "tiny",
+        [helper.make_tensor_value_info("input_values", TensorProto.FLOAT, ["batch_size", 4])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch_size", 2])],
+        initializer=[weights, bias],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    # versión de IR que entienden también las versiones de onnxruntime algo más antiguas que onnx
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_optimized_graph_is_cached_and_reused(tmp_path):
+    """
+    La primera carga guarda el grafo optimizado; la segunda lo reutiliza con los mismos resultados,
+    y un fichero de caché dañado se regenera en vez de impedir el arranque
+    """
+    model_path = tmp_path / "model_float32.onnx"
+    _write_tiny_model(model_path)
+    inputs = {"input_values": np.ones((3, 4), dtype=np.float32)}
+
+    session, info = create_session(str(model_path), profile="throughput", intra_op_threads=1)
+    cached_path = optimized_model_path(str(model_path))
+    assert not info["optimized_from_cache"] and os.path.exists(cached_path)
+    expected = session.run(None, inputs)[0]
+
+    session, info = create_session(str(model_path), profile="throughput", intra_op_threads=1)
+    assert info["optimized_from_cache"] and info["intra_op_threads"] == 1
+    np.testing.assert_allclose(session.run(None, inputs)[0], expected)
+
+    Path(cached_path).write_bytes(b"no es un modelo")
+    session, info = create_session(str(model_path))
+    assert not info["optimized_from_cache"]
+    np.testing.assert_allclose(session.run(None, inputs)[0], expected)
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+def test_profiles_and_threads_per_worker(monkeypatch):
+    """
+    Los perfiles ajustan la espera activa y la memoria, y los hilos se reparten entre workers
+    """
+    options = build_session_options("low_memory", intra_op_threads=2)
+    assert not options.enable_cpu_mem_arena and options.intra_op_num_threads == 2
+    assert options.get_session_config_entry("session.intra_op.allow_spinning") == "0"
+    with pytest.raises(ValueError):
+        build_session_options("turbo")
+
+    monkeypatch.setattr(onnx_session, "available_cpus", lambda: 8)
+    assert onnx_session.intra_op_threads_per_worker(1) == 8
+    assert onnx_session.intra_op_threads_per_worker(3) == 2
+    assert onnx_session.intra_op_threads_per_worker(16) == 1
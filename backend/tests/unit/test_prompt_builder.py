@@ -0,0 +1,44 @@
+# backend/tests/unit/test_prompt_builder.py
+
+import sys
+from pathlib import Path
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.chat.prompt_builder import SYSTEM_PROMPT_TEMPLATE, build_llm_prompt
+from src.chat.prompt_templates import get_template, register_template
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_static_prefix_is_byte_stable_and_context_goes_in_suffix():
+    """
+    El primer mensaje es idéntico entre turnos; la memoria y las emociones van justo antes del último mensaje
+    """
+    history = [{"role": "user", "content": "Hola"}, {"role": "assistant", "content": "Hola, ¿cómo estás?"}]
+    first = build_llm_prompt(history + [{"role": "user", "content": "Cansado."}], "Cansado.",
+                             {"facial_dominant": "sad"}, {"nombre": "Leo"})
+    second = build_llm_prompt(history + [{"role": "user", "content": "Mejor."}], "Mejor.",
+                              {"vocal_emotions": [{"label": "HAPPY", "score": 0.9}]}, {}, "Habló de su trabajo.")
+
+    assert first[0] == second[0] and first[0]["content"] == SYSTEM_PROMPT_TEMPLATE.text
+    assert first[1:3] == second[1:3] == history
+    assert "Leo" in first[-2]["content"] and "sad" in first[-2]["content"]
+    assert "Habló de su trabajo." in second[-2]["content"] and "happy" in second[-2]["content"]
+    assert second[-1] == {"role": "user", "content": "Mejor."}
+
+def test_registry_versions_and_hashes_templates():
+    """
+    Una versión publicada no puede cambiar de contenido y la última versión es la predeterminada
+    """
+    v1 = register_template("test_template", 1, "  Texto fijo  ")
+    assert v1.text == "Texto fijo" and register_template("test_template", 1, "Texto fijo") == v1
+    with pytest.raises(ValueError):
+        register_template("test_template", 1, "Otro texto")
+
+    v2 = register_template("test_template", 2, "Otro texto")
+    assert get_template("test_template") == v2 and get_template("test_template", 1) == v1
+    assert v1.sha256 != v2.sha256 and v2.cache_key.startswith("test_template@v2:")
+    assert get_template("lumen_system") is SYSTEM_PROMPT_TEMPLATE
@@ -0,0 +1,38 @@
+# backend/tests/unit/test_sentence_splitter.py
+
+import sys
+from pathlib import Path
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.chat.sentence_splitter import SentenceSplitter
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_emits_sentences_as_tokens_arrive():
+    """
+    Verifica que cada frase se entrega en cuanto llega el espacio que la cierra
+    """
+    splitter = SentenceSplitter()
+    tokens = ["Suena muy ", "frustrante", ". ", "¿Qué te ", "gustaría cambiar?"]
+
+    emitted = []
+    for token in tokens:
+        emitted.append(splitter.feed(token))
+
+    assert emitted[2] == ["Suena muy frustrante."]
+    assert splitter.flush() == "¿Qué te gustaría cambiar?"
+    assert splitter.flush() is None
+
+def test_does_not_split_abbreviations_decimals_or_short_fragments():
+    """
+    Las abreviaturas, los decimales y las frases muy cortas no deben cortar el texto
+    """
+    splitter = SentenceSplitter(min_chars=12)
+
+    sentences = splitter.feed("Sí. La Dra. García dijo 3.5 horas al día. Vale")
+
+    assert sentences == ["Sí. La Dra. García dijo 3.5 horas al día."]
+    assert splitter.flush() == "Vale"
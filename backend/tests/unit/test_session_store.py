@@ -0,0 +1,82 @@
+# backend/tests/unit/test_session_store.py
+
+import sys
+from pathlib import Path
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.chat.session_store import SessionStore
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_loads_once_and_keeps_history_bounded():
+    """
+    La sesión se carga desde el loader solo en el primer acceso y el historial no crece sin límite
+    """
+    loads = []
+
+    def loader(session_id):
+        loads.append(session_id)
+        return [{"role": "user", "content": "hola"}], {"nombre": "Leo"}
+
+    store = SessionStore(loader=loader, max_messages=3)
+
+    context = await store.get(1)
+    store.append(1, [{"role": "assistant", "content": "hola, Leo"}, {"role": "user", "content": "¿qué tal?"},
+                     {"role": "assistant", "content": "bien"}])
+    context = await store.get(1)
+
+    assert loads == [1]
+    assert [m["content"] for m in context.history()] == ["hola, Leo", "¿qué tal?", "bien"]
+    assert context.long_term_memory == {"nombre": "Leo"}
+    assert store.metrics()["hits"] == 1 and store.metrics()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used_session():
+    """
+    Al superar el máximo de sesiones se desaloja la menos usada
+    """
+    store = SessionStore(max_sessions=2)
+    store.put(1, [])
+    store.put(2, [])
+    await store.get(1)
+    store.put(3, [])
+
+    assert store.metrics()["evictions"] == 1
+    assert (await store.get(2)).history() == []
+    assert store.metrics()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_turn_of_an_evicted_session_does_not_hide_the_database():
+    """
+    Si la sesión se desaloja durante el turno, sus mensajes no crean un contexto vacío:
+    el siguiente acceso la recarga desde la base de datos
+    """
+    database = {1: ([{"role": "user", "content": "hola"}], {"nombre": "Leo"})}
+    store = SessionStore(loader=lambda session_id: database[session_id], max_sessions=1)
+
+    await store.get(1)
+    store.put(2, [])  # desaloja la sesión 1 mientras su turno está en curso
+    new_messages = [{"role": "user", "content": "¿qué tal?"}, {"role": "assistant", "content": "bien"}]
+    database[1] = (database[1][0] + new_messages, database[1][1])
+    store.append(1, new_messages)
+
+    context = await store.get(1)
+    assert [m["content"] for m in context.history()] == ["hola", "¿qué tal?", "bien"]
+    assert context.long_term_memory == {"nombre": "Leo"}
+
+def test_full_history_without_memory_keeps_stored_facts():
+    """
+    En el modo compatible, un historial sin 'long_term_memory' no borra la memoria guardada
+    y la memoria enviada se añade a la existente
+    """
+    store = SessionStore()
+    store.put(1, [], {"nombre": "Leo"})
+    store.update_memory(1, {"ciudad": "Valencia"})
+
+    assert store.put(1, [{"role": "user", "content": "hola"}]).long_term_memory == {"nombre": "Leo", "ciudad": "Valencia"}
+    assert store.put(1, [], {"edad": "30"}).long_term_memory == {"nombre": "Leo", "ciudad": "Valencia", "edad": "30"}
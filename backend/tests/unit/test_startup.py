@@ -0,0 +1,71 @@
+# backend/tests/unit/test_startup.py
+
+import sys
+import asyncio
+import time
+from pathlib import Path
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.utils.startup import StartupTracker
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_models_load_in_parallel_and_failures_degrade_readiness():
+    """
+    Las cargas se ejecutan en hilos a la vez, un fallo no detiene el arranque (queda 'degraded')
+    y el informe recoge el estado y la duración de cada paso
+    """
+    tracker = StartupTracker(import_time_s=1.5)
+
+    def slow_load(value):
+        time.sleep(0.2)
+        return value
+
+    def broken_load():
+        raise RuntimeError("modelo no encontrado")
+
+    with tracker.step("database"):
+        pass
+    tracker.skip("facial_detector", "desactivado")
+    start = time.perf_counter()
+    pending = asyncio.gather(tracker.load("vocal", slow_load, "v"), tracker.load("asr", slow_load, "a"),
+                             tracker.load("tts", broken_load, required=False))
+    await asyncio.sleep(0.05)
+    assert not tracker.ready and tracker.report()["components"]["vocal"]["status"] == "loading"
+
+    assert await pending == ["v", "a", None]
+    assert time.perf_counter() - start < 0.38
+    tracker.finish()
+
+    report = tracker.report()
+    assert tracker.ready and report["status"] == "ready" and report["degraded"] and not tracker.failed
+    assert report["import_time_s"] == 1.5
+    assert report["components"]["tts"] == {"status": "failed", "duration_s": pytest.approx(0, abs=0.1), "error": "modelo no encontrado"}
+    assert report["components"]["vocal"]["duration_s"] >= 0.2
+    assert report["components"]["facial_detector"]["status"] == "skipped"
+
+    with pytest.raises(ValueError):
+        with tracker.step("config"):
+            raise ValueError("clave inválida")
+    assert tracker.components["config"]["status"] == "failed"
+
+@pytest.mark.asyncio
+async def test_required_component_failure_marks_startup_failed():
+    """
+    Si falla un componente obligatorio el arranque termina pero el estado es 'failed'
+    """
+    tracker = StartupTracker()
+
+    def broken_load():
+        raise RuntimeError("modelo no encontrado")
+
+    assert await tracker.load("vocal", broken_load) is None
+    tracker.finish()
+
+    assert tracker.ready and tracker.failed
+    assert tracker.report()["status"] == "failed"
@@ -0,0 +1,90 @@
+# backend/tests/unit/test_streaming_emotion.py
+
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.analysis.streaming_emotion import StreamingEmotionRecognizer
+
+class FakeRecognizer:
+    """Reconocedor mínimo: el logit de 'ANG' es la amplitud media de la ventana."""
+    target_sampling_rate = 100
+    id2label = {0: "neu", 1: "ang"}
+
+    def normalize(self, samples):
+        return samples
+
+    def probabilities(self, logits):
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def to_predictions(self, scores):
+        return sorted(
+            [{"label": self.id2label[i].upper(), "score": float(score)} for i, score in enumerate(scores)],
+            key=lambda x: x["score"], reverse=True
+        )
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_windows_follow_the_hop_and_final_aggregate_covers_the_tail():
+    """
+    Se infiere una ventana deslizante por salto mientras llega el audio, las
+    actualizaciones salen suavizadas y en orden, y al final solo se infiere el resto
+    """
+    windows = []
+    updates = []
+
+    async def infer(values):
+        windows.append(values.copy())
+        return np.array([0.0, float(values.mean()) * 10], dtype=np.float32)
+
+    async def on_update(update):
+        updates.append(update)
+
+    stream = StreamingEmotionRecognizer(FakeRecognizer(), infer, window_s=3.0, hop_s=1.0, on_update=on_update)
+    # 4.5 s en fragmentos irregulares: silencio y después voz "enfadada"
+    audio = np.concatenate([np.zeros(200, dtype=np.float32), np.ones(250, dtype=np.float32)])
+    for start in range(0, len(audio), 70):
+        stream.push(audio[start:start + 70])
+
+    predictions, per_window = await stream.finalize(include_windows=True)
+
+    assert [len(window) for window in windows] == [100, 200, 300, 300, 300]
+    # el buffer circular conserva el orden temporal de la ventana
+    np.testing.assert_array_equal(windows[3], audio[100:400])
+    assert [(w["start_s"], w["end_s"]) for w in per_window] == [(0, 1), (0, 2), (0, 3), (1, 4), (1.5, 4.5)]
+    assert [u["end_s"] for u in updates] == [1, 2, 3, 4, 4.5]
+
+    # el suavizado hace que la subida de 'ANG' sea gradual
+    anger = [next(e["score"] for e in u["emotions"] if e["label"] == "ANG") for u in updates]
+    assert anger == sorted(anger) and anger[2] < per_window[2]["emotions"][0]["score"]
+    assert predictions[0]["label"] == "ANG"
+
+@pytest.mark.asyncio
+async def test_failed_window_is_skipped_and_short_audio_returns_none():
+    """
+    Una ventana que falla no rompe el stream, y sin audio suficiente no hay resultado
+    """
+    calls = []
+
+    async def infer(values):
+        calls.append(len(values))
+        if len(calls) == 1:
+            raise RuntimeError("cola llena")
+        return np.zeros(2, dtype=np.float32)
+
+    stream = StreamingEmotionRecognizer(FakeRecognizer(), infer, window_s=2.0, hop_s=1.0)
+    stream.push(np.zeros(250, dtype=np.float32))
+    predictions, per_window = await stream.finalize()
+    assert calls == [100, 200, 200]
+    assert predictions is not None and per_window is None
+
+    stream = StreamingEmotionRecognizer(FakeRecognizer(), infer, min_window_s=0.25)
+    stream.push(np.zeros(10, dtype=np.float32))
+    assert await stream.finalize() == (None, None)
@@ -0,0 +1,68 @@
+# backend/tests/unit/test_tts_cache.py
+
+import sys
+import asyncio
+from pathlib import Path
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.audio.tts_cache import TTSCache
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_repeated_and_concurrent_phrases_are_synthesized_once(tmp_path):
+    """
+    La misma frase (con espacios distintos) se sintetiza una sola vez aunque se pida en paralelo,
+    los fallos no se guardan y la caché de disco sobrevive a un reinicio
+    """
+    calls = []
+
+    async def synthesize(text):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return None if text == "falla" else text.encode()
+
+    cache = TTSCache(cache_dir=str(tmp_path))
+    key = TTSCache.key("Suena muy frustrante.", "voz:+100%")
+    assert TTSCache.key("  Suena muy\nfrustrante. ", "voz:+100%") == key
+    assert TTSCache.key("Suena muy frustrante.", "voz:+0%") != key
+
+    results = await asyncio.gather(*(cache.get_or_synthesize(key, lambda: synthesize("Suena muy frustrante.")) for _ in range(3)))
+    assert results == [b"Suena muy frustrante."] * 3
+    assert await cache.get_or_synthesize(key, lambda: synthesize("otra")) == b"Suena muy frustrante."
+    assert calls == ["Suena muy frustrante."]
+
+    failed_key = TTSCache.key("falla", "voz:+100%")
+    assert await cache.get_or_synthesize(failed_key, lambda: synthesize("falla")) is None
+    assert await cache.get_or_synthesize(failed_key, lambda: synthesize("falla")) is None
+    metrics = cache.metrics()
+    assert (metrics["hits"], metrics["coalesced"], metrics["misses"], metrics["failures"]) == (1, 2, 3, 2)
+
+    restarted = TTSCache(cache_dir=str(tmp_path))
+    assert await restarted.get_or_synthesize(key, lambda: synthesize("otra")) == b"Suena muy frustrante."
+    assert restarted.metrics()["disk_hits"] == 1 and len(calls) == 3
+
+@pytest.mark.asyncio
+async def test_memory_and_disk_are_bounded_in_bytes(tmp_path):
+    """
+    Al superar los límites se desaloja lo menos usado, en memoria y en disco
+    """
+    async def synthesize():
+        return b"x" * 40
+
+    cache = TTSCache(max_memory_bytes=100, cache_dir=str(tmp_path), max_disk_bytes=100)
+    keys = [TTSCache.key(f"frase {i}", "voz:+100%") for i in range(3)]
+    await cache.get_or_synthesize(keys[0], synthesize)
+    await cache.get_or_synthesize(keys[1], synthesize)
+    # usar la primera la convierte en la más reciente
+    await cache.get_or_synthesize(keys[0], synthesize)
+    await cache.get_or_synthesize(keys[2], synthesize)
+
+    metrics = cache.metrics()
+    assert metrics["memory_bytes"] <= 100 and metrics["disk_bytes"] <= 100
+    assert keys[1] not in cache._memory and keys[0] in cache._memory
+    assert sorted(path.name for path in tmp_path.rglob("*") if path.is_file()) == sorted([keys[0], keys[2]])
@@ -0,0 +1,55 @@
+# backend/tests/unit/test_tts_player.py
+
+import sys
+from pathlib import Path
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.audio import tts_player
+from src.audio.tts_player import EdgeTTSBackend, create_tts_backend
+
+class FakeCommunicate:
+    """Sustituto de edge_tts.Communicate que emite audio y metadatos intercalados."""
+    created = []
+
+    def __init__(self, text, voice, volume="+0%"):
+        self.fail = text == "falla"
+        FakeCommunicate.created.append((text, voice, volume))
+
+    async def stream(self):
+        yield {"type": "audio", "data": b"ID3"}
+        yield {"type": "SentenceBoundary", "offset": 0}
+        if self.fail:
+            raise ConnectionError("sin red")
+        yield {"type": "audio", "data": b"mp3"}
+
+# --- PRUEBAS UNITARIAS ---
+
+@pytest.mark.asyncio
+async def test_edge_synthesis_streams_into_memory_with_service_volume(monkeypatch):
+    """
+    El MP3 se arma en memoria con los fragmentos del servicio, el volumen se pide a Edge-TTS
+    y un fallo a mitad de la síntesis devuelve None
+    """
+    monkeypatch.setattr(tts_player, "Communicate", FakeCommunicate)
+    backend = EdgeTTSBackend(voice="es-CO-SalomeNeural", volume="+100%")
+
+    assert [chunk async for chunk in backend.stream("hola")] == [b"ID3", b"mp3"]
+    assert await backend.synthesize("hola") == b"ID3mp3"
+    assert FakeCommunicate.created[-1] == ("hola", "es-CO-SalomeNeural", "+100%")
+    assert await backend.synthesize("falla") is None
+    assert backend.mimetype == "audio/mpeg" and backend.voice_id == "edge:es-CO-SalomeNeural:+100%"
+
+def test_unknown_or_unavailable_backends_fail_loudly(monkeypatch):
+    """
+    Un motor desconocido o una voz de Piper sin la librería instalada fallan al cargar, no en el primer turno
+    """
+    with pytest.raises(ValueError):
+        create_tts_backend("desconocido")
+    # None en sys.modules hace que 'from piper import ...' lance ImportError
+    monkeypatch.setitem(sys.modules, "piper", None)
+    with pytest.raises(ImportError):
+        create_tts_backend("piper")
@@ -0,0 +1,64 @@
+# backend/tests/unit/test_vad.py
+
+import sys
+import asyncio
+from pathlib import Path
+import numpy as np
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.audio.vad import EnergyEndpointer
+from src.analysis.streaming_asr import LocalStreamingASR
+
+RATE = 16000
+
+def _noise(seconds, level=0.001):
+    return (np.random.default_rng(0).standard_normal(int(RATE * seconds)) * level).astype(np.float32)
+
+def _tone(seconds, level=0.3):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (level * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_endpointer_detects_utterance_in_small_frames():
+    """
+    Con audio entregado en fragmentos de 20 ms, se detecta el inicio y el fin de la frase
+    y el audio devuelto incluye la voz completa más el pre-roll
+    """
+    endpointer = EnergyEndpointer(sample_rate=RATE, end_silence_ms=300)
+    stream = np.concatenate([_noise(1.0), _tone(1.0), _noise(1.0)])
+
+    events = []
+    for start in range(0, len(stream), 320):
+        events.extend(endpointer.process(stream[start:start + 320]))
+
+    assert [event.type for event in events] == ["speech_start", "speech_end"]
+    assert abs(events[0].sample_index / RATE - 1.0) < 0.15
+    assert 2.25 < events[1].sample_index / RATE < 2.45
+    utterance = endpointer.pop_utterance()
+    assert len(utterance) / RATE > 1.0
+    assert endpointer.pop_utterance().size == 0
+
+def test_endpointer_ignores_background_noise_and_short_clicks():
+    """
+    El ruido de fondo constante y un chasquido de 30 ms no abren una frase
+    """
+    endpointer = EnergyEndpointer(sample_rate=RATE, threshold_db=-60, start_ms=90)
+    events = endpointer.process(np.concatenate([_noise(1.0, level=0.01), _tone(0.03), _noise(1.0, level=0.01)]))
+    assert events == [] and not endpointer.in_speech
+
+def test_local_streaming_asr_works_offline():
+    """
+    El sustituto local acumula el audio y devuelve un texto sin usar la red
+    """
+    async def run():
+        asr = LocalStreamingASR(RATE)
+        await asr.start()
+        await asr.send(_tone(0.5))
+        await asr.send(_tone(1.0))
+        return await asr.finish()
+
+    assert asyncio.run(run()) == "(frase de 1.5 segundos)"
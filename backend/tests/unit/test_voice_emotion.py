@@ -0,0 +1,71 @@
+# backend/tests/unit/test_voice_emotion.py
+
+import sys
+import io
+from pathlib import Path
+import numpy as np
+import soundfile as sf
+import pytest
+
+# añadir el directorio raíz del backend a la ruta del sistema
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+onnx = pytest.importorskip("onnx")
+from onnx import helper, numpy_helper, TensorProto
+
+from src.analysis.model_manifest import write_manifest, model_info
+from src.analysis.voice_emotion import ONNXEmotionRecognizer, DEFAULT_MODEL_INFO, normalize_frames, softmax
+
+def _write_pooling_model(path: Path):
+    """Modelo (B, L) -> (B, 3): media, media del cuadrado y una constante; no depende de torch."""
+    graph = helper.make_graph(
+        [helper.make_node("ReduceMean", ["input_values"], ["mean"], axes=[1], keepdims=1),
+         helper.make_node("Mul", ["input_values", "input_values"], ["squared"]),
+         helper.make_node("ReduceMean", ["squared"], ["power"], axes=[1], keepdims=1),
+         helper.make_node("Mul", ["mean", "zero"], ["constant"]),
+         helper.make_node("Concat", ["mean", "power", "constant"], ["logits"], axis=1)],
+        "pooling",
+        [helper.make_tensor_value_info("input_values", TensorProto.FLOAT, ["batch_size", "sequence_length"])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch_size", 3])],
+        initializer=[numpy_helper.from_array(np.zeros(1, dtype=np.float32), "zero")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+# --- PRUEBAS UNITARIAS ---
+
+def test_recognizer_serves_with_numpy_and_manifest_labels(tmp_path):
+    """
+    El reconocedor normaliza y calcula las probabilidades con numpy y toma las etiquetas del manifiesto
+    """
+    _write_pooling_model(tmp_path / "model_float32.onnx")
+    write_manifest(str(tmp_path), {"model": model_info("modelo/prueba", {0: "media", 1: "potencia", 2: "cero"}, 16000, True)})
+    recognizer = ONNXEmotionRecognizer("modelo/prueba", str(tmp_path / "model_float32.onnx"), cache_optimized=False)
+    assert recognizer.id2label == {0: "media", 1: "potencia", 2: "cero"} and recognizer.target_sampling_rate == 16000
+
+    wav = io.BytesIO()
+    sf.write(wav, (np.sin(np.arange(16000) / 5) * 0.3 + 0.1).astype(np.float32), 16000, format="WAV")
+    predictions = recognizer.predict(wav.getvalue())
+    # tras normalizar: media 0 y potencia 1, así que 'potencia' gana
+    assert predictions[0]["label"] == "POTENCIA"
+    assert sum(p["score"] for p in predictions) == pytest.approx(1.0)
+    scores = {p["label"]: p["score"] for p in predictions}
+    np.testing.assert_allclose(scores["POTENCIA"], softmax(np.array([0.0, 1.0, 0.0]))[1], atol=1e-3)
+
+    # sin manifiesto: etiquetas del modelo por defecto
+    (tmp_path / "manifest.json").unlink()
+    recognizer = ONNXEmotionRecognizer("modelo/prueba", str(tmp_path / "model_float32.onnx"), cache_optimized=False)
+    assert recognizer.id2label == DEFAULT_MODEL_INFO["id2label"]
+
+def test_numpy_normalizer_and_softmax_match_reference():
+    """
+    La normalización coincide con la de Wav2Vec2 ((x - media) / sqrt(var + 1e-7)) y la softmax es estable
+    """
+    frames = np.random.default_rng(0).standard_normal((3, 4000)).astype(np.float32) * 0.2 + 0.5
+    reference = (frames - frames.mean(axis=1, keepdims=True)) / np.sqrt(frames.var(axis=1, keepdims=True) + 1e-7)
+    np.testing.assert_allclose(normalize_frames(frames), reference, atol=1e-4)
+
+    probabilities = softmax(np.array([[1000.0, 1000.0], [0.0, np.log(3.0)]]))
+    np.testing.assert_allclose(probabilities, [[0.5, 0.5], [0.25, 0.75]])
@@ -124,7 +124,7 @@ export const useLumenChat = () => {
 
           if (response.ai_audio_b64) {
             const audio = new Audio(
-              `data:audio/mp3;base64,${response.ai_audio_b64}`
+              `data:${response.ai_audio_mimetype ?? "audio/mpeg"};base64,${response.ai_audio_b64}`
             );
             setIsAISpeaking(true);
             audio.play();
@@ -41,6 +41,7 @@ interface InteractionRequest {
 export interface InteractionResponse {
   ai_text: string;
   ai_audio_b64: string | null;
+  ai_audio_mimetype?: string | null;
   extracted_memory: LongTermMemory;
   updated_chat_history: Message[];
   vocal_analysis_result: VocalEmotionResult | null;